@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from app.api.flight_routes import get_flight_service
+from app.services.cache_warmer import CacheWarmer
+from app.core.config import settings
+from typing import Dict, Optional
+
+router = APIRouter()
+cache_warmer: Optional[CacheWarmer] = None
+
+
+def get_cache_warmer() -> CacheWarmer:
+    """Return the process-wide CacheWarmer over the shared FlightService"""
+    global cache_warmer
+    if cache_warmer is None:
+        cache_warmer = CacheWarmer(get_flight_service())
+    return cache_warmer
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if settings.ADMIN_TOKEN and x_admin_token != settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/top-routes", response_model=Dict, dependencies=[Depends(require_admin)])
+async def top_routes(limit: int = Query(20, description="Number of routes to return", ge=1, le=settings.ROUTE_TRACKER_SIZE)):
+    """
+    Most requested flight searches with their estimated request counts,
+    the freshness of their cached results and the cache warmer's state.
+    """
+    service = get_flight_service()
+    tracker = service.popular_routes
+    routes = []
+    for key, count, error in tracker.top(limit):
+        origin, destination, departure_date, adults, return_date, legs = key
+        routes.append({
+            "origin": origin,
+            "destination": destination,
+            "departure_date": departure_date,
+            "adults": adults,
+            "return_date": return_date,
+            "legs": [":".join(leg) for leg in legs],
+            "count": round(count, 2),
+            "error": round(error, 2),
+            "share": round(count / tracker.total, 4) if tracker.total else 0.0,
+            "cached_ttl": round(service.result_ttl(*key), 1)
+        })
+    return {
+        "routes": routes,
+        "tracked": len(tracker),
+        "capacity": tracker.capacity,
+        "warmer": get_cache_warmer().stats()
+    }
+
+
+@router.get("/currency-selection", response_model=Dict, dependencies=[Depends(require_admin)])
+async def currency_selection(
+    origin: Optional[str] = Query(None, description="With destination, also show the learned ranking for this route"),
+    destination: Optional[str] = Query(None)
+):
+    """
+    Upstream calls made versus querying every currency on every search,
+    plus the shadow-checked hit rate of the learned top-N currencies.
+    """
+    service = get_flight_service()
+    selector = service.currency_selector
+    report = {"enabled": settings.CURRENCY_SELECTION_ENABLED, "currencies": service.currencies, **selector.stats()}
+    if origin and destination:
+        scores = selector.scores(service.currencies, origin, destination)
+        report["ranking"] = [
+            {"currency": currency, "score": round(scores[currency], 4)}
+            for currency in selector.rank(service.currencies, origin, destination)
+        ]
+        report["next_selection_size"] = min(selector.top_n, len(service.currencies))
+    return report
+
+
+@router.get("/fast-mode", response_model=Dict, dependencies=[Depends(require_admin)])
+async def fast_mode():
+    """Divergence between mode=fast FX-projected prices and real per-currency quotes, from sampled audits"""
+    return {
+        "base_currency": settings.FAST_COMPARE_BASE_CURRENCY,
+        "audit_rate": settings.FAST_AUDIT_RATE,
+        **get_flight_service().fast_divergence.stats()
+    }
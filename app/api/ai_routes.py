@@ -1,38 +1,78 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from app.services.ai_service import AIService
-from typing import Dict
+from app.core.http_cache import conditional_json
+from typing import AsyncIterator, Dict, Tuple, Any, Optional
 import json
 
 router = APIRouter()
-ai_service = AIService()
+ai_service: Optional[AIService] = None
+
+
+def get_ai_service() -> AIService:
+    """Return the process-wide AIService, created by the app lifespan or on first use"""
+    global ai_service
+    if ai_service is None:
+        ai_service = AIService()
+    return ai_service
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+async def _sse(events: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[str]:
+    """Format (event, data) pairs as server-sent events"""
+    async for event, data in events:
+        yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 @router.post("/recommendations", response_model=Dict)
 async def get_recommendations(search_data: Dict):
     """Get AI-powered travel recommendations"""
     try:
-        recommendations = await ai_service.get_travel_recommendations(search_data)
+        recommendations = await get_ai_service().get_travel_recommendations(search_data)
         return recommendations
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI recommendation error: {str(e)}")
 
+@router.post("/recommendations/stream")
+async def stream_recommendations(search_data: Dict):
+    """Stream AI travel recommendations as server-sent events"""
+    return StreamingResponse(
+        _sse(get_ai_service().stream_travel_recommendations(search_data)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.post("/analyze-prices", response_model=Dict)
 async def analyze_prices(prices: Dict):
     """Analyze price trends and provide insights"""
     try:
-        analysis = await ai_service.analyze_price_trends(prices.get("prices", []))
+        analysis = await get_ai_service().analyze_price_trends(
+            prices.get("prices", []),
+            narrative=bool(prices.get("narrative", False)),
+            route=prices.get("route")
+        )
         return analysis
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Price analysis error: {str(e)}")
 
 @router.get("/destination-insights/{destination}", response_model=Dict)
-async def get_destination_insights(destination: str):
-    """Get AI insights about a destination"""
+async def get_destination_insights(destination: str, request: Request):
+    """Get AI insights about a destination; supports If-None-Match revalidation"""
     try:
-        insights = await ai_service.get_destination_insights(destination)
-        return insights
+        service = get_ai_service()
+        insights = await service.get_destination_insights(destination)
+        return conditional_json(request, insights, service.insights_ttl(destination))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Destination insights error: {str(e)}")
 
+@router.get("/destination-insights/{destination}/stream")
+async def stream_destination_insights(destination: str):
+    """Stream AI destination insights as server-sent events"""
+    return StreamingResponse(
+        _sse(get_ai_service().stream_destination_insights(destination)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.post("/parse-query", response_model=Dict)
 async def parse_natural_language_query(query_data: Dict):
     """Parse natural language flight search queries"""
@@ -41,7 +81,17 @@ async def parse_natural_language_query(query_data: Dict):
         raise HTTPException(status_code=400, detail="Query is required")
 
     try:
-        result = await ai_service.process_natural_language_query(query)
+        result = await get_ai_service().process_natural_language_query(query)
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Query parsing error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Query parsing error: {str(e)}")
+
+@router.get("/cache-stats", response_model=Dict)
+async def get_cache_stats():
+    """Hit-rate metrics for cached AI recommendations and price analysis"""
+    return get_ai_service().cache_stats()
+
+@router.get("/client-stats", response_model=Dict)
+async def get_client_stats():
+    """Concurrency, queueing and retry counters for the shared Groq client"""
+    return get_ai_service().client_stats()
@@ -1,29 +1,201 @@
-from fastapi import APIRouter, HTTPException, Query
-from app.services.flight_service import FlightService
-from typing import Dict
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.services.flight_service import FlightService, Legs
+from app.services.offer_snapshot import SORT_COLUMNS, encode_cursor, decode_cursor
+from app.services.offer_ranking import parse_weights
+from app.services.airports import airport_index
+from app.core.config import settings
+from app.core.http_cache import conditional_json
+from typing import Dict, Optional
 import datetime
+import time
 
 router = APIRouter()
-flight_service = FlightService()
+flight_service: Optional[FlightService] = None
+
+
+def get_flight_service() -> FlightService:
+    """Return the process-wide FlightService, created by the app lifespan or on first use"""
+    global flight_service
+    if flight_service is None:
+        flight_service = FlightService()
+    return flight_service
+
+
+def parse_date(value: str, name: str) -> datetime.date:
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} format. Use YYYY-MM-DD")
+
+
+def parse_time_of_day(value: Optional[str], name: str) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        parsed = datetime.datetime.strptime(value, "%H:%M")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} format. Use HH:MM")
+    return parsed.hour * 60 + parsed.minute
+
+
+def parse_legs(value: Optional[str], departure_date: str) -> Legs:
+    """Parse "LAX:SFO:2025-12-05,SFO:JFK:2025-12-09" into legs that follow the first flight in date order"""
+    if not value:
+        return ()
+    legs = []
+    previous = parse_date(departure_date, "departure_date")
+    for part in value.split(","):
+        fields = part.strip().split(":")
+        if len(fields) != 3 or not fields[0] or not fields[1]:
+            raise HTTPException(status_code=400, detail="Invalid legs. Use ORIGIN:DESTINATION:YYYY-MM-DD, comma separated")
+        date = parse_date(fields[2], "leg date")
+        if date < previous:
+            raise HTTPException(status_code=400, detail="Legs must be in date order")
+        previous = date
+        legs.append((fields[0], fields[1], fields[2]))
+    if len(legs) > 5:
+        raise HTTPException(status_code=400, detail="At most 6 flights per multi-city trip")
+    return tuple(legs)
 
 @router.get("/search", response_model=Dict)
 async def search_flights(
+    request: Request,
     origin: str = Query(..., description="Origin airport code (e.g., JFK)"),
     destination: str = Query(..., description="Destination airport code (e.g., LAX)"),
     departure_date: str = Query(..., description="Departure date in YYYY-MM-DD format"),
-    adults: int = Query(1, description="Number of adult passengers", ge=1, le=9)
+    adults: int = Query(1, description="Number of adult passengers", ge=1, le=9),
+    return_date: Optional[str] = Query(None, description="Return date in YYYY-MM-DD format for a round trip"),
+    legs: Optional[str] = Query(None, description="Further flights of a multi-city trip, e.g. LAX:SFO:2025-12-05,SFO:JFK:2025-12-09"),
+    mode: str = Query("full", pattern="^(full|fast)$", description="full queries each currency; fast makes one call and converts with FX rates"),
+    sort: str = Query("price", pattern="^(price|best)$", description="best adds best_offers ranked on price, duration, stops and bags"),
+    weights: Optional[str] = Query(None, description="Ranking weights for sort=best, e.g. price:0.5,duration:0.3,stops:0.2"),
+    nearby_km: float = Query(0, ge=0, le=settings.NEARBY_MAX_RADIUS_KM, description="Also search airports within this many km of origin and destination")
 ):
     """
-    Search for flight offers and compare prices across currencies
+    Search for one-way, round-trip or multi-city flight offers and compare prices across currencies.
+    Responses carry an ETag and may be reused by clients while the server-side result is fresh.
+    Metro codes (NYC, LON, ...) and nearby_km search every airport pair and tag results with it.
     """
     try:
         # Validate date format
-        datetime.datetime.strptime(departure_date, "%Y-%m-%d")
+        departure = datetime.datetime.strptime(departure_date, "%Y-%m-%d").date()
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    if return_date and legs:
+        raise HTTPException(status_code=400, detail="Use either return_date or legs, not both")
+    if return_date and parse_date(return_date, "return_date") < departure:
+        raise HTTPException(status_code=400, detail="return_date must not be before departure_date")
+    trip_legs = parse_legs(legs, departure_date)
+    expand = nearby_km > 0 or airport_index.is_metro(origin) or airport_index.is_metro(destination)
+    if expand and trip_legs:
+        raise HTTPException(status_code=400, detail="nearby_km and metro codes are not supported for multi-city trips")
+    try:
+        ranking_weights = parse_weights(weights) if sort == "best" else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     try:
-        result = await flight_service.compare_prices(origin, destination, departure_date, adults)
-        return result
+        service = get_flight_service()
+        if expand:
+            result = await service.compare_nearby(origin, destination, departure_date, adults, return_date, mode, nearby_km)
+            ttl = min((
+                service.result_ttl(pair["origin"], pair["destination"], departure_date, adults, return_date, mode=mode)
+                for pair in result["airport_pairs"] if "error" not in pair
+            ), default=0)
+        else:
+            result = await service.compare_prices(origin, destination, departure_date, adults, return_date, trip_legs, mode)
+            ttl = service.result_ttl(origin, destination, departure_date, adults, return_date, trip_legs, mode)
+        snapshot = service.offer_snapshot(result.get("snapshot_id")) if ranking_weights else None
+        if snapshot is not None:
+            best_offers, front_size = snapshot.rank_best(ranking_weights, settings.RANKING_LIMIT, service.parse_flight_offer)
+            result = {**result, "best_offers": best_offers, "pareto_front_size": front_size, "ranking_weights": ranking_weights}
+        return conditional_json(request, result, ttl)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error searching flights: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error searching flights: {str(e)}")
+
+@router.get("/offers", response_model=Dict)
+async def list_offers(
+    origin: Optional[str] = Query(None, description="Origin airport code; required unless cursor is given"),
+    destination: Optional[str] = Query(None, description="Destination airport code; required unless cursor is given"),
+    departure_date: Optional[str] = Query(None, description="Departure date in YYYY-MM-DD format; required unless cursor is given"),
+    adults: int = Query(1, ge=1, le=9),
+    return_date: Optional[str] = Query(None, description="Return date in YYYY-MM-DD format for a round trip"),
+    legs: Optional[str] = Query(None, description="Further flights of a multi-city trip"),
+    currency: Optional[str] = Query(None, description="Only offers quoted in this currency"),
+    nonstop: bool = Query(False, description="Only offers without stops on the outbound itinerary"),
+    carrier: Optional[str] = Query(None, description="Only offers with a segment on this airline (e.g. AA)"),
+    depart_after: Optional[str] = Query(None, description="Earliest outbound departure, HH:MM local time"),
+    depart_before: Optional[str] = Query(None, description="Latest outbound departure, HH:MM local time"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price, in `currency` if given, otherwise USD"),
+    max_duration: Optional[int] = Query(None, ge=0, description="Maximum total elapsed time in minutes"),
+    sort: str = Query("price", description="price, duration, departure, stops or best; prefix with - for descending"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous page; other filters are then ignored")
+):
+    """
+    Filter, sort and page through every offer of a search.
+
+    The first page runs (or reuses) the flight search, which stores all
+    offers in a snapshot. Later pages and re-sorts are served from that
+    snapshot without upstream calls.
+    """
+    started = time.perf_counter()
+    service = get_flight_service()
+
+    if cursor:
+        try:
+            snapshot_id, filters, sort, offset = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        snapshot = service.offer_snapshot(snapshot_id)
+        if snapshot is None:
+            raise HTTPException(status_code=410, detail="Offers for this cursor have expired; repeat the search")
+    else:
+        if not (origin and destination and departure_date):
+            raise HTTPException(status_code=400, detail="origin, destination and departure_date are required without a cursor")
+        if sort.lstrip("-") not in SORT_COLUMNS:
+            raise HTTPException(status_code=400, detail=f"Invalid sort. Use one of: {', '.join(SORT_COLUMNS)}")
+        departure = parse_date(departure_date, "departure_date")
+        if return_date and parse_date(return_date, "return_date") < departure:
+            raise HTTPException(status_code=400, detail="return_date must not be before departure_date")
+        trip_legs = parse_legs(legs, departure_date)
+        filters = {
+            "currency": currency.upper() if currency else None,
+            "nonstop": nonstop,
+            "carrier": carrier.upper() if carrier else None,
+            "depart_after": parse_time_of_day(depart_after, "depart_after"),
+            "depart_before": parse_time_of_day(depart_before, "depart_before"),
+            "max_price": max_price,
+            "max_duration": max_duration
+        }
+        filters = {name: value for name, value in filters.items() if value not in (None, False)}
+        offset = 0
+
+        try:
+            result = await service.compare_prices(origin, destination, departure_date, adults, return_date, trip_legs)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error searching flights: {str(e)}")
+        if "error" in result:
+            return {"offers": [], "total": 0, "next_cursor": None, "error": result["error"]}
+        snapshot = service.offer_snapshot(result.get("snapshot_id"))
+        if snapshot is None:
+            # The result outlived its snapshot; fetch again so there is a full offer set to page through
+            try:
+                result = await service.refresh(origin, destination, departure_date, adults, return_date, trip_legs)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Error searching flights: {str(e)}")
+            snapshot = service.offer_snapshot(result.get("snapshot_id"))
+            if snapshot is None:
+                return {"offers": [], "total": 0, "next_cursor": None, "error": result.get("error", "No flight offers found")}
+
+    offers, total = snapshot.page(filters, sort, offset, limit, service.parse_flight_offer)
+    next_offset = offset + len(offers)
+    return {
+        "snapshot_id": snapshot.id,
+        "offers": offers,
+        "total": total,
+        "offset": offset,
+        "next_cursor": encode_cursor(snapshot.id, filters, sort, next_offset) if next_offset < total else None,
+        "carriers": snapshot.carriers,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
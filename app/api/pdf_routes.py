@@ -1,91 +1,249 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
 from app.services.pdf_service import PDFService
+from app.services.pdf_cache import PDFCache
+from app.services.search_index import SearchIndex
 from app.core.config import settings
+import hashlib
+import json
 import os
-import shutil
-from typing import List, Dict
+import tempfile
+import time
+from typing import AsyncIterator, BinaryIO, List, Dict, NamedTuple, Optional
 
 router = APIRouter()
-pdf_service = PDFService()
+pdf_cache = PDFCache()
+search_index = SearchIndex()
 
-@router.post("/upload", response_model=List[Dict])
-async def upload_pdf(file: UploadFile = File(...)):
-    """
-    Upload and process a PDF file
-    """
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+COPY_CHUNK_SIZE = 1024 * 1024  # 1MB chunks
+
+
+class UploadTooLargeError(Exception):
+    pass
 
-    # Check file size
-    file_size = 0
-    chunk_size = 1024 * 1024  # 1MB chunks
-    while chunk := await file.read(chunk_size):
-        file_size += len(chunk)
-        if file_size > settings.MAX_UPLOAD_SIZE:
-            raise HTTPException(status_code=400, detail="File too large")
 
-    # Reset file pointer
-    await file.seek(0)
+class SpooledUpload(NamedTuple):
+    path: str
+    sha256: str
 
-    # Create upload directory if it doesn't exist
+
+def _spool_to_disk(source: BinaryIO, max_size: int) -> SpooledUpload:
+    """Copy an upload to a uniquely named temp file in one pass, hashing it and enforcing the size limit"""
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    fd, file_path = tempfile.mkstemp(suffix=".pdf", dir=settings.UPLOAD_DIR)
+    digest = hashlib.sha256()
+    file_size = 0
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := source.read(COPY_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise UploadTooLargeError()
+                digest.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        os.remove(file_path)
+        raise
+    return SpooledUpload(file_path, digest.hexdigest())
+
+
+async def save_upload(file: UploadFile) -> SpooledUpload:
+    """Validate an uploaded PDF and spool it to disk without blocking the event loop"""
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
-    # Save the uploaded file
-    file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        return await run_in_threadpool(_spool_to_disk, file.file, settings.MAX_UPLOAD_SIZE)
+    except UploadTooLargeError:
+        raise HTTPException(status_code=400, detail="File too large")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
 
+
+def _remove_file(file_path: str) -> None:
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+
+def _labelled(chunk: Dict, filename: str) -> Dict:
+    """Report the client's filename as the chunk source rather than a spool or cache path"""
+    return {**chunk, "metadata": {**chunk.get("metadata", {}), "source": filename}}
+
+
+def _unlabelled(chunk: Dict) -> Dict:
+    """Drop the source from a chunk shared across uploads; it is the server's spool path, not the client's name"""
+    metadata = {key: value for key, value in chunk.get("metadata", {}).items() if key != "source"}
+    return {**chunk, "metadata": metadata}
+
+
+async def _ndjson(rows: AsyncIterator[Dict], file_path: str) -> AsyncIterator[str]:
+    """Serialize rows as NDJSON, removing the spooled upload once the stream ends"""
+    try:
+        async for row in rows:
+            yield json.dumps(row) + "\n"
+    except Exception as e:
+        yield json.dumps({"error": str(e)}) + "\n"
+    finally:
+        _remove_file(file_path)
+
+
+def _ndjson_response(rows: AsyncIterator[Dict], file_path: str = "", headers: Dict = None) -> StreamingResponse:
+    return StreamingResponse(_ndjson(rows, file_path), media_type="application/x-ndjson", headers=headers)
+
+
+async def _cache_while_streaming(chunks: AsyncIterator[Dict], digest: str) -> AsyncIterator[Dict]:
+    """Pass chunks through while writing them, without their source, to the cache; only complete documents are published"""
+    writer = await run_in_threadpool(pdf_cache.open_writer, digest)
+    try:
+        async for chunk in chunks:
+            await run_in_threadpool(writer.write, _unlabelled(chunk))
+            yield chunk
+    except BaseException:
+        await run_in_threadpool(writer.discard)
+        raise
+    await run_in_threadpool(writer.commit)
+
+
+async def _relabel(rows: AsyncIterator[Dict], filename: str) -> AsyncIterator[Dict]:
+    async for row in rows:
+        yield _labelled(row, filename)
+
+
+async def _index_while_streaming(rows: AsyncIterator[Dict], digest: str) -> AsyncIterator[Dict]:
+    """Pass rows through and index the document, without chunk sources, once the stream has completed"""
+    collected = []
+    async for row in rows:
+        collected.append(_unlabelled(row))
+        yield row
+    await run_in_threadpool(search_index.add, digest, collected)
+
+
+async def _index_document(digest: str, chunks: List[Dict]) -> None:
+    if not search_index.contains(digest):
+        await run_in_threadpool(search_index.add, digest, chunks)
+
+
+def _cache_headers(digest: str, hit: bool) -> Dict:
+    return {"X-Content-SHA256": digest, "X-Cache": "HIT" if hit else "MISS"}
+
+
+@router.post("/upload", response_model=List[Dict])
+async def upload_pdf(
+    response: Response,
+    file: UploadFile = File(...),
+    stream: bool = Query(False, description="Stream chunks as NDJSON while pages are parsed")
+):
+    """
+    Upload and process a PDF file
+    """
+    file_path, digest = await save_upload(file)
+
+    # Identical bytes were processed before: serve the cached chunks without parsing
+    cached = await run_in_threadpool(pdf_cache.iter_chunks, digest)
+    if cached is not None:
+        _remove_file(file_path)
+        if stream:
+            rows = _relabel(iterate_in_threadpool(cached), file.filename)
+            if not search_index.contains(digest):
+                rows = _index_while_streaming(rows, digest)
+            return _ndjson_response(rows, headers=_cache_headers(digest, True))
+        response.headers.update(_cache_headers(digest, True))
+        chunks = await run_in_threadpool(list, cached)
+        await _index_document(digest, chunks)
+        return [_labelled(chunk, file.filename) for chunk in chunks]
+
+    if stream:
+        chunks = _cache_while_streaming(PDFService().iter_chunks(file_path), digest)
+        rows = _index_while_streaming(_relabel(chunks, file.filename), digest)
+        return _ndjson_response(rows, file_path, headers=_cache_headers(digest, False))
+
     try:
         # Process the PDF
-        chunks = await pdf_service.process_pdf(file_path)
-        return chunks
+        chunks = await PDFService().process_pdf(file_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
     finally:
         # Clean up the uploaded file
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        _remove_file(file_path)
 
-@router.post("/extract-text")
-async def extract_text(file: UploadFile = File(...)):
+    # The cache and the search index are shared by every client, so neither keeps the chunk source
+    shared = [_unlabelled(chunk) for chunk in chunks]
+    await run_in_threadpool(pdf_cache.put, digest, shared)
+    await run_in_threadpool(search_index.add, digest, shared)
+    response.headers.update(_cache_headers(digest, False))
+    return [_labelled(chunk, file.filename) for chunk in chunks]
+
+@router.api_route("/cache/{sha256}", methods=["GET", "HEAD"])
+async def get_cached_chunks(sha256: str, request: Request):
     """
-    Extract raw text from a PDF file
+    Check for (HEAD) or fetch (GET) the processed chunks of a previously uploaded PDF by its SHA-256
     """
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    sha256 = sha256.lower()
+    if not pdf_cache.contains(sha256):
+        raise HTTPException(status_code=404, detail="Document not cached")
+    if request.method == "HEAD":
+        return Response(status_code=200, headers={"X-Content-SHA256": sha256})
 
-    # Check file size
-    file_size = 0
-    chunk_size = 1024 * 1024  # 1MB chunks
-    while chunk := await file.read(chunk_size):
-        file_size += len(chunk)
-        if file_size > settings.MAX_UPLOAD_SIZE:
-            raise HTTPException(status_code=400, detail="File too large")
+    chunks = await run_in_threadpool(pdf_cache.get, sha256)
+    if chunks is None:
+        raise HTTPException(status_code=404, detail="Document not cached")
+    return chunks
 
-    # Reset file pointer
-    await file.seek(0)
+@router.get("/search")
+async def search_documents(
+    q: str = Query(..., min_length=1, description="Search terms"),
+    k: int = Query(10, ge=1, le=100, description="Number of chunks to return"),
+    doc_id: Optional[List[str]] = Query(None, description="SHA-256 of the documents to search; defaults to all in memory")
+):
+    """
+    Rank indexed PDF chunks against a query with BM25
+    """
+    doc_ids = [d.lower() for d in doc_id] if doc_id else None
+    if doc_ids and not all(PDFCache.is_digest(d) for d in doc_ids):
+        raise HTTPException(status_code=400, detail="Invalid document id")
 
-    # Create upload directory if it doesn't exist
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    started = time.perf_counter()
+    results = await run_in_threadpool(search_index.search, q, k, doc_ids)
+    return {
+        "query": q,
+        "results": results,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
 
-    # Save the uploaded file
-    file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
-    try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
+@router.delete("/index/{sha256}")
+async def evict_document(
+    sha256: str,
+    purge: bool = Query(False, description="Also delete the persisted index from disk")
+):
+    """
+    Evict a document's search index from memory
+    """
+    sha256 = sha256.lower()
+    if not PDFCache.is_digest(sha256):
+        raise HTTPException(status_code=400, detail="Invalid document id")
+    if not search_index.evict(sha256, purge=purge):
+        raise HTTPException(status_code=404, detail="Document not indexed")
+    return {"doc_id": sha256, "evicted": True, "purged": purge}
+
+@router.post("/extract-text")
+async def extract_text(
+    file: UploadFile = File(...),
+    stream: bool = Query(False, description="Stream page text as NDJSON")
+):
+    """
+    Extract raw text from a PDF file
+    """
+    file_path, _ = await save_upload(file)
+    if stream:
+        return _ndjson_response(PDFService().iter_pages(file_path), file_path)
 
     try:
         # Extract text from PDF
-        text = await pdf_service.extract_text(file_path)
+        text = await PDFService().extract_text(file_path)
         return {"text": text}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error extracting text: {str(e)}")
     finally:
         # Clean up the uploaded file
-        if os.path.exists(file_path):
-            os.remove(file_path)
\ No newline at end of file
+        _remove_file(file_path)
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.api import ai_routes, flight_routes
+from app.services.search_service import SearchService, SearchDeadlineError
+from typing import Dict, Optional
+import datetime
+
+router = APIRouter()
+
+@router.get("", response_model=Dict)
+async def search_with_insights(
+    origin: str = Query(..., description="Origin airport code (e.g., JFK)"),
+    destination: str = Query(..., description="Destination airport code (e.g., LAX)"),
+    departure_date: str = Query(..., description="Departure date in YYYY-MM-DD format"),
+    adults: int = Query(1, description="Number of adult passengers", ge=1, le=9),
+    deadline: Optional[float] = Query(None, description="Overall deadline in seconds", gt=0, le=60)
+):
+    """
+    Search flights and gather AI insights in one round-trip
+    """
+    try:
+        datetime.datetime.strptime(departure_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    # Reuse the route singletons so caches and the Groq client are shared
+    search_service = SearchService(flight_routes.get_flight_service(), ai_routes.get_ai_service())
+    try:
+        return await search_service.search_with_insights(origin, destination, departure_date, adults, deadline)
+    except SearchDeadlineError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching flights: {str(e)}")
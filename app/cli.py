@@ -1,24 +1,313 @@
 import typer
+import asyncio
+import csv
+import glob
+import hashlib
 import httpx
+import json
 import os
+import sys
+import time
 from rich.console import Console
-from rich.progress import Progress
+from rich.progress import Progress, BarColumn, MofNCompleteColumn, TextColumn, TimeElapsedColumn
 from rich.panel import Panel
 from rich.table import Table
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, TextIO
 
 app = typer.Typer()
 console = Console()
+err_console = Console(stderr=True)
+
+# Set by the --local flag: serve requests from app.main in-process instead of over HTTP
+state = {"local": False}
+LOCAL_BASE_URL = "http://local"
+
+SEARCH_FIELDS = [
+    "origin", "destination", "departure_date", "adults",
+    "lowest_currency", "lowest_price", "lowest_price_usd", "elapsed_ms", "error"
+]
+
+def load_api_app():
+    # Imported on demand so remote commands do not pay for loading the API
+    from app.main import app as api_app
+    return api_app
 
 def create_client(base_url: str = "http://localhost:8000") -> httpx.Client:
+    if state["local"]:
+        from fastapi.testclient import TestClient
+        # Used as a context manager, TestClient also runs the app's lifespan
+        return TestClient(load_api_app(), base_url=LOCAL_BASE_URL, raise_server_exceptions=False)
     return httpx.Client(base_url=base_url)
 
+@asynccontextmanager
+async def create_async_client(base_url: str = "http://localhost:8000", concurrency: int = 4) -> AsyncIterator[httpx.AsyncClient]:
+    """One pooled client for a whole batch, with a connection per concurrent request"""
+    if state["local"]:
+        # Every request in the batch hits the same in-process app, so service caches are shared too
+        api_app = load_api_app()
+        async with api_app.router.lifespan_context(api_app):
+            transport = httpx.ASGITransport(app=api_app)
+            async with httpx.AsyncClient(transport=transport, base_url=LOCAL_BASE_URL, timeout=None) as client:
+                yield client
+        return
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+        yield client
+
+def batch_progress(target: Console = console) -> Progress:
+    return Progress(
+        TextColumn("[cyan]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+        console=target
+    )
+
+def iter_ndjson(client: httpx.Client, url: str, file_path: str):
+    """Post a PDF and yield NDJSON rows as the server streams them back"""
+    with open(file_path, "rb") as f:
+        with client.stream(
+            "POST",
+            url,
+            params={"stream": "true"},
+            files={"file": (os.path.basename(file_path), f, "application/pdf")},
+            timeout=None
+        ) as response:
+            if response.status_code != 200:
+                response.read()
+                raise Exception(response.json()["detail"])
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                row = json.loads(line)
+                if "error" in row:
+                    raise Exception(row["error"])
+                yield row
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+def fetch_cached_chunks(client: httpx.Client, digest: str) -> Optional[List[Dict]]:
+    """Return the server's cached chunks for a document hash, or None if it must be uploaded"""
+    if client.head(f"/api/pdf/cache/{digest}").status_code != 200:
+        return None
+    response = client.get(f"/api/pdf/cache/{digest}")
+    return response.json() if response.status_code == 200 else None
+
+def expand_pdf_paths(target: str) -> List[str]:
+    """Resolve a file, directory or glob pattern to a sorted list of PDF paths"""
+    if os.path.isdir(target):
+        paths = glob.glob(os.path.join(target, "*.pdf")) + glob.glob(os.path.join(target, "*.PDF"))
+    elif glob.has_magic(target):
+        paths = glob.glob(target, recursive=True)
+    else:
+        paths = [target]
+    return sorted({path for path in paths if path.lower().endswith(".pdf") and os.path.isfile(path)})
+
+async def upload_one(client: httpx.AsyncClient, file_path: str) -> Dict:
+    """Upload one PDF unless the server already has its chunks cached"""
+    digest = await asyncio.to_thread(file_sha256, file_path)
+    result = {"file": file_path, "bytes": os.path.getsize(file_path), "cached": False}
+    if (await client.head(f"/api/pdf/cache/{digest}")).status_code == 200:
+        response = await client.get(f"/api/pdf/cache/{digest}")
+        result["cached"] = True
+    else:
+        # Streamed from disk in blocks rather than read whole into memory
+        with open(file_path, "rb") as f:
+            response = await client.post(
+                "/api/pdf/upload",
+                files={"file": (os.path.basename(file_path), f, "application/pdf")}
+            )
+    if response.status_code != 200:
+        raise Exception(response.json()["detail"])
+    result["chunks"] = len(response.json())
+    return result
+
+async def bulk_upload(paths: List[str], server_url: str, concurrency: int) -> List[Dict]:
+    """Upload many PDFs with at most `concurrency` requests in flight over one connection pool"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(client: httpx.AsyncClient, file_path: str) -> Dict:
+        async with semaphore:
+            try:
+                return await upload_one(client, file_path)
+            except Exception as e:
+                return {"file": file_path, "bytes": os.path.getsize(file_path), "error": str(e)}
+
+    results = []
+    async with create_async_client(server_url, concurrency) as client:
+        with batch_progress() as progress:
+            task = progress.add_task("Uploading PDFs", total=len(paths))
+            for done in asyncio.as_completed([run(client, path) for path in paths]):
+                results.append(await done)
+                progress.advance(task)
+    return results
+
+def print_throughput(title: str, count: int, failed: int, elapsed: float, extra: str = "", target: Console = console) -> None:
+    rate = count / elapsed if elapsed else 0.0
+    target.print(Panel.fit(
+        f"[green]{count - failed} succeeded[/green], [red]{failed} failed[/red]\n"
+        f"Elapsed: {elapsed:.2f}s ({rate:.1f}/s){extra}",
+        title=title
+    ))
+
+def read_routes(routes_file: str) -> List[Dict]:
+    """Read origin,destination,departure_date[,adults] rows from a CSV file"""
+    with open(routes_file, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = {"origin", "destination", "departure_date"} - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"Routes file is missing columns: {', '.join(sorted(missing))}")
+        return [
+            {
+                "origin": row["origin"].strip().upper(),
+                "destination": row["destination"].strip().upper(),
+                "departure_date": row["departure_date"].strip(),
+                "adults": int(row.get("adults") or 1)
+            }
+            for row in reader
+        ]
+
+async def price_route(client: httpx.AsyncClient, route: Dict) -> Dict:
+    started = time.perf_counter()
+    row = dict(route)
+    try:
+        response = await client.get("/api/flights/search", params=route)
+        body = response.json()
+        if response.status_code != 200:
+            row["error"] = body.get("detail", f"HTTP {response.status_code}")
+        elif "error" in body:
+            row["error"] = body["error"]
+        else:
+            row.update({
+                "lowest_currency": body.get("lowest_currency"),
+                "lowest_price": body.get("lowest_price"),
+                "lowest_price_usd": body.get("lowest_price_usd")
+            })
+    except Exception as e:
+        row["error"] = str(e)
+    row["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return row
+
+class ResultWriter:
+    """Writes one row per completed search as CSV or NDJSON"""
+
+    def __init__(self, out: TextIO, fmt: str):
+        self.out = out
+        self.fmt = fmt
+        if fmt == "csv":
+            self.writer = csv.DictWriter(out, fieldnames=SEARCH_FIELDS, extrasaction="ignore")
+            self.writer.writeheader()
+
+    def write(self, row: Dict) -> None:
+        if self.fmt == "csv":
+            self.writer.writerow(row)
+        else:
+            self.out.write(json.dumps(row) + "\n")
+        self.out.flush()
+
+async def search_routes(routes: List[Dict], server_url: str, concurrency: int, writer: ResultWriter) -> List[Dict]:
+    """Price every route concurrently, writing each result as soon as it completes"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(client: httpx.AsyncClient, route: Dict) -> Dict:
+        async with semaphore:
+            return await price_route(client, route)
+
+    results = []
+    async with create_async_client(server_url, concurrency) as client:
+        with batch_progress(err_console) as progress:
+            task = progress.add_task("Pricing routes", total=len(routes))
+            for done in asyncio.as_completed([run(client, route) for route in routes]):
+                row = await done
+                writer.write(row)
+                results.append(row)
+                progress.advance(task)
+    return results
+
+def stream_upload(file_path: str, server_url: str) -> None:
+    """Print chunks as they are parsed instead of waiting for the whole document"""
+    count = 0
+    with create_client(server_url) as client:
+        cached = fetch_cached_chunks(client, file_sha256(file_path))
+        chunks = cached if cached is not None else iter_ndjson(client, "/api/pdf/upload", file_path)
+        for chunk in chunks:
+            count += 1
+            content = chunk["content"][:100] + "..." if len(chunk["content"]) > 100 else chunk["content"]
+            console.print(f"[cyan]{count}[/cyan] (page {chunk['metadata'].get('page')}) [green]{content}[/green]")
+    console.print(Panel.fit(
+        f"[green]Successfully processed PDF![/green]\n"
+        f"Number of chunks: {count}",
+        title="Upload Complete"
+    ))
+
+def stream_extract_text(file_path: str, server_url: str, output_file: Optional[str]) -> None:
+    """Write or print page text as it is extracted"""
+    with create_client(server_url) as client:
+        if output_file:
+            with open(output_file, "w", encoding="utf-8") as out:
+                for i, page in enumerate(iter_ndjson(client, "/api/pdf/extract-text", file_path)):
+                    out.write(("\n" if i else "") + page["text"])
+            console.print(f"[green]Text saved to {output_file}[/green]")
+        else:
+            for page in iter_ndjson(client, "/api/pdf/extract-text", file_path):
+                console.print(Panel(page["text"], title=f"Page {page['page'] + 1}"))
+
+@app.callback()
+def main(
+    local: bool = typer.Option(False, "--local", help="Run the API in-process instead of calling a server")
+):
+    """Air travel price comparison and PDF processing CLI."""
+    state["local"] = local
+
+def run_bulk_upload(target: str, server_url: str, concurrency: int) -> None:
+    paths = expand_pdf_paths(target)
+    if not paths:
+        console.print(f"[red]Error: No PDF files match {target}[/red]")
+        raise typer.Exit(1)
+
+    started = time.perf_counter()
+    results = asyncio.run(bulk_upload(paths, server_url, concurrency))
+    elapsed = time.perf_counter() - started
+
+    table = Table(title="Uploaded PDFs")
+    table.add_column("File", style="cyan")
+    table.add_column("Chunks", justify="right")
+    table.add_column("Status")
+    for result in sorted(results, key=lambda r: r["file"]):
+        if "error" in result:
+            table.add_row(result["file"], "-", f"[red]{result['error']}[/red]")
+        else:
+            table.add_row(result["file"], str(result["chunks"]), "cached" if result["cached"] else "[green]processed[/green]")
+    console.print(table)
+
+    failed = sum(1 for r in results if "error" in r)
+    megabytes = sum(r["bytes"] for r in results) / 1048576
+    print_throughput(
+        "Upload Complete", len(results), failed, elapsed,
+        f"\n{megabytes:.1f} MB at {megabytes / elapsed if elapsed else 0:.1f} MB/s, "
+        f"{sum(1 for r in results if r.get('cached'))} served from cache"
+    )
+    if failed:
+        raise typer.Exit(1)
+
 @app.command()
 def upload(
-    file_path: str = typer.Argument(..., help="Path to the PDF file to upload"),
-    server_url: str = typer.Option("http://localhost:8000", help="Server URL")
+    file_path: str = typer.Argument(..., help="PDF file, directory of PDFs, or glob pattern to upload"),
+    server_url: str = typer.Option("http://localhost:8000", help="Server URL"),
+    stream: bool = typer.Option(False, help="Stream chunks as pages are parsed"),
+    concurrency: int = typer.Option(4, min=1, help="Uploads in flight at once for directories and globs")
 ):
-    """Upload and process a PDF file."""
+    """Upload and process a PDF file, or every PDF in a directory or glob."""
+    if os.path.isdir(file_path) or glob.has_magic(file_path):
+        run_bulk_upload(file_path, server_url, concurrency)
+        return
+
     if not os.path.exists(file_path):
         console.print(f"[red]Error: File {file_path} does not exist[/red]")
         raise typer.Exit(1)
@@ -27,38 +316,49 @@ def upload(
         console.print("[red]Error: Only PDF files are supported[/red]")
         raise typer.Exit(1)
 
+    if stream:
+        try:
+            stream_upload(file_path, server_url)
+        except Exception as e:
+            console.print(f"[red]Error: {str(e)}[/red]")
+            raise typer.Exit(1)
+        return
+
     with Progress() as progress:
         task = progress.add_task("[cyan]Uploading PDF...", total=100)
 
         try:
             with create_client(server_url) as client:
-                with open(file_path, "rb") as f:
-                    response = client.post(
-                        "/api/pdf/upload",
-                        files={"file": (os.path.basename(file_path), f, "application/pdf")}
-                    )
-                    progress.update(task, completed=100)
-
-                if response.status_code == 200:
+                # Skip the upload entirely when the server already has this document
+                chunks = fetch_cached_chunks(client, file_sha256(file_path))
+                if chunks is None:
+                    with open(file_path, "rb") as f:
+                        response = client.post(
+                            "/api/pdf/upload",
+                            files={"file": (os.path.basename(file_path), f, "application/pdf")}
+                        )
+                    if response.status_code != 200:
+                        console.print(f"[red]Error: {response.json()['detail']}[/red]")
+                        return
                     chunks = response.json()
-                    console.print(Panel.fit(
-                        f"[green]Successfully processed PDF![/green]\n"
-                        f"Number of chunks: {len(chunks)}",
-                        title="Upload Complete"
-                    ))
-
-                    # Display chunks in a table
-                    table = Table(title="PDF Content Chunks")
-                    table.add_column("Chunk #", style="cyan")
-                    table.add_column("Content Preview", style="green")
-
-                    for i, chunk in enumerate(chunks, 1):
-                        content = chunk["content"][:100] + "..." if len(chunk["content"]) > 100 else chunk["content"]
-                        table.add_row(str(i), content)
-
-                    console.print(table)
-                else:
-                    console.print(f"[red]Error: {response.json()['detail']}[/red]")
+                progress.update(task, completed=100)
+
+            console.print(Panel.fit(
+                f"[green]Successfully processed PDF![/green]\n"
+                f"Number of chunks: {len(chunks)}",
+                title="Upload Complete"
+            ))
+
+            # Display chunks in a table
+            table = Table(title="PDF Content Chunks")
+            table.add_column("Chunk #", style="cyan")
+            table.add_column("Content Preview", style="green")
+
+            for i, chunk in enumerate(chunks, 1):
+                content = chunk["content"][:100] + "..." if len(chunk["content"]) > 100 else chunk["content"]
+                table.add_row(str(i), content)
+
+            console.print(table)
         except Exception as e:
             console.print(f"[red]Error: {str(e)}[/red]")
             raise typer.Exit(1)
@@ -67,7 +367,8 @@ def upload(
 def extract_text(
     file_path: str = typer.Argument(..., help="Path to the PDF file to extract text from"),
     server_url: str = typer.Option("http://localhost:8000", help="Server URL"),
-    output_file: Optional[str] = typer.Option(None, help="Path to save the extracted text")
+    output_file: Optional[str] = typer.Option(None, help="Path to save the extracted text"),
+    stream: bool = typer.Option(False, help="Stream text page by page")
 ):
     """Extract text from a PDF file."""
     if not os.path.exists(file_path):
@@ -78,6 +379,14 @@ def extract_text(
         console.print("[red]Error: Only PDF files are supported[/red]")
         raise typer.Exit(1)
 
+    if stream:
+        try:
+            stream_extract_text(file_path, server_url, output_file)
+        except Exception as e:
+            console.print(f"[red]Error: {str(e)}[/red]")
+            raise typer.Exit(1)
+        return
+
     with Progress() as progress:
         task = progress.add_task("[cyan]Extracting text...", total=100)
 
@@ -105,5 +414,46 @@ def extract_text(
             console.print(f"[red]Error: {str(e)}[/red]")
             raise typer.Exit(1)
 
+@app.command()
+def search(
+    routes_file: str = typer.Argument(..., help="CSV with origin,destination,departure_date[,adults] columns"),
+    server_url: str = typer.Option("http://localhost:8000", help="Server URL"),
+    output_file: Optional[str] = typer.Option(None, help="Write results here instead of stdout"),
+    output_format: Optional[str] = typer.Option(None, "--format", help="csv or ndjson; defaults to the output file extension, else ndjson"),
+    concurrency: int = typer.Option(4, min=1, help="Searches in flight at once")
+):
+    """Price every route in a CSV file concurrently."""
+    if not os.path.exists(routes_file):
+        console.print(f"[red]Error: File {routes_file} does not exist[/red]")
+        raise typer.Exit(1)
+
+    fmt = (output_format or ("csv" if output_file and output_file.lower().endswith(".csv") else "ndjson")).lower()
+    if fmt not in ("csv", "ndjson"):
+        console.print("[red]Error: Format must be csv or ndjson[/red]")
+        raise typer.Exit(1)
+
+    try:
+        routes = read_routes(routes_file)
+    except (ValueError, KeyError) as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+
+    out = open(output_file, "w", newline="", encoding="utf-8") if output_file else sys.stdout
+    started = time.perf_counter()
+    try:
+        results = asyncio.run(search_routes(routes, server_url, concurrency, ResultWriter(out, fmt)))
+    finally:
+        if output_file:
+            out.close()
+    elapsed = time.perf_counter() - started
+
+    failed = sum(1 for r in results if r.get("error"))
+    # Keep stdout clean for the results themselves
+    print_throughput(
+        "Search Complete", len(results), failed, elapsed,
+        f"\nResults saved to {output_file}" if output_file else "",
+        console if output_file else err_console
+    )
+
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -0,0 +1,217 @@
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional: gzip is always available
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+# Content types worth compressing; images, PDFs and archives are already compressed
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+
+
+def available_encodings() -> List[str]:
+    """Encodings this process can produce, most preferred first"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate(accept_encoding: Optional[str], available: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Pick a content coding from an Accept-Encoding header, or None for identity.
+
+    The highest q-value wins; ties go to the server's preference order.
+    """
+    if not accept_encoding:
+        return None
+    available = available or available_encodings()
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            weights[coding] = q
+
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+class Compressor:
+    """Incremental encoder whose output after every `compress` call is decodable on its own"""
+
+    def __init__(self, encoding: str, level: Optional[int] = None):
+        self.encoding = encoding
+        level = LEVELS[encoding] if level is None else level
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+        elif encoding == "gzip":
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        """Compress data; with flush, also emit everything buffered so far (for streaming)"""
+        if self.encoding == "zstd":
+            out = self._obj.compress(data)
+            return out + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK) if flush else out
+        if self.encoding == "br":
+            out = self._obj.process(data)
+            return out + self._obj.flush() if flush else out
+        out = self._obj.compress(data)
+        return out + self._obj.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def compress_bytes(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    compressor = Compressor(encoding, level)
+    return compressor.compress(data, flush=False) + compressor.finish()
+
+
+def weak_etag(etag: str) -> str:
+    """A compressed representation is not byte-identical to the original, so its ETag becomes weak"""
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses responses with the negotiated coding.
+
+    Bodies smaller than `minimum_size`, non-text content, HEAD requests and
+    responses that already carry a Content-Encoding are passed through.
+    Streaming responses are compressed chunk by chunk with a flush after
+    each, so clients can decode every chunk as soon as it arrives.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, levels: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = levels or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"accept-encoding"), None)
+        encoding = negotiate(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self.minimum_size, self.levels.get(encoding)))
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[str]:
+    return next((v.decode("latin-1") for k, v in headers if k.lower() == name), None)
+
+
+class _CompressingSend:
+    def __init__(self, send, encoding: str, minimum_size: int, level: Optional[int]):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.level = level
+        self.start = None
+        self.compressor: Optional[Compressor] = None
+        self.passthrough = False
+
+    def _should_compress(self, body: bytes, more_body: bool) -> bool:
+        headers = self.start["headers"]
+        if self.start["status"] < 200 or self.start["status"] in (204, 304):
+            return False
+        if _header(headers, b"content-encoding") or not is_compressible(_header(headers, b"content-type")):
+            return False
+        return more_body or len(body) >= self.minimum_size
+
+    def _compressed_headers(self, content_length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+        headers = []
+        vary = None
+        for name, value in self.start["headers"]:
+            lower = name.lower()
+            if lower == b"content-length":
+                continue
+            if lower == b"etag":
+                value = weak_etag(value.decode("latin-1")).encode("latin-1")
+            if lower == b"vary":
+                vary = value
+                continue
+            headers.append((name, value))
+        if vary is None:
+            vary = b"Accept-Encoding"
+        elif b"accept-encoding" not in vary.lower():
+            vary += b", Accept-Encoding"
+        headers.append((b"vary", vary))
+        headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("latin-1")))
+        return headers
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not self._should_compress(body, more_body):
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.compressor = Compressor(self.encoding, self.level)
+            if not more_body:
+                data = self.compressor.compress(body, flush=False) + self.compressor.finish()
+                await self.send({**self.start, "headers": self._compressed_headers(len(data))})
+                await self.send({"type": "http.response.body", "body": data})
+                return
+            await self.send({**self.start, "headers": self._compressed_headers(None)})
+
+        data = self.compressor.compress(body, flush=more_body)
+        if not more_body:
+            data += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
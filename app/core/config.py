@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -13,13 +13,78 @@ class Settings(BaseSettings):
     # Amadeus API Configuration
     AMADEUS_API_KEY: Optional[str] = None
     AMADEUS_API_SECRET: Optional[str] = None
+    AMADEUS_TOKEN_MARGIN: int = 60  # seconds before expiry at which a cached token is refreshed
+    FX_RATES_TTL: int = 3600  # seconds exchange rates are reused
+    FLIGHT_RESULT_TTL: int = 300  # seconds a compare_prices result is reused and may be cached by clients
+    FLIGHT_RESULT_CACHE_SIZE: int = 256
+    FLIGHT_CURRENCIES: List[str] = ["USD", "EUR", "GBP", "CAD", "AUD"]  # currencies compared by compare_prices
+    FLIGHT_SEARCH_MAX_OFFERS: int = 50  # offers requested per currency; Amadeus allows up to 250
+    RANKING_WEIGHTS: Dict[str, float] = {"price": 0.6, "duration": 0.25, "stops": 0.1, "bags": 0.05}  # sort=best
+    RANKING_LIMIT: int = 10  # best_offers returned for sort=best
+    ITINERARY_COMPARE_LIMIT: int = 10  # cheapest distinct itineraries compared across currencies per search
+    OFFER_SNAPSHOT_TTL: int = 900  # seconds a search's full offer set stays available for paging
+    OFFER_SNAPSHOT_CACHE_SIZE: int = 64
+
+    # Adaptive currency selection: query the currencies most likely to be cheapest instead of all of them
+    CURRENCY_SELECTION_ENABLED: bool = True
+    CURRENCY_TOP_N: int = 3  # currencies queried per search once warmed up
+    CURRENCY_EXPLORATION: float = 0.1  # chance of also querying one other currency
+    CURRENCY_WARMUP_SEARCHES: int = 20  # full sweeps before selection starts
+    CURRENCY_MAX_ROUTES: int = 4096  # route and market contexts remembered
+
+    # mode=fast searches: one upstream call in the base currency, projected with FX rates
+    FAST_COMPARE_BASE_CURRENCY: str = "USD"
+    FAST_AUDIT_RATE: float = 0.05  # share of fast searches re-run as a full sweep to measure divergence
+    FAST_AUDIT_MIN_INTERVAL: int = 60  # seconds between audits
+    NEARBY_MAX_RADIUS_KM: float = 300  # largest nearby_km accepted by flight search
+    NEARBY_MAX_AIRPORTS: int = 4  # airports searched per side of an expanded search
+    NEARBY_MAX_PAIRS: int = 9  # origin x destination airport pairs searched per expanded search
+    NEARBY_UPSTREAM_BUDGET: int = 25  # upstream flight-offer requests one expanded search may make
+    NEARBY_CONCURRENCY: int = 4  # airport pairs searched at the same time
+
+    # Popular-route tracking and background cache warming
+    ROUTE_TRACKER_SIZE: int = 256  # routes tracked by the heavy-hitter counter
+    ROUTE_POPULARITY_HALF_LIFE: int = 3600  # seconds after which route counts are halved
+    CACHE_WARM_ENABLED: bool = True
+    CACHE_WARM_TOP_N: int = 20  # most popular routes kept warm
+    CACHE_WARM_LEAD_TIME: int = 30  # seconds before expiry at which a result is refreshed
+    CACHE_WARM_INTERVAL: int = 10  # seconds between warming passes
+    CACHE_WARM_BUDGET: int = 300  # upstream flight-offer requests the warmer may make per hour
+    CACHE_WARM_MIN_COUNT: float = 2  # searches (after decay) before a route is worth keeping warm
+    CACHE_WARM_FAILURE_BACKOFF: int = 900  # seconds a route is left alone after a failed refresh
+    ADMIN_TOKEN: Optional[str] = None  # when set, admin endpoints require a matching X-Admin-Token header
 
     # AI API Configuration
     GROQ_API_KEY: Optional[str] = None
+    AI_CACHE_TTL: int = 3600  # seconds
+    AI_CACHE_SIZE: int = 512
+    AI_PRICE_BUCKET: int = 50  # price bucket width used for cache keys
+    GROQ_MAX_CONCURRENCY: int = 4
+    GROQ_MAX_QUEUE: int = 16
+    GROQ_TIMEOUT: float = 15.0  # seconds per call, including queueing and retries
+    GROQ_MAX_RETRIES: int = 2
+
+    # Local price analysis
+    PRICE_HISTORY_SIZE: int = 200  # lowest-price samples kept per route
+    PRICE_HISTORY_MIN_SAMPLES: int = 5  # samples needed before comparing with history
+
+    # Combined search-plus-insights deadline
+    SEARCH_DEADLINE: float = 20.0  # seconds
 
     # PDF Processing Configuration (keeping for now, will remove later)
     UPLOAD_DIR: str = os.path.join("app", "uploads")
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB in bytes
+    PDF_WORKERS: int = 0  # PDF parsing processes; 0 uses one per CPU core
+    PDF_STREAM_BATCH_PAGES: int = 8  # pages parsed per step when streaming
+    PDF_PARALLEL_MIN_BYTES: int = 1048576  # files from 1MB are split into page ranges across the pool
+    PDF_CACHE_DIR: str = os.path.join("app", "pdf_cache")
+    PDF_CACHE_MAX_BYTES: int = 268435456  # 256MB of cached chunks
+    PDF_INDEX_DIR: str = os.path.join("app", "pdf_index")
+    PDF_INDEX_MAX_DOCUMENTS: int = 64  # documents whose search index stays in memory
+    PDF_INDEX_MAX_BYTES: int = 268435456  # 256MB of persisted indexes
+
+    # Response compression (zstd, br or gzip, negotiated per request)
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes; smaller bodies are sent as-is
 
     # Frontend API Configuration
     API_BASE_URL: str = ""
@@ -0,0 +1,50 @@
+from typing import Dict, Hashable, List, Tuple
+
+
+class SpaceSaving:
+    """
+    Bounded-memory heavy-hitter counter (Metwally et al. "space-saving").
+
+    At most `capacity` keys are tracked. A new key arriving when the table is
+    full replaces the key with the smallest count and inherits that count as
+    its overestimation error, so any key seen more than N / capacity times
+    out of N is guaranteed to be tracked. Counts are upper bounds; count
+    minus error is a lower bound.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._counts: Dict[Hashable, List[float]] = {}  # key -> [count, error]
+        self.total = 0.0
+
+    def add(self, key: Hashable, weight: float = 1.0) -> None:
+        self.total += weight
+        entry = self._counts.get(key)
+        if entry is not None:
+            entry[0] += weight
+            return
+        if len(self._counts) < self.capacity:
+            self._counts[key] = [weight, 0.0]
+            return
+        # Linear scan for the minimum: only paid when an untracked key arrives at capacity
+        victim = min(self._counts, key=lambda k: self._counts[k][0])
+        floor = self._counts.pop(victim)[0]
+        self._counts[key] = [floor + weight, floor]
+
+    def top(self, k: int) -> List[Tuple[Hashable, float, float]]:
+        """The k most frequent keys as (key, count, error), highest count first"""
+        ranked = sorted(self._counts.items(), key=lambda item: item[1][0], reverse=True)[:k]
+        return [(key, count, error) for key, (count, error) in ranked]
+
+    def decay(self, factor: float = 0.5) -> None:
+        """Scale all counts down so routes that stop being requested fade out of the top"""
+        for entry in self._counts.values():
+            entry[0] *= factor
+            entry[1] *= factor
+        self.total *= factor
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._counts
+
+    def __len__(self) -> int:
+        return len(self._counts)
@@ -0,0 +1,38 @@
+import hashlib
+import json
+from typing import Any, Optional
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+
+def strong_etag(body: bytes) -> str:
+    """Strong validator derived from the exact representation bytes"""
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored, as If-None-Match requires"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in if_none_match.split(","))
+
+
+def cache_control(max_age: float) -> str:
+    """Let clients reuse a response for as long as the server-side cache would, then revalidate"""
+    seconds = int(max_age)
+    return f"public, max-age={seconds}" if seconds > 0 else "no-cache"
+
+
+def conditional_json(request: Request, content: Any, max_age: float = 0) -> Response:
+    """
+    Render content as JSON with a strong ETag and Cache-Control, answering
+    304 Not Modified when the client's If-None-Match already matches.
+    """
+    body = json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    headers = {"ETag": strong_etag(body), "Cache-Control": cache_control(max_age)}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
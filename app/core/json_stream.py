@@ -0,0 +1,209 @@
+import codecs
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_NON_WHITESPACE = re.compile(r"[^ \t\r\n]")
+
+
+class JSONFieldParser:
+    """
+    Incrementally parse the top-level fields of a JSON object as text arrives.
+
+    feed() returns the (key, value) pairs completed by the new text, so
+    callers can forward each field of a streamed LLM answer as soon as
+    it is whole instead of waiting for the closing brace.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields: Dict[str, Any] = {}
+        self._pos: Optional[int] = None  # index just past "{" or the last parsed field
+        self.closed = False
+
+    def _skip(self, chars: str) -> int:
+        pos = self._pos
+        while pos < len(self.buffer) and self.buffer[pos] in chars:
+            pos += 1
+        return pos
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        self.buffer += text
+        completed = []
+
+        if self._pos is None:
+            start = self.buffer.find("{")
+            if start == -1:
+                return completed
+            self._pos = start + 1
+
+        while not self.closed:
+            pos = self._skip(_WHITESPACE + ",")
+            if pos >= len(self.buffer):
+                break
+            if self.buffer[pos] == "}":
+                self.closed = True
+                self._pos = pos + 1
+                break
+
+            try:
+                key, pos = _decoder.raw_decode(self.buffer, pos)
+                while pos < len(self.buffer) and self.buffer[pos] in _WHITESPACE:
+                    pos += 1
+                if pos >= len(self.buffer) or self.buffer[pos] != ":":
+                    break
+                pos += 1
+                while pos < len(self.buffer) and self.buffer[pos] in _WHITESPACE:
+                    pos += 1
+                value, end = _decoder.raw_decode(self.buffer, pos)
+            except json.JSONDecodeError:
+                break
+
+            # A bare number or literal at the end of the buffer may still grow
+            if end == len(self.buffer) and not isinstance(value, (str, list, dict)):
+                break
+
+            self.fields[key] = value
+            completed.append((key, value))
+            self._pos = end
+
+        return completed
+
+    def result(self) -> Dict:
+        """Parse the whole buffered object, raising ValueError if it is incomplete"""
+        start = self.buffer.find("{")
+        if start == -1:
+            raise ValueError("No JSON object in response")
+        value, _ = _decoder.raw_decode(self.buffer, start)
+        return value
+
+
+class JSONArrayStream:
+    """
+    Incrementally pull the elements of one top-level array field out of a
+    JSON object as bytes arrive, e.g. the "data" offers of a search response.
+
+    feed() returns the elements completed by the new bytes. Each element is
+    decoded once it is whole and consumed text is dropped from the buffer,
+    so only the elements the caller keeps stay in memory. Other top-level
+    fields are skipped. `done` turns true once the array has closed; the
+    rest of the body need not be read.
+
+    A value split across chunks is not re-decoded on every chunk: it is
+    retried only once the new text holds at least as many closing brackets
+    as the value has open ones, counted with str.count over the new text
+    alone. Brackets inside strings can throw that count off, so a pending
+    value is also retried whenever the buffer has doubled past its start,
+    and close() decodes whatever is left.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.done = False
+        self.buffer = ""
+        self._decode = codecs.getincrementaldecoder("utf-8")().decode
+        self._pos = 0
+        self._state = "start"  # start -> key -> value -> key ... or value -> array -> done
+        self._key: Optional[str] = None
+        self._open: Optional[int] = None  # open brackets of a value waiting for more text
+        self._retry_at = 0  # buffer length at which a waiting value is decoded regardless
+
+    def _skip(self, pos: int) -> int:
+        match = _NON_WHITESPACE.search(self.buffer, pos)
+        return match.start() if match else len(self.buffer)
+
+    def _value(self, pos: int) -> Tuple[Any, Optional[int]]:
+        if self._open is not None and len(self.buffer) < self._retry_at:
+            return None, None
+        try:
+            value, end = _decoder.raw_decode(self.buffer, pos)
+        except json.JSONDecodeError:
+            value, end = None, None
+        # A bare number or literal at the end of the buffer may still grow
+        if end == len(self.buffer) and not isinstance(value, (str, list, dict)):
+            end = None
+        if end is None:
+            partial = self.buffer[pos:]
+            self._open = partial.count("{") + partial.count("[") - partial.count("}") - partial.count("]")
+            self._retry_at = pos + 2 * (len(self.buffer) - pos)
+        else:
+            self._open = None
+        return value, end
+
+    def feed(self, chunk: Union[bytes, str]) -> List[Any]:
+        text = self._decode(chunk) if isinstance(chunk, bytes) else chunk
+        # Drop what earlier calls consumed; what remains is at most one partial value
+        self.buffer = self.buffer[self._pos:] + text
+        self._retry_at -= self._pos
+        self._pos = 0
+        if self._open is not None:
+            # Until the new text has that many closers the pending value cannot have ended
+            closed = text.count("}") + text.count("]")
+            self._open = None if closed >= self._open else self._open + text.count("{") + text.count("[") - closed
+        elements = []
+
+        while not self.done:
+            pos = self._skip(self._pos)
+            if pos >= len(self.buffer):
+                break
+            char = self.buffer[pos]
+
+            if self._state == "start":
+                if char != "{":
+                    raise ValueError("Expected a JSON object")
+                self._pos, self._state = pos + 1, "key"
+            elif self._state == "key":
+                if char == ",":
+                    self._pos = pos + 1
+                    continue
+                if char == "}":
+                    self.done = True  # the array field never appeared
+                    break
+                key, end = self._value(pos)
+                if end is None:
+                    break
+                end = self._skip(end)
+                if end >= len(self.buffer):
+                    break
+                if not isinstance(key, str) or self.buffer[end] != ":":
+                    raise ValueError("Malformed JSON object")
+                self._key, self._pos, self._state = key, end + 1, "value"
+            elif self._state == "value":
+                if self._key == self.field:
+                    if char != "[":
+                        raise ValueError(f"{self.field} is not an array")
+                    self._pos, self._state = pos + 1, "array"
+                    continue
+                _, end = self._value(pos)
+                if end is None:
+                    break
+                self._pos, self._state = end, "key"
+            else:
+                if char == ",":
+                    self._pos = pos + 1
+                    continue
+                if char == "]":
+                    self.done = True
+                    self._pos = pos + 1
+                    break
+                value, end = self._value(pos)
+                if end is None:
+                    break
+                elements.append(value)
+                self._pos = end
+
+        return elements
+
+    def close(self) -> List[Any]:
+        """
+        Decode whatever is still buffered at the end of the body and return
+        its elements. Raises ValueError if the array (or the object, when it
+        has no such field) is incomplete.
+        """
+        self._open = None
+        elements = self.feed("")
+        if not self.done:
+            raise ValueError("Truncated JSON response")
+        return elements
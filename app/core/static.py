@@ -0,0 +1,83 @@
+import mimetypes
+import os
+import sys
+from typing import Dict, Optional, Tuple
+from fastapi import Request, Response
+from app.core.compression import available_encodings, compress_bytes, negotiate
+from app.core.http_cache import etag_matches, strong_etag
+
+# Precompressed siblings, looked up next to the original file, most preferred first
+VARIANT_SUFFIXES = {"zstd": ".zst", "br": ".br", "gzip": ".gz"}
+PRECOMPRESS_LEVELS = {"zstd": 19, "br": 11, "gzip": 9}
+
+
+class StaticFile:
+    """
+    A static file served from memory with strong ETags and 304 responses.
+
+    Precompressed variants (`index.html.zst`, `.br`, `.gz`) are served when
+    the client accepts them and they are at least as new as the original.
+    Content is re-read whenever the file's mtime or size changes.
+    """
+
+    def __init__(self, path: str, cache_control: str = "no-cache", media_type: Optional[str] = None):
+        self.path = path
+        self.cache_control = cache_control
+        self.media_type = media_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self._signature: Optional[Tuple[float, int]] = None
+        self._representations: Dict[Optional[str], Tuple[bytes, str]] = {}
+
+    def _load(self) -> None:
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime, stat.st_size)
+        if signature == self._signature:
+            return
+        representations = {}
+        with open(self.path, "rb") as f:
+            body = f.read()
+        representations[None] = (body, strong_etag(body))
+        for encoding, suffix in VARIANT_SUFFIXES.items():
+            variant = self.path + suffix
+            if os.path.exists(variant) and os.stat(variant).st_mtime >= stat.st_mtime:
+                with open(variant, "rb") as f:
+                    data = f.read()
+                representations[encoding] = (data, strong_etag(data))
+        self._representations = representations
+        self._signature = signature
+
+    def response(self, request: Request) -> Response:
+        self._load()
+        variants = [encoding for encoding in VARIANT_SUFFIXES if encoding in self._representations]
+        encoding = negotiate(request.headers.get("accept-encoding"), variants) if variants else None
+        body, etag = self._representations[encoding]
+
+        headers = {"ETag": etag, "Cache-Control": self.cache_control}
+        if variants:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type=self.media_type, headers=headers)
+
+
+def precompress(path: str) -> Dict[str, int]:
+    """Write compressed siblings of a static file for every available encoding; returns their sizes"""
+    with open(path, "rb") as f:
+        body = f.read()
+    sizes = {}
+    for encoding in available_encodings():
+        data = compress_bytes(body, encoding, PRECOMPRESS_LEVELS[encoding])
+        with open(path + VARIANT_SUFFIXES[encoding], "wb") as f:
+            f.write(data)
+        sizes[encoding] = len(data)
+    return sizes
+
+
+if __name__ == "__main__":
+    # python -m app.core.static index.html
+    for target in sys.argv[1:] or ["index.html"]:
+        with open(target, "rb") as f:
+            original = len(f.read())
+        sizes = precompress(target)
+        print(f"{target}: {original} bytes -> " + ", ".join(f"{enc} {size}" for enc, size in sizes.items()))
@@ -1,15 +1,33 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from app.api.flight_routes import router as flight_router
-from app.api.ai_routes import router as ai_router
+from app.api.flight_routes import router as flight_router, get_flight_service
+from app.api.ai_routes import router as ai_router, get_ai_service
+from app.api.search_routes import router as search_router
+from app.api.pdf_routes import router as pdf_router
+from app.api.admin_routes import router as admin_router, get_cache_warmer
+from app.services.pdf_service import shutdown_process_pool
+from app.core.compression import CompressionMiddleware
+from app.core.static import StaticFile
 from app.core.config import settings
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Services are built here rather than at import; heavy SDKs still load on first use
+    get_flight_service()
+    get_ai_service()
+    warmer = get_cache_warmer()
+    if settings.CACHE_WARM_ENABLED:
+        warmer.start()
+    yield
+    await warmer.stop()
+    shutdown_process_pool()
+
 app = FastAPI(
     title="Air Travel Tickets Price Comparison API",
     description="API for comparing air travel ticket prices across currencies",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -20,15 +38,22 @@ app.add_middleware(
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
 
 
 # Include routers
 app.include_router(flight_router, prefix="/api/flights", tags=["flights"])
 app.include_router(ai_router, prefix="/api/ai", tags=["ai"])
+app.include_router(search_router, prefix="/api/search", tags=["search"])
+app.include_router(pdf_router, prefix="/api/pdf", tags=["pdf"])
+app.include_router(admin_router, prefix="/api/admin", tags=["admin"])
+
+# Revalidated on every load (cheap 304s); served from a precompressed variant when one exists
+index_page = StaticFile("index.html", cache_control="no-cache")
 
 @app.get("/")
-async def root():
-    return FileResponse("index.html")
+async def root(request: Request):
+    return index_page.response(request)
 
 @app.get("/api/config")
 async def get_config():
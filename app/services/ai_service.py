@@ -1,13 +1,83 @@
-from groq import AsyncGroq
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from contextlib import aclosing
 from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.json_stream import JSONFieldParser
+from app.services.groq_client import get_groq_client
+from app.services.price_analytics import PriceAnalyzer, price_history, route_key
 import json
 from datetime import datetime, timedelta
 
 class AIService:
     def __init__(self):
         self.api_key = settings.GROQ_API_KEY
-        self.client = AsyncGroq(api_key=self.api_key) if self.api_key else None
+        self.client = get_groq_client(self.api_key) if self.api_key else None
+        self.recommendation_cache = TTLCache(maxsize=settings.AI_CACHE_SIZE, ttl=settings.AI_CACHE_TTL)
+        self.price_analysis_cache = TTLCache(maxsize=settings.AI_CACHE_SIZE, ttl=settings.AI_CACHE_TTL)
+        self.insights_cache = TTLCache(maxsize=settings.AI_CACHE_SIZE, ttl=settings.AI_CACHE_TTL)
+        self.price_analyzer = PriceAnalyzer()
+
+    def _price_bucket(self, price) -> Optional[int]:
+        """Round a price down to the configured bucket width"""
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return None
+        bucket = settings.AI_PRICE_BUCKET
+        return int(price // bucket) * bucket
+
+    def _canonicalize_search(self, search_data: Dict) -> Dict:
+        """Reduce a client search payload to route, month and price bucket"""
+        departure_date = search_data.get("departure_date") or search_data.get("departureDate") or ""
+        price = next(
+            (search_data[key] for key in ("lowest_price_usd", "price_usd", "lowest_price", "price")
+             if search_data.get(key) is not None),
+            None
+        )
+        return {
+            "origin": str(search_data.get("origin") or "").strip().upper(),
+            "destination": str(search_data.get("destination") or "").strip().upper(),
+            "month": str(departure_date)[:7] or None,
+            "price_bucket": self._price_bucket(price)
+        }
+
+    def _canonicalize_prices(self, prices: List[Dict]) -> List[Dict]:
+        """Reduce price rows to currency plus bucketed local and USD prices"""
+        rows = []
+        for p in prices:
+            currency = str(p.get("currency") or "").strip().upper()
+            if not currency:
+                continue
+            rows.append({
+                "currency": currency,
+                "price": self._price_bucket(p.get("price")),
+                "price_usd": self._price_bucket(p.get("price_usd"))
+            })
+        return sorted(rows, key=lambda row: row["currency"])
+
+    def _cache_key(self, canonical) -> str:
+        return json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+
+    def cache_stats(self) -> Dict:
+        """Hit-rate metrics for the AI response caches"""
+        return {
+            "recommendations": self.recommendation_cache.stats(),
+            "price_analysis": self.price_analysis_cache.stats(),
+            "destination_insights": self.insights_cache.stats()
+        }
+
+    def _destination_key(self, destination: str) -> str:
+        return destination.strip().upper()
+
+    def insights_ttl(self, destination: str) -> float:
+        """Seconds the cached insights for a destination stay fresh"""
+        return self.insights_cache.remaining_ttl(self._destination_key(destination))
+
+    def client_stats(self) -> Dict:
+        """Concurrency and backpressure counters for the shared Groq client"""
+        if not self.client:
+            return {}
+        return self.client.stats()
 
     def _validate_json_response(self, content: str) -> bool:
         """Validate if the response content is valid JSON format"""
@@ -16,23 +86,44 @@ class AIService:
         content = content.strip()
         return content.startswith(('{', '['))
 
+    def _recommendations_prompt(self, cache_key: str) -> str:
+        return f"""
+        Based on this flight search (price bucket in USD, rounded down to {settings.AI_PRICE_BUCKET}): {cache_key}
+
+        Provide 3 personalized travel recommendations and insights:
+        1. Best time to travel to destination
+        2. Alternative destinations similar to the searched one
+        3. Travel tips and cost-saving advice
+
+        Respond ONLY with valid JSON. Do not include any explanatory text, conversational responses, or markdown formatting. Start your response with {{ and end with }}.
+        Format as JSON with keys: recommendations (array of objects with 'type' and 'value' keys), insights (string)
+        """
+
+    def _destination_prompt(self, destination: str) -> str:
+        return f"""
+        Provide travel insights for {destination} airport/destination:
+        1. Best time to visit
+        2. Popular attractions nearby
+        3. Travel tips
+        4. Local transportation options
+
+        Respond ONLY with valid JSON. Do not include any explanatory text, conversational responses, or markdown formatting. Start your response with {{ and end with }}.
+        Format as JSON with keys: best_time_to_visit, attractions, travel_tips, transportation
+        """
+
     async def get_travel_recommendations(self, search_data: Dict) -> Dict:
         """Get AI-powered travel recommendations based on search"""
         if not self.api_key:
             return {"recommendations": [], "insights": "AI features require Groq API key"}
 
-        try:
-            prompt = f"""
-            Based on this flight search: {json.dumps(search_data, indent=2)}
-
-            Provide 3 personalized travel recommendations and insights:
-            1. Best time to travel to destination
-            2. Alternative destinations similar to the searched one
-            3. Travel tips and cost-saving advice
+        canonical = self._canonicalize_search(search_data)
+        cache_key = self._cache_key(canonical)
+        cached = self.recommendation_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
 
-            Respond ONLY with valid JSON. Do not include any explanatory text, conversational responses, or markdown formatting. Start your response with {{ and end with }}.
-            Format as JSON with keys: recommendations (array of objects with 'type' and 'value' keys), insights (string)
-            """
+        try:
+            prompt = self._recommendations_prompt(cache_key)
 
             completion = await self.client.chat.completions.create(
                 model="gemma2-9b-it",
@@ -47,7 +138,9 @@ class AIService:
                     "recommendations": ["Check local events and festivals", "Consider nearby destinations", "Look for flexible booking options"],
                     "insights": "AI recommendations unavailable: Invalid response format"
                 }
-            return json.loads(content)
+            result = json.loads(content)
+            self.recommendation_cache.set(cache_key, result)
+            return dict(result)
 
         except Exception as e:
             return {
@@ -55,66 +148,94 @@ class AIService:
                 "insights": f"AI recommendations unavailable: {str(e)}"
             }
 
-    async def analyze_price_trends(self, prices: List[Dict]) -> Dict:
-        """Analyze price trends and provide insights"""
+    def _route_from_prices(self, prices: List[Dict]) -> Optional[str]:
+        """Derive the searched route from parsed offers when the caller did not pass one"""
+        for p in prices:
+            offer = p.get("parsed_offer") or {}
+            origin = (offer.get("departure") or {}).get("airport")
+            destination = (offer.get("arrival") or {}).get("airport")
+            if origin and destination:
+                return route_key(origin, destination)
+        return None
+
+    async def analyze_search(self, flights: Dict) -> Dict:
+        """
+        Analyze a compare_prices result locally, judging its fare by the
+        history comparison the search made before recording that fare
+        """
+        return self.price_analyzer.analyze(flights.get("all_results", []), history_stats=flights.get("price_history"))
+
+    async def analyze_price_trends(self, prices: List[Dict], narrative: bool = False, route: Optional[str] = None) -> Dict:
+        """Analyze prices locally and optionally add an AI-written narrative"""
+        route = route or self._route_from_prices(prices)
+        analysis = self.price_analyzer.analyze(prices, price_history.get(route) if route else None)
+        if not narrative or analysis["stats"] is None:
+            return analysis
+
         if not self.api_key:
-            return {"trend": "neutral", "analysis": "Price trend analysis requires Groq API key"}
+            return {**analysis, "trend": "neutral", "analysis": "Price trend analysis requires Groq API key"}
+
+        stats = analysis["stats"]
+        compact = {
+            key: stats[key]
+            for key in ("best_value_currency", "best_price_usd", "spread_usd", "spread_pct",
+                        "percentiles_usd", "savings_vs_usd", "history")
+        }
+        history = stats["history"]
+        canonical = {
+            "prices": self._canonicalize_prices(prices),
+            "history_rank": None if history is None else int(history["percentile_rank"] // 10) * 10
+        }
+        cache_key = self._cache_key(canonical)
+        cached = self.price_analysis_cache.get(cache_key)
+        if cached is not None:
+            return {**analysis, **cached}
 
         try:
-            prices_text = "\n".join([f"{p['currency']}: {p['price']}" for p in prices])
-
             prompt = f"""
-            Analyze these flight prices across currencies:
-            {prices_text}
+            These statistics were computed from a flight search across currencies (prices in USD):
+            {json.dumps(compact, separators=(",", ":"))}
 
-            Provide analysis on:
-            1. Which currency offers the best value
-            2. Price trend insights
-            3. Recommendations for booking
+            Write a short narrative for a traveller:
+            1. Price trend insights, including how this fare compares with recent searches if history is present
+            2. A booking recommendation
 
             Respond ONLY with valid JSON. Do not include any explanatory text, conversational responses, or markdown formatting. Start your response with {{ and end with }}.
-            Format as JSON with keys: best_value_currency, trend_analysis, booking_recommendation
+            Format as JSON with keys: trend_analysis, booking_recommendation
             """
 
             completion = await self.client.chat.completions.create(
                 model="gemma2-9b-it",
                 messages=[{"role": "user", "content": prompt}],
-                max_completion_tokens=300,
+                max_completion_tokens=200,
                 temperature=0.6
             )
 
             content = completion.choices[0].message.content
             if not self._validate_json_response(content):
-                return {
-                    "best_value_currency": prices[0]['currency'] if prices else "Unknown",
-                    "trend_analysis": "Price analysis temporarily unavailable: Invalid response format",
-                    "booking_recommendation": "Consider booking soon if prices are favorable"
-                }
-            return json.loads(content)
+                return analysis
+            result = json.loads(content)
+            narrative_fields = {
+                key: result[key] for key in ("trend_analysis", "booking_recommendation") if result.get(key)
+            }
+            self.price_analysis_cache.set(cache_key, narrative_fields)
+            return {**analysis, **narrative_fields}
 
         except Exception as e:
-            return {
-                "best_value_currency": prices[0]['currency'] if prices else "Unknown",
-                "trend_analysis": "Price analysis temporarily unavailable",
-                "booking_recommendation": "Consider booking soon if prices are favorable"
-            }
+            return analysis
 
     async def get_destination_insights(self, destination: str) -> Dict:
         """Get AI insights about a destination"""
         if not self.api_key:
             return {"insights": "Destination insights require Groq API key"}
 
-        try:
-            prompt = f"""
-            Provide travel insights for {destination} airport/destination:
-            1. Best time to visit
-            2. Popular attractions nearby
-            3. Travel tips
-            4. Local transportation options
+        cache_key = self._destination_key(destination)
+        cached = self.insights_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
 
-            Respond ONLY with valid JSON. Do not include any explanatory text, conversational responses, or markdown formatting. Start your response with {{ and end with }}.
-            Format as JSON with keys: best_time_to_visit, attractions, travel_tips, transportation
-            """
+        try:
+            prompt = self._destination_prompt(destination)
 
             completion = await self.client.chat.completions.create(
                 model="gemma2-9b-it",
@@ -131,7 +252,9 @@ class AIService:
                     "travel_tips": ["Research visa requirements", "Check local customs"],
                     "transportation": ["Airport taxis", "Public transport", "Ride-sharing services"]
                 }
-            return json.loads(content)
+            result = json.loads(content)
+            self.insights_cache.set(cache_key, result)
+            return dict(result)
 
         except Exception as e:
             return {
@@ -141,6 +264,81 @@ class AIService:
                 "transportation": ["Airport taxis", "Public transport", "Ride-sharing services"]
             }
 
+    async def _stream_fields(self, prompt: str, max_tokens: int, temperature: float) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream a completion, yielding tokens and each top-level JSON field once it is complete"""
+        parser = JSONFieldParser()
+        async with aclosing(self.client.stream(
+            model="gemma2-9b-it",
+            messages=[{"role": "user", "content": prompt}],
+            max_completion_tokens=max_tokens,
+            temperature=temperature
+        )) as chunks:
+            async for chunk in chunks:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                yield "token", delta
+                for key, value in parser.feed(delta):
+                    yield "field", {"key": key, "value": value}
+        yield "done", parser.result()
+
+    async def stream_travel_recommendations(self, search_data: Dict) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming variant of get_travel_recommendations yielding (event, data) pairs"""
+        if not self.api_key:
+            yield "done", {"recommendations": [], "insights": "AI features require Groq API key"}
+            return
+
+        canonical = self._canonicalize_search(search_data)
+        cache_key = self._cache_key(canonical)
+        cached = self.recommendation_cache.get(cache_key)
+        if cached is not None:
+            for key, value in cached.items():
+                yield "field", {"key": key, "value": value}
+            yield "done", dict(cached)
+            return
+
+        try:
+            async with aclosing(self._stream_fields(self._recommendations_prompt(cache_key), 500, 0.7)) as events:
+                async for event, data in events:
+                    if event == "done":
+                        self.recommendation_cache.set(cache_key, data)
+                        data = dict(data)
+                    yield event, data
+        except Exception as e:
+            yield "done", {
+                "recommendations": ["Check local events and festivals", "Consider nearby destinations", "Look for flexible booking options"],
+                "insights": f"AI recommendations unavailable: {str(e)}"
+            }
+
+    async def stream_destination_insights(self, destination: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming variant of get_destination_insights yielding (event, data) pairs"""
+        if not self.api_key:
+            yield "done", {"insights": "Destination insights require Groq API key"}
+            return
+
+        cache_key = self._destination_key(destination)
+        cached = self.insights_cache.get(cache_key)
+        if cached is not None:
+            for key, value in cached.items():
+                yield "field", {"key": key, "value": value}
+            yield "done", dict(cached)
+            return
+
+        try:
+            async with aclosing(self._stream_fields(self._destination_prompt(destination), 400, 0.7)) as events:
+                async for event, data in events:
+                    if event == "done":
+                        self.insights_cache.set(cache_key, data)
+                        data = dict(data)
+                    yield event, data
+        except Exception as e:
+            yield "done", {
+                "best_time_to_visit": "Check local weather and events",
+                "attractions": ["Local sightseeing", "Cultural experiences"],
+                "travel_tips": ["Research visa requirements", "Check local customs"],
+                "transportation": ["Airport taxis", "Public transport", "Ride-sharing services"]
+            }
+
     async def process_natural_language_query(self, query: str) -> Dict:
         """Process natural language flight search queries"""
         if not self.api_key:
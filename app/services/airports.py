@@ -0,0 +1,115 @@
+import csv
+import os
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+from app.core.lazy import LazyModule
+
+np = LazyModule("numpy")
+
+AIRPORTS_CSV = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "airports.csv")
+EARTH_RADIUS_KM = 6371.0088
+
+
+class AirportIndex:
+    """
+    Airport coordinates and metro areas from the bundled airports.csv.
+
+    Metro codes such as NYC or LON resolve to their member airports. Radius
+    queries compute the haversine distance to every airport at once over
+    numpy coordinate columns; a few hundred rows need no spatial tree.
+    """
+
+    def __init__(self, path: str = AIRPORTS_CSV):
+        self.path = path
+
+    @cached_property
+    def airports(self) -> Dict[str, Dict]:
+        with open(self.path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        return {
+            row["iata"]: {
+                "iata": row["iata"],
+                "name": row["name"],
+                "city": row["city"],
+                "country": row["country"],
+                "latitude": float(row["latitude"]),
+                "longitude": float(row["longitude"]),
+                "metro": row["metro"] or None
+            }
+            for row in rows
+        }
+
+    @cached_property
+    def metros(self) -> Dict[str, List[str]]:
+        metros: Dict[str, List[str]] = {}
+        for code, airport in self.airports.items():
+            if airport["metro"]:
+                metros.setdefault(airport["metro"], []).append(code)
+        return metros
+
+    @cached_property
+    def _columns(self) -> Tuple[List[str], "np.ndarray", "np.ndarray"]:
+        codes = list(self.airports)
+        latitude = np.radians([self.airports[code]["latitude"] for code in codes])
+        longitude = np.radians([self.airports[code]["longitude"] for code in codes])
+        return codes, latitude, longitude
+
+    def get(self, code: str) -> Optional[Dict]:
+        return self.airports.get(code.strip().upper())
+
+    def is_metro(self, code: str) -> bool:
+        return code.strip().upper() in self.metros
+
+    def same_area(self, first: str, second: str, radius_km: float = 100) -> bool:
+        """Whether two airports are the same, share a metro code or lie within radius_km of each other"""
+        a, b = self.get(first), self.get(second)
+        if first.strip().upper() == second.strip().upper():
+            return True
+        if a is None or b is None:
+            return False
+        if a["metro"] and a["metro"] == b["metro"]:
+            return True
+        codes, _, _ = self._columns
+        return float(self.distances_km(a["latitude"], a["longitude"])[codes.index(b["iata"])]) <= radius_km
+
+    def resolve(self, code: str) -> List[str]:
+        """Airports behind a metro code, or the code itself for an airport or an unknown code"""
+        code = code.strip().upper()
+        return list(self.metros.get(code, [code]))
+
+    def distances_km(self, latitude: float, longitude: float) -> "np.ndarray":
+        """Great-circle distance from a point to every airport, in the order of the airports table"""
+        _, lat, lon = self._columns
+        lat0, lon0 = np.radians(latitude), np.radians(longitude)
+        a = np.sin((lat - lat0) / 2) ** 2 + np.cos(lat0) * np.cos(lat) * np.sin((lon - lon0) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    def nearby(self, code: str, radius_km: float) -> List[Tuple[str, float]]:
+        """Airports within radius_km of an airport, nearest first and including itself; [] for unknown codes"""
+        airport = self.get(code)
+        if airport is None:
+            return []
+        codes, _, _ = self._columns
+        distances = self.distances_km(airport["latitude"], airport["longitude"])
+        within = np.flatnonzero(distances <= radius_km)
+        within = within[np.argsort(distances[within], kind="stable")]
+        return [(codes[i], round(float(distances[i]), 1)) for i in within]
+
+    def expand(self, code: str, radius_km: float = 0, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Airports to search for a requested origin or destination, with each
+        one's distance in km from the nearest requested airport. A metro code
+        expands to its members (distance 0); radius_km adds airports around
+        each of them. The requested airports come first, then nearest first.
+        """
+        requested = self.resolve(code)
+        found = {airport: 0.0 for airport in requested}
+        if radius_km > 0:
+            for airport in requested:
+                for other, distance in self.nearby(airport, radius_km):
+                    found[other] = min(found.get(other, distance), distance)
+        ranked = sorted(found.items(), key=lambda item: (item[0] not in requested, item[1]))
+        return ranked[:limit] if limit else ranked
+
+
+airport_index = AirportIndex()
@@ -0,0 +1,146 @@
+import asyncio
+import contextlib
+import datetime
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.flight_service import FlightService
+
+logger = logging.getLogger(__name__)
+
+BUDGET_WINDOW = 3600.0  # seconds over which CACHE_WARM_BUDGET applies
+
+
+class CacheWarmer:
+    """
+    Keeps compare_prices results for the most popular routes fresh.
+
+    Every `interval` seconds the top `top_n` routes from the service's
+    heavy-hitter counter are checked. Routes searched at least `min_count`
+    times whose cached result is still live but expires within `lead_time`
+    seconds are refetched, the same way they were fetched: a route only
+    searched with mode=fast is refreshed with one fast call, not a full
+    sweep. Missing or expired results are left to the next real search.
+    Refreshes count neither as demand nor towards the route's price
+    history. Each refresh is charged its upstream request count against a
+    sliding hourly `budget`; when the budget runs out, warming pauses until
+    it recovers. A route whose refresh fails is skipped for `backoff`
+    seconds. Popularity counts are halved every `half_life` seconds so
+    routes that stop being searched drop out of the top.
+    """
+
+    def __init__(
+        self,
+        service: FlightService,
+        top_n: int = settings.CACHE_WARM_TOP_N,
+        lead_time: float = settings.CACHE_WARM_LEAD_TIME,
+        interval: float = settings.CACHE_WARM_INTERVAL,
+        budget: int = settings.CACHE_WARM_BUDGET,
+        half_life: float = settings.ROUTE_POPULARITY_HALF_LIFE,
+        min_count: float = settings.CACHE_WARM_MIN_COUNT,
+        backoff: float = settings.CACHE_WARM_FAILURE_BACKOFF
+    ):
+        self.service = service
+        self.top_n = top_n
+        self.lead_time = lead_time
+        self.interval = interval
+        self.budget = budget
+        self.half_life = half_life
+        self.min_count = min_count
+        self.backoff = backoff
+        self._failed_until: Dict[tuple, float] = {}  # route key -> monotonic time it may be retried
+        self._spent: Deque[Tuple[float, int]] = deque()  # (monotonic time, upstream requests)
+        self._last_decay = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self.cycles = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.deferred = 0
+
+    def budget_remaining(self) -> int:
+        cutoff = time.monotonic() - BUDGET_WINDOW
+        while self._spent and self._spent[0][0] <= cutoff:
+            self._spent.popleft()
+        return self.budget - sum(cost for _, cost in self._spent)
+
+    def due(self) -> List[Tuple[tuple, str]]:
+        """
+        (route key, mode) of popular routes, most popular first, whose cached
+        result is still live but about to expire. The mode is "fast" when
+        only a fast-mode result is cached.
+        """
+        today = datetime.date.today().isoformat()
+        now = time.monotonic()
+        self._failed_until = {key: until for key, until in self._failed_until.items() if until > now}
+        due = []
+        for key, count, error in self.service.popular_routes.top(self.top_n):
+            # count - error is a lower bound on how often the route was actually searched
+            if count - error < self.min_count or key[2] < today or key in self._failed_until:
+                continue
+            mode = "full" if self.service.result_ttl(*key) else "fast"
+            if 0 < self.service.result_ttl(*key, mode=mode) <= self.lead_time:
+                due.append((key, mode))
+        return due
+
+    def _maybe_decay(self) -> None:
+        now = time.monotonic()
+        if self.half_life and now - self._last_decay >= self.half_life:
+            self.service.popular_routes.decay(0.5)
+            self._last_decay = now
+
+    async def run_once(self) -> int:
+        """Refresh due routes within the budget; returns how many were refreshed"""
+        self._maybe_decay()
+        refreshed = 0
+        for key, mode in self.due():
+            cost = self.service.upstream_cost(mode)
+            if self.budget_remaining() < cost:
+                self.deferred += 1
+                break
+            self._spent.append((time.monotonic(), cost))
+            try:
+                result = await self.service.refresh(*key, mode=mode, record_history=False)
+            except Exception as e:
+                logger.warning("Cache warming failed for %s: %s", key, e)
+                result = {"error": str(e)}
+            if "error" in result:
+                self.failed += 1
+                self._failed_until[key] = time.monotonic() + self.backoff
+            else:
+                refreshed += 1
+        self.cycles += 1
+        self.refreshed += refreshed
+        return refreshed
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Cache warming pass failed")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._task is not None,
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "deferred_for_budget": self.deferred,
+            "backing_off": len(self._failed_until),
+            "budget_per_hour": self.budget,
+            "budget_remaining": self.budget_remaining()
+        }
@@ -0,0 +1,149 @@
+import random
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Sequence
+from app.core.config import settings
+
+GLOBAL = "global"
+
+
+class CurrencySelector:
+    """
+    Learns which currencies tend to be cheapest and queries only those.
+
+    For every search the currencies that came out cheapest (within
+    `tolerance` of the minimum USD price) score a win in three contexts:
+    the route, the origin market and globally. A currency's score is its
+    smoothed win rate, shrunk towards the parent context's score when the
+    route or market has little data. Each search queries the `top_n` best
+    currencies, plus one random other currency with probability
+    `exploration` so rankings keep adapting. Until `warmup` searches have
+    been recorded every search is a full sweep.
+
+    Full sweeps and explorations double as shadow checks. They show whether
+    the top-N that would have been chosen contained the cheapest currency,
+    and how much more the best currency in that top-N would have cost.
+    """
+
+    def __init__(
+        self,
+        top_n: int = settings.CURRENCY_TOP_N,
+        exploration: float = settings.CURRENCY_EXPLORATION,
+        warmup: int = settings.CURRENCY_WARMUP_SEARCHES,
+        max_routes: int = settings.CURRENCY_MAX_ROUTES,
+        prior: float = 4.0,
+        tolerance: float = 0.005,
+        rng: Optional[random.Random] = None
+    ):
+        self.top_n = top_n
+        self.exploration = exploration
+        self.warmup = warmup
+        self.max_routes = max_routes
+        self.prior = prior
+        self.tolerance = tolerance
+        self.rng = rng or random.Random()
+        self._wins: "OrderedDict[str, Counter]" = OrderedDict()
+        self._queried: "OrderedDict[str, Counter]" = OrderedDict()
+        self.searches = 0
+        self.full_sweeps = 0
+        self.upstream_calls = 0
+        self.full_sweep_calls = 0
+        self.shadow_checks = 0
+        self.shadow_hits = 0
+        self.shadow_extra_cost = 0.0
+
+    @staticmethod
+    def _contexts(origin: str, destination: str) -> List[str]:
+        origin, destination = origin.strip().upper(), destination.strip().upper()
+        return [f"route:{origin}-{destination}", f"market:{origin}", GLOBAL]
+
+    def scores(self, candidates: Sequence[str], origin: str, destination: str) -> Dict[str, float]:
+        """Estimated probability that each candidate is the cheapest currency for this route"""
+        scores = {currency: 1.0 / len(candidates) for currency in candidates}
+        for context in reversed(self._contexts(origin, destination)):
+            wins, queried = self._wins.get(context), self._queried.get(context)
+            if not queried:
+                continue
+            scores = {
+                currency: (wins[currency] + self.prior * parent) / (queried[currency] + self.prior)
+                for currency, parent in scores.items()
+            }
+        return scores
+
+    def rank(self, candidates: Sequence[str], origin: str, destination: str) -> List[str]:
+        scores = self.scores(candidates, origin, destination)
+        # Ties keep the configured order, which lists the usual winners first
+        return sorted(candidates, key=lambda currency: -scores[currency])
+
+    def select(self, candidates: Sequence[str], origin: str, destination: str) -> List[str]:
+        """Currencies to query for this search, most promising first"""
+        if self.searches < self.warmup or len(candidates) <= self.top_n:
+            return list(candidates)
+        ranked = self.rank(candidates, origin, destination)
+        selected = ranked[:self.top_n]
+        rest = ranked[self.top_n:]
+        if rest and self.rng.random() < self.exploration:
+            selected.append(self.rng.choice(rest))
+        return selected
+
+    def record(self, candidates: Sequence[str], origin: str, destination: str,
+               queried: Sequence[str], prices_usd: Dict[str, float]) -> None:
+        """
+        Learn from one search. `queried` is every currency that was requested
+        upstream, including ones that failed or returned no offers; those
+        count as queried without a win. `prices_usd` holds the cheapest USD
+        price of each currency that did return offers.
+        """
+        queried = list(queried)
+        if not queried:
+            return
+        self._shadow_check(candidates, origin, destination, prices_usd)
+
+        cheapest = min(prices_usd.values()) if prices_usd else None
+        winners = [currency for currency, price in prices_usd.items() if price <= cheapest * (1 + self.tolerance)]
+        for context in self._contexts(origin, destination):
+            if context not in self._queried:
+                self._queried[context] = Counter()
+                self._wins[context] = Counter()
+            self._queried[context].update(queried)
+            self._wins[context].update(winners)
+            self._queried.move_to_end(context)
+            self._wins.move_to_end(context)
+        while len(self._queried) > self.max_routes:
+            context, _ = self._queried.popitem(last=False)
+            self._wins.pop(context, None)
+
+        self.searches += 1
+        self.upstream_calls += len(queried)
+        self.full_sweep_calls += len(candidates)
+        if set(candidates) <= set(queried):
+            self.full_sweeps += 1
+
+    def _shadow_check(self, candidates: Sequence[str], origin: str, destination: str, prices_usd: Dict[str, float]) -> None:
+        if self.searches < self.warmup or len(prices_usd) <= self.top_n:
+            return
+        predicted = self.rank(candidates, origin, destination)[:self.top_n]
+        if not all(currency in prices_usd for currency in predicted):
+            return
+        cheapest = min(prices_usd.values())
+        predicted_cheapest = min(prices_usd[currency] for currency in predicted)
+        self.shadow_checks += 1
+        if predicted_cheapest <= cheapest * (1 + self.tolerance):
+            self.shadow_hits += 1
+        self.shadow_extra_cost += (predicted_cheapest - cheapest) / cheapest if cheapest else 0.0
+
+    def stats(self) -> Dict:
+        saved = self.full_sweep_calls - self.upstream_calls
+        return {
+            "searches": self.searches,
+            "full_sweeps": self.full_sweeps,
+            "upstream_calls": self.upstream_calls,
+            "full_sweep_calls": self.full_sweep_calls,
+            "calls_saved": saved,
+            "savings_rate": round(saved / self.full_sweep_calls, 4) if self.full_sweep_calls else 0.0,
+            "shadow_checks": self.shadow_checks,
+            "estimated_hit_rate": round(self.shadow_hits / self.shadow_checks, 4) if self.shadow_checks else None,
+            "estimated_extra_cost": round(self.shadow_extra_cost / self.shadow_checks, 4) if self.shadow_checks else None,
+            "top_n": self.top_n,
+            "exploration": self.exploration,
+            "contexts": len(self._queried)
+        }
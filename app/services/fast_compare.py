@@ -0,0 +1,84 @@
+from typing import Dict, List, Optional, Sequence
+
+
+def project_prices(base_result: Dict, currencies: Sequence[str], rates: Dict[str, float]) -> List[Dict]:
+    """
+    Project one real quote into every currency with the USD exchange-rate
+    table. The base currency's row is the real quote; the others are marked
+    `estimated`. Currencies without a rate are left out.
+    """
+    base = base_result["currency"]
+    base_rate = 1.0 if base == "USD" else rates.get(base)
+    price_usd = base_result["price"] / base_rate if base_rate else base_result["price"]
+    rows = [{**base_result, "price_usd": price_usd, "estimated": False}]
+    for currency in currencies:
+        rate = 1.0 if currency == "USD" else rates.get(currency)
+        if currency == base or not rate:
+            continue
+        rows.append({
+            "currency": currency,
+            "price": round(price_usd * rate, 2),
+            "price_usd": price_usd,
+            "parsed_offer": base_result.get("parsed_offer"),
+            "estimated": True
+        })
+    return rows
+
+
+class DivergenceTracker:
+    """
+    How far fast-mode estimates drift from real per-currency quotes.
+
+    Each audit compares the USD price a fast search reported with the USD
+    value of the real cheapest quote in every currency, fetched by a full
+    sweep of the same search. Positive divergence means the real quote was
+    dearer than the estimate. `missed_savings` is how much cheaper the best
+    real currency was than the fast answer.
+    """
+
+    def __init__(self):
+        self.audits = 0
+        self._currencies: Dict[str, List[float]] = {}  # currency -> [samples, sum, sum of abs, max abs]
+        self.missed_savings_total = 0.0
+        self.missed_savings_max = 0.0
+
+    def record(self, estimated_usd: float, real_usd: Dict[str, float]) -> Dict[str, float]:
+        """Record one audit and return its per-currency divergence"""
+        if not estimated_usd or not real_usd:
+            return {}
+        divergence = {currency: (price - estimated_usd) / estimated_usd for currency, price in real_usd.items()}
+        for currency, value in divergence.items():
+            entry = self._currencies.setdefault(currency, [0, 0.0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += value
+            entry[2] += abs(value)
+            entry[3] = max(entry[3], abs(value))
+        missed = max(0.0, (estimated_usd - min(real_usd.values())) / estimated_usd)
+        self.missed_savings_total += missed
+        self.missed_savings_max = max(self.missed_savings_max, missed)
+        self.audits += 1
+        return divergence
+
+    def expected_error(self) -> Optional[float]:
+        """Mean absolute divergence across all audited quotes, or None before the first audit"""
+        samples = sum(entry[0] for entry in self._currencies.values())
+        if not samples:
+            return None
+        return round(sum(entry[2] for entry in self._currencies.values()) / samples, 4)
+
+    def stats(self) -> Dict:
+        return {
+            "audits": self.audits,
+            "mean_abs_divergence": self.expected_error(),
+            "mean_missed_savings": round(self.missed_savings_total / self.audits, 4) if self.audits else None,
+            "max_missed_savings": round(self.missed_savings_max, 4),
+            "currencies": {
+                currency: {
+                    "samples": samples,
+                    "mean_divergence": round(total / samples, 4),
+                    "mean_abs_divergence": round(total_abs / samples, 4),
+                    "max_abs_divergence": round(max_abs, 4)
+                }
+                for currency, (samples, total, total_abs, max_abs) in sorted(self._currencies.items())
+            }
+        }
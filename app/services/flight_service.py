@@ -1,18 +1,145 @@
+import asyncio
 import httpx
-import requests
-from typing import List, Dict, Optional
+import logging
+import random
+import re
+import time
+from typing import List, Dict, Optional, Tuple
 from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.heavy_hitters import SpaceSaving
+from app.core.json_stream import JSONArrayStream
+from app.services.airports import airport_index
+from app.services.currency_selector import CurrencySelector
+from app.services.fast_compare import DivergenceTracker, project_prices
+from app.core.lazy import LazyModule, LazyObject
+from app.services.price_analytics import PriceAnalyzer, price_history, route_key
 import datetime
 
+logger = logging.getLogger(__name__)
+
+requests = LazyModule("requests")
+# Imported on first search; offer_snapshot itself imports helpers from this module
+OfferSnapshot = LazyObject("app.services.offer_snapshot", "OfferSnapshot")
+
+# Further (origin, destination, date) hops of a multi-city trip, after the first
+Legs = Tuple[Tuple[str, str, str], ...]
+
+_ISO_DURATION = re.compile(r"^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:\d+S)?)?$")
+
+
+def iso_duration_minutes(value: Optional[str]) -> Optional[int]:
+    """Minutes in an Amadeus ISO 8601 duration such as PT5H30M or P1DT2H"""
+    match = _ISO_DURATION.match(value or "")
+    if not value or not match:
+        return None
+    days, hours, minutes = (int(part or 0) for part in match.groups())
+    return days * 1440 + hours * 60 + minutes
+
+
+def minutes_between(start: str, end: str) -> int:
+    delta = datetime.datetime.fromisoformat(end) - datetime.datetime.fromisoformat(start)
+    return int(delta.total_seconds() // 60)
+
+
+def _endpoint(point: Dict) -> Dict:
+    return {"airport": point["iataCode"], "terminal": point.get("terminal"), "time": point["at"]}
+
+
+# Offer fields read by parse_flight_offer and OfferSnapshot; compact_offer drops the rest
+_OFFER_FIELDS = ("id", "lastTicketingDate", "numberOfBookableSeats", "instantTicketingRequired")
+_PRICE_FIELDS = ("currency", "total", "base", "additionalServices")
+_SEGMENT_FIELDS = ("id", "departure", "arrival", "carrierCode", "number", "operating", "aircraft", "duration", "numberOfStops")
+_FARE_FIELDS = ("segmentId", "cabin", "includedCheckedBags", "includedCabinBags", "amenities")
+
+
+def compact_offer(offer: Dict) -> Dict:
+    """
+    The parts of a raw Amadeus offer that parsing and the offer snapshot use.
+
+    Pricing for travelers after the first, pricing options, fee breakdowns
+    and per-segment extras such as CO2 figures are dropped; with several
+    adults the per-traveler pricing is most of an offer's size.
+    """
+    compact = {key: offer[key] for key in _OFFER_FIELDS if key in offer}
+    compact["price"] = {key: value for key, value in offer["price"].items() if key in _PRICE_FIELDS}
+    compact["itineraries"] = [
+        {
+            **{key: value for key, value in itinerary.items() if key != "segments"},
+            "segments": [{key: segment[key] for key in _SEGMENT_FIELDS if key in segment} for segment in itinerary.get("segments", [])]
+        }
+        for itinerary in offer.get("itineraries", [])
+    ]
+    if offer.get("travelerPricings"):
+        fares = offer["travelerPricings"][0].get("fareDetailsBySegment", [])
+        compact["travelerPricings"] = [{
+            "fareDetailsBySegment": [{key: fare[key] for key in _FARE_FIELDS if key in fare} for fare in fares]
+        }]
+    return compact
+
+
+def _trip_type(itineraries: List[Dict]) -> str:
+    """
+    one_way, round_trip or multi_city. Two itineraries are a round trip when
+    the second ends where the first started, including open-jaw returns to
+    another airport of the same area (JFK-LHR, LHR-EWR).
+    """
+    if len(itineraries) == 1:
+        return "one_way"
+    if len(itineraries) == 2 and airport_index.same_area(
+        itineraries[1]["arrival"]["airport"], itineraries[0]["departure"]["airport"]
+    ):
+        return "round_trip"
+    return "multi_city"
+
+
+def multi_city_request(legs: Legs, currency: str, adults: int, max_offers: int = settings.FLIGHT_SEARCH_MAX_OFFERS) -> Dict:
+    """Body for the POST flight-offers search covering every leg of a multi-city trip"""
+    return {
+        "currencyCode": currency,
+        "originDestinations": [
+            {
+                "id": str(index),
+                "originLocationCode": origin,
+                "destinationLocationCode": destination,
+                "departureDateTimeRange": {"date": date}
+            }
+            for index, (origin, destination, date) in enumerate(legs, start=1)
+        ],
+        "travelers": [{"id": str(index), "travelerType": "ADULT"} for index in range(1, adults + 1)],
+        "sources": ["GDS"],
+        "searchCriteria": {"maxFlightOffers": max_offers}
+    }
+
 class FlightService:
     def __init__(self):
         self.api_key = settings.AMADEUS_API_KEY
         self.api_secret = settings.AMADEUS_API_SECRET
         self.base_url = "https://test.api.amadeus.com"
-        self.currencies = ["USD", "EUR", "GBP", "CAD", "AUD"]  # Common currencies to compare
+        self.currencies = list(settings.FLIGHT_CURRENCIES)  # Currencies to compare
+        self.currency_selector = CurrencySelector()
+        self.price_analyzer = PriceAnalyzer()
+        # mode="fast": one upstream call projected with FX rates, audited against sampled full sweeps
+        self._fast_results = TTLCache(maxsize=settings.FLIGHT_RESULT_CACHE_SIZE, ttl=settings.FLIGHT_RESULT_TTL)
+        self.fast_divergence = DivergenceTracker()
+        self._last_audit = float("-inf")
+        self._audits = set()
+        self._rng = random.Random()
+        # Reused until shortly before expiry instead of fetched for every currency of every search
+        self._tokens = TTLCache(maxsize=1)
+        self._fx_rates = TTLCache(maxsize=8)
+        self._results = TTLCache(maxsize=settings.FLIGHT_RESULT_CACHE_SIZE, ttl=settings.FLIGHT_RESULT_TTL)
+        # Full offer sets behind each result, kept longer than the result so open cursors keep paging
+        self._snapshots = TTLCache(maxsize=settings.OFFER_SNAPSHOT_CACHE_SIZE, ttl=settings.OFFER_SNAPSHOT_TTL)
+        # Most requested searches, used by the cache warmer and the admin top-routes endpoint
+        self.popular_routes = SpaceSaving(settings.ROUTE_TRACKER_SIZE)
 
     async def get_access_token(self) -> str:
-        """Get Amadeus access token"""
+        """Get Amadeus access token, reusing the cached one while it is valid"""
+        token = self._tokens.get("amadeus")
+        if token:
+            return token
+
         async with httpx.AsyncClient() as client:
             response = await client.post(
                 f"{self.base_url}/v1/security/oauth2/token",
@@ -24,28 +151,73 @@ class FlightService:
                 headers={"Content-Type": "application/x-www-form-urlencoded"}
             )
             response.raise_for_status()
-            return response.json()["access_token"]
+            data = response.json()
+        ttl = max(float(data.get("expires_in", 0)) - settings.AMADEUS_TOKEN_MARGIN, 0)
+        if ttl:
+            self._tokens.set("amadeus", data["access_token"], ttl=ttl)
+        return data["access_token"]
 
     def parse_flight_offer(self, offer: Dict) -> Dict:
-        """Parse raw Amadeus flight offer into user-friendly format"""
+        """
+        Parse raw Amadeus flight offer into user-friendly format.
+
+        Every itinerary (outbound, return or multi-city leg) and every segment
+        is read in one pass, with stops, layovers at connecting airports and
+        elapsed time. The top-level departure/arrival/flight_info describe the
+        first itinerary from its first departure to its final arrival.
+        """
         try:
-            itinerary = offer["itineraries"][0]  # Take first itinerary
-            segment = itinerary["segments"][0]   # Take first segment
             price_info = offer["price"]
             traveler_pricing = offer["travelerPricings"][0] if offer.get("travelerPricings") else {}
+            fare_details_by_segment = traveler_pricing.get("fareDetailsBySegment", [])
+            fares = {fare.get("segmentId"): fare for fare in fare_details_by_segment}
 
-            # Parse departure/arrival times
-            departure = segment["departure"]
-            arrival = segment["arrival"]
+            itineraries = []
+            for itinerary in offer["itineraries"]:
+                segments = []
+                layovers = []
+                technical_stops = 0
+                previous_arrival = None
+                for segment in itinerary["segments"]:
+                    departure, arrival = segment["departure"], segment["arrival"]
+                    if previous_arrival is not None:
+                        # Both timestamps are local to the connecting airport, so they subtract directly
+                        layovers.append({
+                            "airport": departure["iataCode"],
+                            "minutes": minutes_between(previous_arrival["at"], departure["at"])
+                        })
+                    previous_arrival = arrival
+                    technical_stops += segment.get("numberOfStops", 0)
+                    carrier_code = segment["carrierCode"]
+                    fare = fares.get(segment.get("id"), {})
+                    segments.append({
+                        "airline": carrier_code,
+                        "flight_number": f"{carrier_code}{segment['number']}",
+                        "operating_airline": segment.get("operating", {}).get("carrierCode", carrier_code),
+                        "aircraft": segment.get("aircraft", {}).get("code", "N/A"),
+                        "departure": _endpoint(departure),
+                        "arrival": _endpoint(arrival),
+                        "duration": segment.get("duration"),
+                        "duration_minutes": iso_duration_minutes(segment.get("duration")),
+                        "cabin": fare.get("cabin")
+                    })
+
+                itineraries.append({
+                    "departure": segments[0]["departure"],
+                    "arrival": segments[-1]["arrival"],
+                    "duration": itinerary.get("duration"),
+                    "duration_minutes": iso_duration_minutes(itinerary.get("duration")),
+                    "stops": len(segments) - 1 + technical_stops,
+                    "layovers": layovers,
+                    "segments": segments
+                })
 
-            # Parse flight details
-            carrier_code = segment["carrierCode"]
-            flight_number = segment["number"]
-            aircraft = segment.get("aircraft", {}).get("code", "N/A")
+            outbound = itineraries[0]
+            first_segment = outbound["segments"][0]
 
-            # Parse baggage info
-            fare_details = traveler_pricing.get("fareDetailsBySegment", [{}])[0]
-            included_bags = fare_details.get("includedCheckedBags", {})
+            # Parse baggage info; the allowance for the journey is the smallest across segments
+            fare_details = fare_details_by_segment[0] if fare_details_by_segment else {}
+            checked_bags = [fare.get("includedCheckedBags", {}).get("quantity", 0) for fare in fare_details_by_segment]
             cabin_bags = fare_details.get("includedCabinBags", {})
 
             # Parse amenities
@@ -59,26 +231,24 @@ class FlightService:
                             "type": amenity.get("amenityType", "OTHER")
                         })
 
+            elapsed = [itinerary["duration_minutes"] for itinerary in itineraries]
             return {
                 "flight_info": {
-                    "airline": carrier_code,
-                    "flight_number": f"{carrier_code}{flight_number}",
-                    "aircraft": aircraft,
-                    "duration": itinerary["duration"]
-                },
-                "departure": {
-                    "airport": departure["iataCode"],
-                    "terminal": departure.get("terminal"),
-                    "time": departure["at"]
-                },
-                "arrival": {
-                    "airport": arrival["iataCode"],
-                    "terminal": arrival.get("terminal"),
-                    "time": arrival["at"]
+                    "airline": first_segment["airline"],
+                    "flight_number": first_segment["flight_number"],
+                    "flight_numbers": [segment["flight_number"] for segment in outbound["segments"]],
+                    "aircraft": first_segment["aircraft"],
+                    "duration": outbound["duration"],
+                    "stops": outbound["stops"]
                 },
+                "departure": outbound["departure"],
+                "arrival": outbound["arrival"],
+                "itineraries": itineraries,
+                "trip_type": _trip_type(itineraries),
+                "total_duration_minutes": sum(elapsed) if None not in elapsed else None,
                 "baggage": {
                     "checked_bags": {
-                        "quantity": included_bags.get("quantity", 0),
+                        "quantity": min(checked_bags) if checked_bags else 0,
                         "additional_fee": price_info.get("additionalServices", [])
                     },
                     "cabin_bags": {
@@ -98,7 +268,7 @@ class FlightService:
                     "instant_ticketing": offer.get("instantTicketingRequired", False)
                 }
             }
-        except (KeyError, IndexError, ValueError) as e:
+        except (KeyError, IndexError, ValueError, TypeError) as e:
             # Fallback to basic info if parsing fails
             return {
                 "flight_info": {"airline": "Unknown", "flight_number": "Unknown"},
@@ -108,60 +278,324 @@ class FlightService:
                 "error": f"Parsing failed: {str(e)}"
             }
 
-    async def search_flights(self, origin: str, destination: str, departure_date: str, currency: str = "USD", adults: int = 1) -> Dict:
-        """Search for flight offers in specified currency"""
+    async def search_flights(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: str,
+        currency: str = "USD",
+        adults: int = 1,
+        return_date: Optional[str] = None,
+        legs: Legs = ()
+    ) -> Dict:
+        """
+        Search for flight offers in specified currency.
+
+        With return_date the search is a round trip; with legs (further
+        (origin, destination, date) hops after the first) it is multi-city.
+        Amadeus prices either kind as whole journeys in a single request.
+        """
         token = await self.get_access_token()
         headers = {"Authorization": f"Bearer {token}"}
+        url = f"{self.base_url}/v2/shopping/flight-offers"
+        if legs:
+            # Multi-city needs the POST form of the search, which takes a list of origin/destinations
+            method = "POST"
+            request = {
+                "headers": {**headers, "X-HTTP-Method-Override": "GET"},
+                "json": multi_city_request(((origin, destination, departure_date),) + tuple(legs), currency, adults)
+            }
+        else:
+            params = {
+                "originLocationCode": origin,
+                "destinationLocationCode": destination,
+                "departureDate": departure_date,
+                "adults": adults,
+                "currencyCode": currency,
+                "max": settings.FLIGHT_SEARCH_MAX_OFFERS
+            }
+            if return_date:
+                params["returnDate"] = return_date
+            method, request = "GET", {"headers": headers, "params": params}
 
-        params = {
-            "originLocationCode": origin,
-            "destinationLocationCode": destination,
-            "departureDate": departure_date,
-            "adults": adults,
-            "currencyCode": currency,
-            "max": 10  # Get top 10 offers
-        }
+        # Offers are parsed one by one as the body arrives, keeping the cheapest whole and the rest
+        # compacted; reading stops once the data array closes, so dictionaries are never downloaded
+        cheapest, cheapest_price, offers = None, float("inf"), []
+        offers_stream = JSONArrayStream("data")
+
+        def add(completed: List[Dict]) -> None:
+            nonlocal cheapest, cheapest_price
+            for offer in completed:
+                price = float(offer["price"]["total"])
+                if price < cheapest_price:
+                    cheapest, cheapest_price = offer, price
+                offers.append(compact_offer(offer))
 
         async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/v2/shopping/flight-offers",
-                headers=headers,
-                params=params
-            )
-            response.raise_for_status()
-            data = response.json()
+            async with client.stream(method, url, **request) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    add(offers_stream.feed(chunk))
+                    if offers_stream.done:
+                        break
+        add(offers_stream.close())
 
-            # Get the cheapest offer
-            if data.get("data"):
-                cheapest = min(data["data"], key=lambda x: float(x["price"]["total"]))
-                parsed_offer = self.parse_flight_offer(cheapest)
-                return {
-                    "currency": currency,
-                    "price": float(cheapest["price"]["total"]),
-                    "parsed_offer": parsed_offer,
-                    "raw_offer": cheapest  # Keep raw data for debugging
-                }
+        if cheapest is None:
             return None
+        return {
+            "currency": currency,
+            "price": cheapest_price,
+            "parsed_offer": self.parse_flight_offer(cheapest),
+            "raw_offer": cheapest,  # Keep raw data for debugging
+            "offers": offers  # Moved into the offer snapshot by compare_prices
+        }
 
     def get_exchange_rates(self, base: str = "USD") -> Dict:
-        """Get exchange rates from free API"""
-        response = requests.get(f"https://api.exchangerate-api.com/v4/latest/{base}")
-        response.raise_for_status()
-        return response.json()["rates"]
+        """Get exchange rates from free API, cached for FX_RATES_TTL"""
+        rates = self._fx_rates.get(base)
+        if rates is None:
+            response = requests.get(f"https://api.exchangerate-api.com/v4/latest/{base}")
+            response.raise_for_status()
+            rates = response.json()["rates"]
+            self._fx_rates.set(base, rates, ttl=settings.FX_RATES_TTL)
+        return rates
+
+    def _result_key(self, origin: str, destination: str, departure_date: str, adults: int,
+                    return_date: Optional[str] = None, legs: Legs = ()) -> tuple:
+        legs = tuple((o.strip().upper(), d.strip().upper(), date) for o, d, date in legs)
+        return (origin.strip().upper(), destination.strip().upper(), departure_date, adults, return_date, legs)
+
+    def result_ttl(self, origin: str, destination: str, departure_date: str, adults: int = 1,
+                   return_date: Optional[str] = None, legs: Legs = (), mode: str = "full") -> float:
+        """Seconds the cached compare_prices result for this search stays fresh"""
+        key = self._result_key(origin, destination, departure_date, adults, return_date, legs)
+        ttl = self._results.remaining_ttl(key)
+        if mode == "fast" and not ttl:
+            ttl = self._fast_results.remaining_ttl(key)
+        return ttl
+
+    async def compare_prices(self, origin: str, destination: str, departure_date: str, adults: int = 1,
+                             return_date: Optional[str] = None, legs: Legs = (), mode: str = "full",
+                             count_popularity: bool = True) -> Dict:
+        """
+        Compare flight prices across currencies and find lowest, reusing results for FLIGHT_RESULT_TTL.
+
+        mode="fast" makes one upstream call in FAST_COMPARE_BASE_CURRENCY and
+        projects that price into the other currencies with the FX table. A
+        cached full result is still preferred when there is one.
+
+        count_popularity=False serves from and fills the cache without counting
+        the search as demand for the cache warmer.
+        """
+        key = self._result_key(origin, destination, departure_date, adults, return_date, legs)
+        if count_popularity:
+            self.popular_routes.add(key)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+        if mode == "fast":
+            cached = self._fast_results.get(key)
+            if cached is not None:
+                return cached
+            result = await self.refresh(*key, mode="fast")
+            if "error" not in result:
+                self._maybe_audit(key, result)
+            return result
+        return await self.refresh(*key)
+
+    async def compare_nearby(self, origin: str, destination: str, departure_date: str, adults: int = 1,
+                             return_date: Optional[str] = None, mode: str = "full", radius_km: float = 0) -> Dict:
+        """
+        compare_prices over every airport pair behind a metro code or within
+        radius_km of the requested airports, merged into one result.
+
+        Pairs are taken nearest first (the requested pair leads) until
+        NEARBY_MAX_PAIRS or NEARBY_UPSTREAM_BUDGET upstream requests is
+        reached; cached pairs cost nothing. They are searched concurrently,
+        NEARBY_CONCURRENCY at a time. Only the first pair counts towards route
+        popularity, so one expanded search does not make every pair a
+        cache-warming candidate. The result is the cheapest pair's
+        compare_prices result, with all_results from every pair tagged with
+        their airport_pair and a per-pair summary in airport_pairs.
+        """
+        origins = airport_index.expand(origin, radius_km, settings.NEARBY_MAX_AIRPORTS)
+        destinations = airport_index.expand(destination, radius_km, settings.NEARBY_MAX_AIRPORTS)
+        candidates = sorted(
+            ((o, d, round(o_km + d_km, 1)) for o, o_km in origins for d, d_km in destinations if o != d),
+            key=lambda pair: pair[2]
+        )
+
+        budget = settings.NEARBY_UPSTREAM_BUDGET
+        pairs, skipped = [], []
+        for o, d, distance in candidates:
+            cached = self.result_ttl(o, d, departure_date, adults, return_date, mode=mode) > 0
+            cost = 0 if cached else self.upstream_cost(mode)
+            if len(pairs) < settings.NEARBY_MAX_PAIRS and (cost <= budget or not pairs):
+                pairs.append((o, d, distance))
+                budget -= cost
+            else:
+                skipped.append(f"{o}-{d}")
+
+        semaphore = asyncio.Semaphore(settings.NEARBY_CONCURRENCY)
+
+        async def search(o: str, d: str, first: bool) -> Dict:
+            async with semaphore:
+                return await self.compare_prices(o, d, departure_date, adults, return_date, mode=mode, count_popularity=first)
+
+        results = await asyncio.gather(
+            *(search(o, d, index == 0) for index, (o, d, _) in enumerate(pairs)), return_exceptions=True
+        )
+
+        summaries, all_results = [], []
+        best = None
+        for (o, d, distance), result in zip(pairs, results):
+            tag = {"origin": o, "destination": d, "airport_pair": f"{o}-{d}"}
+            if isinstance(result, Exception) or "error" in result:
+                error = str(result) if isinstance(result, Exception) else result["error"]
+                summaries.append({**tag, "distance_km": distance, "error": error})
+                continue
+            summaries.append({
+                **tag,
+                "distance_km": distance,
+                "lowest_currency": result["lowest_currency"],
+                "lowest_price": result["lowest_price"],
+                "lowest_price_usd": result["lowest_price_usd"],
+                "snapshot_id": result.get("snapshot_id")
+            })
+            all_results.extend({**row, **tag} for row in result["all_results"])
+            if best is None or result["lowest_price_usd"] < best[1]["lowest_price_usd"]:
+                best = (tag, result)
+
+        requested = {"origin": origin.strip().upper(), "destination": destination.strip().upper(), "nearby_km": radius_km}
+        if best is None:
+            return {"error": "No flight offers found", "requested": requested, "airport_pairs": summaries}
+        tag, result = best
+        return {
+            **result,
+            **tag,
+            "all_results": all_results,
+            "requested": requested,
+            "airport_pairs": summaries,
+            "pairs_skipped": skipped,
+            "upstream_budget_used": settings.NEARBY_UPSTREAM_BUDGET - budget
+        }
+
+    async def refresh(self, origin: str, destination: str, departure_date: str, adults: int = 1,
+                      return_date: Optional[str] = None, legs: Legs = (), mode: str = "full",
+                      record_history: bool = True) -> Dict:
+        """
+        Fetch prices from upstream and replace the cached result; does not
+        count towards popularity. Pass record_history=False for refreshes no
+        user asked for, e.g. cache warming, so the fare stays out of the
+        route's price history.
+        """
+        key = self._result_key(origin, destination, departure_date, adults, return_date, legs)
+        if mode == "fast":
+            result = await self._fetch_fast(*key, record_history=record_history)
+            if "error" not in result:
+                self._fast_results.set(key, result)
+            return result
+        result = await self._fetch_prices(*key, record_history=record_history)
+        if "error" not in result:
+            self._results.set(key, result)
+        return result
+
+    def offer_snapshot(self, snapshot_id: Optional[str]) -> Optional["OfferSnapshot"]:
+        """The full offer set stored by an earlier compare_prices call, if it has not expired"""
+        return self._snapshots.get(snapshot_id) if snapshot_id else None
+
+    def currencies_for(self, origin: str, destination: str) -> List[str]:
+        """Currencies to query for a search: the learned top-N, or all of them when selection is off"""
+        if not settings.CURRENCY_SELECTION_ENABLED:
+            return list(self.currencies)
+        return self.currency_selector.select(self.currencies, origin, destination)
+
+    def upstream_cost(self, mode: str = "full") -> int:
+        """Upper bound on upstream flight-offer requests made by one uncached compare_prices call"""
+        return 1 if mode == "fast" else len(self.currencies)
 
-    async def compare_prices(self, origin: str, destination: str, departure_date: str, adults: int = 1) -> Dict:
-        """Compare flight prices across currencies and find lowest"""
+    async def _fetch_fast(self, origin: str, destination: str, departure_date: str, adults: int,
+                          return_date: Optional[str] = None, legs: Legs = (), record_history: bool = True) -> Dict:
+        base = settings.FAST_COMPARE_BASE_CURRENCY
+        try:
+            result = await self.search_flights(origin, destination, departure_date, base, adults, return_date, legs)
+        except Exception as e:
+            logger.warning("Fast search in %s failed: %s", base, e)
+            result = None
+        if not result:
+            return {"error": "No flight offers found"}
+
+        rates = self.get_exchange_rates("USD")
+        offers = result.pop("offers", [])
+        all_results = project_prices(result, self.currencies, rates)
+        quote = all_results[0]
+        snapshot = OfferSnapshot([(base, offer) for offer in offers], rates)
+        self._snapshots.set(snapshot.id, snapshot)
+        history = None
+        if not return_date and not legs:
+            history = self._compare_price(origin, destination, quote["price_usd"], record_history)
+        return {
+            "lowest_currency": base,
+            "lowest_price": quote["price"],
+            "lowest_price_usd": quote["price_usd"],
+            "all_results": all_results,
+            "currencies_queried": [base],
+            "mode": "fast",
+            "expected_divergence": self.fast_divergence.expected_error(),
+            "snapshot_id": snapshot.id,
+            "total_offers": len(snapshot),
+            "price_history": history
+        }
+
+    def _maybe_audit(self, key: tuple, fast_result: Dict) -> None:
+        """Occasionally run a full sweep of a fast search in the background to measure FX divergence"""
+        now = time.monotonic()
+        if self._rng.random() >= settings.FAST_AUDIT_RATE or now - self._last_audit < settings.FAST_AUDIT_MIN_INTERVAL:
+            return
+        self._last_audit = now
+        task = asyncio.create_task(self._audit(key, fast_result))
+        self._audits.add(task)
+        task.add_done_callback(self._audits.discard)
+
+    async def _audit(self, key: tuple, fast_result: Dict) -> Optional[Dict[str, float]]:
+        try:
+            # The fast search already recorded this route's fare
+            full = await self._fetch_prices(*key, currencies=self.currencies, record_history=False)
+        except Exception as e:
+            logger.warning("Fast-mode audit failed for %s: %s", key, e)
+            return None
+        if "error" in full:
+            return None
+        self._results.set(key, full)  # the audit's full sweep also serves later searches
+        real = {result["currency"]: result["price_usd"] for result in full["all_results"]}
+        return self.fast_divergence.record(fast_result["lowest_price_usd"], real)
+
+    def _compare_price(self, origin: str, destination: str, price_usd: float, record: bool = True) -> Optional[Dict]:
+        """Compare a one-way fare with the route's earlier fares, then add it to them when record is set"""
+        route = route_key(origin, destination)
+        history = self.price_analyzer.compare_history(price_usd, price_history.get(route))
+        if record:
+            price_history.record(route, price_usd)
+        return history
+
+    async def _fetch_prices(self, origin: str, destination: str, departure_date: str, adults: int,
+                            return_date: Optional[str] = None, legs: Legs = (),
+                            currencies: Optional[List[str]] = None, record_history: bool = True) -> Dict:
         results = []
-        for currency in self.currencies:
+        offers = []
+        currencies = currencies or self.currencies_for(origin, destination)
+        for currency in currencies:
             try:
-                result = await self.search_flights(origin, destination, departure_date, currency, adults)
+                result = await self.search_flights(origin, destination, departure_date, currency, adults, return_date, legs)
                 if result:
+                    offers.extend((currency, offer) for offer in result.pop("offers", []))
                     results.append(result)
             except Exception as e:
-                print(f"Error for {currency}: {e}")
+                logger.warning("Search in %s failed: %s", currency, e)
                 continue
 
         if not results:
+            self.currency_selector.record(self.currencies, origin, destination, currencies, {})
             return {"error": "No flight offers found"}
 
         # Convert all prices to USD for comparison
@@ -183,11 +617,31 @@ class FlightService:
                 "price_usd": converted_price
             })
 
+        self.currency_selector.record(
+            self.currencies, origin, destination, currencies,
+            {result["currency"]: result["price_usd"] for result in converted_results}
+        )
+
         # Find the lowest price in USD
         lowest = min(converted_results, key=lambda x: x["price_usd"])
+        snapshot = OfferSnapshot(offers, rates)
+        self._snapshots.set(snapshot.id, snapshot)
+        itineraries = snapshot.compare_itineraries(settings.ITINERARY_COMPARE_LIMIT)
+        # Round-trip and multi-city fares are not comparable with the one-way route history
+        history = None
+        if not return_date and not legs:
+            history = self._compare_price(origin, destination, lowest["price_usd"], record_history)
         return {
             "lowest_currency": lowest["currency"],
             "lowest_price": lowest["price"],
             "lowest_price_usd": lowest["price_usd"],
-            "all_results": converted_results
+            "all_results": converted_results,
+            "currencies_queried": currencies,
+            # The same flights compared across currencies; lowest_* above may be different flights per currency
+            "itineraries": itineraries,
+            "cheapest_flight": itineraries[0] if itineraries else None,
+            "mode": "full",
+            "snapshot_id": snapshot.id,
+            "total_offers": len(snapshot),
+            "price_history": history
         }
\ No newline at end of file
@@ -0,0 +1,174 @@
+import asyncio
+import weakref
+from types import SimpleNamespace
+from typing import AsyncIterator, Dict, Optional
+from app.core.config import settings
+from app.core.lazy import LazyModule
+
+groq = LazyModule("groq")  # the SDK is imported on the first AI call
+
+
+class AIBusyError(Exception):
+    """Raised when the Groq wait queue is full or a call misses its deadline"""
+
+
+class GroqClient:
+    """
+    Concurrency-limited wrapper around AsyncGroq.
+
+    At most `max_concurrency` completions run at once, at most `max_queue`
+    callers wait for a slot, and every call (queueing and 429 retries
+    included) must finish within `timeout` seconds. Exposes the same
+    `chat.completions.create(...)` shape as AsyncGroq.
+
+    The semaphore and the AsyncGroq connection pool are bound to an event
+    loop, so each running loop gets its own; a warm serverless container
+    that runs every invocation under a fresh asyncio.run() keeps working.
+    The limits therefore apply per loop.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        client=None,
+        max_concurrency: int = settings.GROQ_MAX_CONCURRENCY,
+        max_queue: int = settings.GROQ_MAX_QUEUE,
+        timeout: float = settings.GROQ_TIMEOUT,
+        max_retries: int = settings.GROQ_MAX_RETRIES
+    ):
+        self._api_key = api_key
+        self._client = client  # an injected client is shared by every loop
+        self._per_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SimpleNamespace]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.waiting = 0
+        self.active = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.retried = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _loop_state(self) -> SimpleNamespace:
+        loop = asyncio.get_running_loop()
+        state = self._per_loop.get(loop)
+        if state is None:
+            state = SimpleNamespace(semaphore=asyncio.Semaphore(self.max_concurrency), client=None)
+            self._per_loop[loop] = state
+        return state
+
+    @property
+    def client(self):
+        if self._client is not None:
+            return self._client
+        state = self._loop_state()
+        if state.client is None:
+            # Retries and timeouts are handled here, so the SDK's own are disabled
+            state.client = groq.AsyncGroq(api_key=self._api_key, max_retries=0, timeout=self.timeout)
+        return state.client
+
+    async def _acquire(self, semaphore: asyncio.Semaphore, deadline: float) -> None:
+        if not semaphore.locked():
+            await semaphore.acquire()
+            return
+
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise AIBusyError("AI service is busy, please retry shortly")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self._remaining(deadline))
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise AIBusyError("Timed out waiting for an AI slot")
+        finally:
+            self.waiting -= 1
+
+    def _remaining(self, deadline: float) -> float:
+        return max(deadline - asyncio.get_running_loop().time(), 0)
+
+    def _retry_after(self, error: "groq.RateLimitError", attempt: int) -> float:
+        header = error.response.headers.get("retry-after") if error.response is not None else None
+        try:
+            return float(header)
+        except (TypeError, ValueError):
+            return 0.5 * (2 ** attempt)
+
+    async def _call(self, deadline: float, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return await asyncio.wait_for(
+                    self.client.chat.completions.create(**kwargs),
+                    timeout=self._remaining(deadline)
+                )
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise AIBusyError(f"AI call exceeded {self.timeout}s deadline")
+            except groq.RateLimitError as e:
+                delay = self._retry_after(e, attempt)
+                if attempt >= self.max_retries or delay >= self._remaining(deadline):
+                    raise
+                attempt += 1
+                self.retried += 1
+                await asyncio.sleep(delay)
+
+    async def create(self, **kwargs):
+        """Rate-limited equivalent of AsyncGroq.chat.completions.create"""
+        deadline = asyncio.get_running_loop().time() + self.timeout
+        semaphore = self._loop_state().semaphore
+        await self._acquire(semaphore, deadline)
+        self.active += 1
+        try:
+            return await self._call(deadline, **kwargs)
+        finally:
+            self.active -= 1
+            semaphore.release()
+
+    async def stream(self, **kwargs) -> AsyncIterator:
+        """Yield streamed completion chunks, holding a slot until the stream ends"""
+        deadline = asyncio.get_running_loop().time() + self.timeout
+        semaphore = self._loop_state().semaphore
+        await self._acquire(semaphore, deadline)
+        self.active += 1
+        try:
+            chunks = (await self._call(deadline, stream=True, **kwargs)).__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self._remaining(deadline))
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    self.timed_out += 1
+                    raise AIBusyError(f"AI stream exceeded {self.timeout}s deadline")
+                yield chunk
+        finally:
+            self.active -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "retried": self.retried
+        }
+
+
+_shared_clients: Dict[str, GroqClient] = {}
+
+
+def get_groq_client(api_key: str) -> GroqClient:
+    """Return the process-wide GroqClient for an API key"""
+    client = _shared_clients.get(api_key)
+    if client is None:
+        client = GroqClient(api_key=api_key)
+        _shared_clients[api_key] = client
+    return client
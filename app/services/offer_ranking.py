@@ -0,0 +1,72 @@
+from __future__ import annotations
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core.lazy import LazyModule
+
+np = LazyModule("numpy")
+
+# Ranking objectives in cost-matrix column order; all are minimized, bags after negation
+OBJECTIVES = ("price", "duration", "stops", "bags")
+
+
+def parse_weights(value: Optional[str]) -> Dict[str, float]:
+    """
+    Parse "price:0.5,duration:0.3" into weights over OBJECTIVES, normalized
+    to sum to 1. Objectives left out get weight 0; None gives RANKING_WEIGHTS.
+    """
+    if not value:
+        weights = dict(settings.RANKING_WEIGHTS)
+    else:
+        weights = {}
+        for part in value.split(","):
+            name, _, weight = part.partition(":")
+            name = name.strip().lower()
+            if name not in OBJECTIVES:
+                raise ValueError(f"Unknown ranking objective: {name}. Use {', '.join(OBJECTIVES)}")
+            try:
+                weights[name] = float(weight)
+            except ValueError:
+                raise ValueError(f"Invalid weight for {name}: {weight}")
+            if weights[name] < 0:
+                raise ValueError("Ranking weights must not be negative")
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("At least one ranking weight must be positive")
+    return {name: weights.get(name, 0.0) / total for name in OBJECTIVES}
+
+
+def cost_matrix(price_usd: np.ndarray, duration: np.ndarray, stops: np.ndarray, bags: np.ndarray) -> np.ndarray:
+    """n x 4 matrix of costs to minimize; unknown (infinite) durations count as the longest known one"""
+    duration = np.asarray(duration, dtype=np.float64)
+    finite = np.isfinite(duration)
+    duration = np.where(finite, duration, duration[finite].max() if finite.any() else 0.0)
+    return np.column_stack([price_usd, duration, stops, -np.asarray(bags, dtype=np.float64)]).astype(np.float64)
+
+
+def pareto_front(costs: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask of the rows no other row dominates (at least as good on
+    every objective and strictly better on one).
+
+    Candidates are kept in lexicographic order, so the first remaining one
+    can never be dominated by a later one and is on the front. It then
+    removes every candidate it dominates in one vectorized comparison.
+    The loop runs once per front member instead of once per row.
+    """
+    efficient = np.zeros(len(costs), dtype=bool)
+    candidates = np.lexsort(costs.T[::-1])
+    while candidates.size:
+        best, rest = candidates[0], candidates[1:]
+        efficient[best] = True
+        others = costs[rest]
+        dominated = np.all(others >= costs[best], axis=1) & np.any(others > costs[best], axis=1)
+        candidates = rest[~dominated]
+    return efficient
+
+
+def weighted_scores(costs: np.ndarray, weights: Dict[str, float]) -> np.ndarray:
+    """Weighted sum of min-max normalized costs; 0 is best on every objective, lower is better"""
+    low = costs.min(axis=0)
+    span = costs.max(axis=0) - low
+    span[span == 0] = 1.0
+    return ((costs - low) / span) @ np.array([weights[name] for name in OBJECTIVES])
@@ -0,0 +1,288 @@
+from __future__ import annotations
+import base64
+import hashlib
+import json
+import secrets
+import time
+from collections import OrderedDict
+from functools import cached_property
+from typing import Callable, Dict, List, Tuple
+from app.core.lazy import LazyModule
+from app.services.flight_service import iso_duration_minutes
+from app.services.offer_ranking import cost_matrix, pareto_front, parse_weights, weighted_scores
+
+np = LazyModule("numpy")
+
+# Sort keys accepted by `OfferSnapshot.query`, mapped to their column; prefix with "-" for descending
+SORT_COLUMNS = {
+    "price": "price_usd",
+    "duration": "duration",
+    "departure": "departure_minute",
+    "stops": "stops",
+    "best": "best_score"
+}
+# Accepted filters and the JSON types their values may take in a cursor
+FILTERS = {
+    "currency": (str,),
+    "nonstop": (bool,),
+    "carrier": (str,),
+    "depart_after": (int,),
+    "depart_before": (int,),
+    "max_price": (int, float),
+    "max_duration": (int, float)
+}
+
+
+def fingerprint(offer: Dict) -> str:
+    """Identity of the flights in an offer: carrier, flight number and departure time of every segment"""
+    return "|".join(
+        f"{segment.get('carrierCode')}{segment.get('number')}@{segment.get('departure', {}).get('at')}"
+        for itinerary in offer.get("itineraries", []) for segment in itinerary.get("segments", [])
+    )
+
+
+def minute_of_day(at: str) -> int:
+    """Minutes past local midnight of an ISO timestamp such as 2025-12-01T08:30:00"""
+    return int(at[11:13]) * 60 + int(at[14:16])
+
+
+class OfferSnapshot:
+    """
+    Every offer returned for one search, across all currencies, stored as columns.
+
+    Offers are grouped by fingerprint, so the same flights quoted in
+    different currencies (or under different fares) share an itinerary id.
+    Filters and sorts are evaluated as NumPy array operations over the
+    columns; raw offers are only parsed for the rows of the page being
+    returned. A snapshot never changes once built, so offsets into a
+    filtered, sorted selection stay valid for paging.
+    """
+
+    def __init__(self, offers: List[Tuple[str, Dict]], rates: Dict[str, float]):
+        self.id = secrets.token_urlsafe(9)
+        self.created_at = time.time()
+        self.offers = [offer for _, offer in offers]
+
+        currencies, prices, prices_usd, stops, durations, departures, carrier_sets, bags = [], [], [], [], [], [], [], []
+        itinerary_ids: Dict[str, int] = {}  # fingerprint -> itinerary id
+        offer_itineraries = []
+        for currency, offer in offers:
+            offer_itineraries.append(itinerary_ids.setdefault(fingerprint(offer), len(itinerary_ids)))
+            price = float(offer["price"]["total"])
+            rate = rates.get(currency) if currency != "USD" else 1.0
+            itineraries = offer.get("itineraries") or [{}]
+            outbound = itineraries[0].get("segments") or [{}]
+            elapsed = [iso_duration_minutes(itinerary.get("duration")) for itinerary in itineraries]
+
+            currencies.append(currency)
+            prices.append(price)
+            prices_usd.append(price / rate if rate else price)
+            stops.append(len(outbound) - 1 + sum(segment.get("numberOfStops", 0) for segment in outbound))
+            durations.append(sum(elapsed) if None not in elapsed else np.inf)
+            departures.append(minute_of_day(outbound[0]["departure"]["at"]) if "departure" in outbound[0] else -1)
+            fares = (offer.get("travelerPricings") or [{}])[0].get("fareDetailsBySegment") or [{}]
+            bags.append(min(fare.get("includedCheckedBags", {}).get("quantity", 0) for fare in fares))
+            carrier_sets.append({
+                segment.get("carrierCode")
+                for itinerary in itineraries for segment in itinerary.get("segments", [])
+            })
+
+        self.currency = np.array(currencies, dtype=object)
+        self.price = np.array(prices, dtype=np.float64)
+        self.price_usd = np.array(prices_usd, dtype=np.float64)
+        self.stops = np.array(stops, dtype=np.int16)
+        self.duration = np.array(durations, dtype=np.float64)
+        self.departure_minute = np.array(departures, dtype=np.int16)
+        self.checked_bags = np.array(bags, dtype=np.int16)
+        self.itinerary = np.array(offer_itineraries, dtype=np.int32)
+        self.fingerprints = list(itinerary_ids)
+        # One boolean column per carrier: offer i flies carrier j on any segment
+        self.carriers = sorted({code for codes in carrier_sets for code in codes if code})
+        carrier_index = {code: j for j, code in enumerate(self.carriers)}
+        self.carrier_matrix = np.zeros((len(offers), len(self.carriers)), dtype=bool)
+        for i, codes in enumerate(carrier_sets):
+            self.carrier_matrix[i, [carrier_index[code] for code in codes if code]] = True
+
+        self._orders: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.offers)
+
+    def mask(self, filters: Dict) -> np.ndarray:
+        """Boolean selection of the offers matching every given filter"""
+        selected = np.ones(len(self.offers), dtype=bool)
+        if filters.get("currency"):
+            selected &= self.currency == filters["currency"]
+        if filters.get("nonstop"):
+            selected &= self.stops == 0
+        if filters.get("carrier"):
+            if filters["carrier"] not in self.carriers:
+                return np.zeros(len(self.offers), dtype=bool)
+            selected &= self.carrier_matrix[:, self.carriers.index(filters["carrier"])]
+        if filters.get("depart_after") is not None:
+            selected &= self.departure_minute >= filters["depart_after"]
+        if filters.get("depart_before") is not None:
+            selected &= (self.departure_minute >= 0) & (self.departure_minute <= filters["depart_before"])
+        if filters.get("max_price") is not None:
+            # Compared in the filtered currency when there is one, otherwise in USD
+            prices = self.price if filters.get("currency") else self.price_usd
+            selected &= prices <= filters["max_price"]
+        if filters.get("max_duration") is not None:
+            selected &= self.duration <= filters["max_duration"]
+        return selected
+
+    def order(self, filters: Dict, sort: str = "price") -> np.ndarray:
+        """Indices of matching offers in sort order, memoized so later pages skip the work"""
+        key = json.dumps([filters, sort], sort_keys=True)
+        indices = self._orders.get(key)
+        if indices is not None:
+            self._orders.move_to_end(key)
+            return indices
+
+        descending = sort.startswith("-")
+        column = getattr(self, SORT_COLUMNS[sort.lstrip("-")])
+        indices = np.flatnonzero(self.mask(filters))
+        values = column[indices]
+        # lexsort is stable: ties keep the cheaper offer first, then upstream order
+        keys = (self.price_usd[indices], -values if descending else values)
+        indices = indices[np.lexsort(keys)]
+
+        self._orders[key] = indices
+        if len(self._orders) > 16:
+            self._orders.popitem(last=False)
+        return indices
+
+    @cached_property
+    def best_score(self) -> np.ndarray:
+        """Weighted score of every offer under the default RANKING_WEIGHTS; the sort=best column"""
+        if not self.offers:
+            return np.zeros(0)
+        costs = cost_matrix(self.price_usd, self.duration, self.stops, self.checked_bags)
+        return weighted_scores(costs, parse_weights(None))
+
+    def cheapest_per_itinerary(self) -> np.ndarray:
+        """Index of the cheapest offer (in USD, over all currencies) for each distinct itinerary"""
+        order = np.lexsort((self.price_usd, self.itinerary))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = self.itinerary[order][1:] != self.itinerary[order][:-1]
+        return order[first]
+
+    def rank_best(self, weights: Dict[str, float], limit: int, parse: Callable[[Dict], Dict]) -> Tuple[List[Dict], int]:
+        """
+        Distinct itineraries ranked by weighted score over price, duration,
+        stops and checked bags, each flagged if it is Pareto-optimal.
+        Returns the top `limit` rows and the size of the Pareto front.
+        """
+        if not self.offers:
+            return [], 0
+        candidates = self.cheapest_per_itinerary()
+        costs = cost_matrix(self.price_usd[candidates], self.duration[candidates], self.stops[candidates], self.checked_bags[candidates])
+        scores = weighted_scores(costs, weights)
+        front = pareto_front(costs)
+        rows = []
+        for j in np.lexsort((costs[:, 0], scores))[:limit]:
+            i = candidates[j]
+            rows.append({
+                "currency": self.currency[i],
+                "price": float(self.price[i]),
+                "price_usd": round(float(self.price_usd[i]), 2),
+                "score": round(float(scores[j]), 4),
+                "pareto_optimal": bool(front[j]),
+                "parsed_offer": parse(self.offers[i])
+            })
+        return rows, int(front.sum())
+
+    def compare_itineraries(self, limit: int = 10) -> List[Dict]:
+        """
+        The cheapest distinct itineraries, each with its price in every
+        currency it was quoted in and the currency that is cheapest for it.
+
+        Builds an itinerary x currency matrix of the lowest USD price per
+        cell in one vectorized pass, so every flight is compared with
+        itself across currencies rather than with whatever was cheapest
+        in each currency.
+        """
+        if not self.offers:
+            return []
+        currency_names, currency_ids = np.unique(self.currency.astype(str), return_inverse=True)
+        n_currencies = len(currency_names)
+        # Cheapest offer per (itinerary, currency) cell: sort by cell then USD price, keep the first of each cell
+        cells = self.itinerary.astype(np.int64) * n_currencies + currency_ids
+        order = np.lexsort((self.price_usd, cells))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = cells[order][1:] != cells[order][:-1]
+        best_offer = order[first]
+
+        usd = np.full((len(self.fingerprints), n_currencies), np.inf)
+        offer_at = np.full((len(self.fingerprints), n_currencies), -1, dtype=np.int64)
+        usd[self.itinerary[best_offer], currency_ids[best_offer]] = self.price_usd[best_offer]
+        offer_at[self.itinerary[best_offer], currency_ids[best_offer]] = best_offer
+
+        best_currency = usd.argmin(axis=1)
+        best_usd = usd[np.arange(len(usd)), best_currency]
+        quoted = np.isfinite(usd)
+        worst_usd = np.where(quoted, usd, -np.inf).max(axis=1)
+
+        rows = []
+        for itinerary in np.argsort(best_usd, kind="stable")[:limit]:
+            representative = self.offers[offer_at[itinerary, best_currency[itinerary]]]
+            segments = [s for it in representative.get("itineraries", []) for s in it.get("segments", [])]
+            rows.append({
+                "fingerprint": hashlib.blake2b(self.fingerprints[itinerary].encode("utf-8"), digest_size=8).hexdigest(),
+                "flight_numbers": [f"{s.get('carrierCode')}{s.get('number')}" for s in segments],
+                "departure": segments[0]["departure"]["at"] if segments else None,
+                "arrival": segments[-1]["arrival"]["at"] if segments else None,
+                "best_currency": str(currency_names[best_currency[itinerary]]),
+                "best_price": float(self.price[offer_at[itinerary, best_currency[itinerary]]]),
+                "best_price_usd": round(float(best_usd[itinerary]), 2),
+                "savings_usd": round(float(worst_usd[itinerary] - best_usd[itinerary]), 2),
+                "prices": [
+                    {
+                        "currency": str(currency_names[c]),
+                        "price": float(self.price[offer_at[itinerary, c]]),
+                        "price_usd": round(float(usd[itinerary, c]), 2)
+                    }
+                    for c in np.flatnonzero(quoted[itinerary])
+                ]
+            })
+        return rows
+
+    def page(self, filters: Dict, sort: str, offset: int, limit: int, parse: Callable[[Dict], Dict]) -> Tuple[List[Dict], int]:
+        """One page of parsed offers and the total number of matches"""
+        indices = self.order(filters, sort)
+        rows = []
+        for i in indices[offset:offset + limit]:
+            rows.append({
+                "currency": self.currency[i],
+                "price": float(self.price[i]),
+                "price_usd": round(float(self.price_usd[i]), 2),
+                "parsed_offer": parse(self.offers[i])
+            })
+        return rows, len(indices)
+
+
+def encode_cursor(snapshot_id: str, filters: Dict, sort: str, offset: int) -> str:
+    """Opaque cursor carrying everything needed to fetch the next page"""
+    payload = json.dumps({"s": snapshot_id, "f": filters, "o": sort, "n": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Dict, str, int]:
+    """Inverse of encode_cursor; raises ValueError for anything that is not a cursor we issued"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        snapshot_id, filters, sort, offset = payload["s"], payload["f"], payload["o"], payload["n"]
+        if not isinstance(snapshot_id, str) or not isinstance(sort, str) or sort.lstrip("-") not in SORT_COLUMNS:
+            raise ValueError("Invalid cursor")
+        if not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+            raise ValueError("Invalid cursor")
+        if not isinstance(filters, dict):
+            raise ValueError("Invalid cursor")
+        for name, value in filters.items():
+            types = FILTERS.get(name)
+            # bool is an int subclass; only "nonstop" may be one
+            if types is None or not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+                raise ValueError("Invalid cursor")
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError("Invalid cursor") from e
+    return snapshot_id, filters, sort, offset
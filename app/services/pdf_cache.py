@@ -0,0 +1,127 @@
+import json
+import os
+import re
+import tempfile
+from typing import Dict, Iterator, List, Optional
+from app.core.config import settings
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+class CacheWriter:
+    """Writes one document's chunks to a temp file and publishes it on commit"""
+
+    def __init__(self, cache: "PDFCache", digest: str):
+        self.cache = cache
+        self.digest = digest
+        os.makedirs(cache.directory, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(suffix=".tmp", dir=cache.directory)
+        self._file = os.fdopen(fd, "w", encoding="utf-8")
+
+    def write(self, chunk: Dict) -> None:
+        self._file.write(json.dumps(chunk) + "\n")
+
+    def commit(self) -> None:
+        self._file.close()
+        os.replace(self.temp_path, self.cache.path_for(self.digest))
+        self.cache.evict()
+
+    def discard(self) -> None:
+        self._file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class PDFCache:
+    """
+    Content-addressed on-disk cache of processed PDF chunks.
+
+    Entries are NDJSON files named by the SHA-256 of the uploaded bytes.
+    Reads refresh an entry's mtime, and writes evict the least recently
+    used entries once the directory exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory: str = settings.PDF_CACHE_DIR, max_bytes: int = settings.PDF_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def is_digest(digest: str) -> bool:
+        return bool(_DIGEST.match(digest))
+
+    def path_for(self, digest: str) -> str:
+        if not self.is_digest(digest):
+            raise ValueError("Invalid SHA-256 digest")
+        return os.path.join(self.directory, f"{digest}.ndjson")
+
+    def contains(self, digest: str) -> bool:
+        return self.is_digest(digest) and os.path.exists(self.path_for(digest))
+
+    def iter_chunks(self, digest: str) -> Optional[Iterator[Dict]]:
+        """Return an iterator over a cached document's chunks, or None on a miss"""
+        if not self.contains(digest):
+            self.misses += 1
+            return None
+        path = self.path_for(digest)
+        try:
+            os.utime(path)  # mark as recently used
+            f = open(path, encoding="utf-8")
+        except FileNotFoundError:  # evicted in between
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        def rows():
+            with f:
+                for line in f:
+                    yield json.loads(line)
+        return rows()
+
+    def get(self, digest: str) -> Optional[List[Dict]]:
+        rows = self.iter_chunks(digest)
+        return None if rows is None else list(rows)
+
+    def open_writer(self, digest: str) -> CacheWriter:
+        self.path_for(digest)  # validate before creating files
+        return CacheWriter(self, digest)
+
+    def put(self, digest: str, chunks: List[Dict]) -> None:
+        writer = self.open_writer(digest)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        except BaseException:
+            writer.discard()
+            raise
+        writer.commit()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".ndjson"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "max_bytes": self.max_bytes
+        }
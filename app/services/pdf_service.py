@@ -1,48 +1,224 @@
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
-from typing import List, Dict
+from __future__ import annotations
+from concurrent.futures import Executor, ProcessPoolExecutor
+from collections import deque
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.lazy import LazyObject
+import asyncio
+import math
+import mmap
 import os
 
-class PDFService:
-    def __init__(self):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
+# langchain and pypdf are slow to import; load them in whichever process parses first
+RecursiveCharacterTextSplitter = LazyObject("langchain.text_splitter", "RecursiveCharacterTextSplitter")
+PyPDFLoader = LazyObject("langchain_community.document_loaders", "PyPDFLoader")
+PdfReader = LazyObject("pypdf", "PdfReader")
+# PyPDFLoader's own metadata normalization, so page-range chunks carry the same metadata as loader chunks
+_purge_pdf_metadata = LazyObject("langchain_community.document_loaders.parsers.pdf", "_purge_metadata")
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def pool_workers() -> int:
+    """Worker processes in the shared PDF pool: PDF_WORKERS, or one per CPU core"""
+    return settings.PDF_WORKERS or os.cpu_count() or 1
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Process pool for CPU-bound PDF parsing, sized to the available cores"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=pool_workers())
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+
+def _make_text_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        length_function=len,
+    )
+
+
+def _load_and_split(file_path: str) -> List[Dict]:
+    """Parse and chunk a PDF; runs inside a pool worker"""
+    text_splitter = _make_text_splitter()
+    pages = PyPDFLoader(file_path).load()
+    chunks = text_splitter.split_documents(pages)
+    return [{"content": chunk.page_content, "metadata": chunk.metadata} for chunk in chunks]
+
+
+def _load_text(file_path: str) -> str:
+    """Extract the raw text of a PDF; runs inside a pool worker"""
+    pages = PyPDFLoader(file_path).load()
+    return "\n".join([page.page_content for page in pages])
+
+
+def _map_file(file_path: str) -> mmap.mmap:
+    """Map a PDF read-only so every worker shares the page cache instead of receiving pickled bytes"""
+    with open(file_path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _document_info(file_path: str) -> Tuple[Dict, List[str]]:
+    """Document-level metadata as PyPDFLoader reports it, and every page label; runs inside a pool worker"""
+    mapped = _map_file(file_path)
+    try:
+        reader = PdfReader(mapped)
+        metadata = _purge_pdf_metadata(
+            {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+            | dict(reader.metadata or {})
+            | {"source": file_path, "total_pages": len(reader.pages)}
         )
+        return metadata, reader.page_labels
+    finally:
+        mapped.close()
+
+
+def _read_page_range(
+    file_path: str,
+    start: int,
+    end: int,
+    metadata: Optional[Dict] = None,
+    labels: Optional[List[str]] = None
+) -> List[Dict]:
+    """
+    Extract the text of pages [start, end) with pypdf; runs inside a pool
+    worker. `metadata` and the `labels` of these pages come from
+    _document_info, computed once per document; they are read here when
+    not given.
+    """
+    if metadata is None or labels is None:
+        metadata, all_labels = _document_info(file_path)
+        labels = all_labels[start:end]
+    mapped = _map_file(file_path)
+    try:
+        reader = PdfReader(mapped)
+        return [
+            {
+                "text": reader.pages[page].extract_text().strip(),
+                "metadata": {**metadata, "page": page, "page_label": label}
+            }
+            for page, label in zip(range(start, min(end, len(reader.pages))), labels)
+        ]
+    finally:
+        mapped.close()
+
+
+def _split_page_range(
+    file_path: str,
+    start: int,
+    end: int,
+    metadata: Optional[Dict] = None,
+    labels: Optional[List[str]] = None
+) -> List[Dict]:
+    """Chunk pages [start, end); splitting page by page matches split_documents on the whole file"""
+    text_splitter = _make_text_splitter()
+    chunks = []
+    for page in _read_page_range(file_path, start, end, metadata, labels):
+        for content in text_splitter.split_text(page["text"]):
+            chunks.append({"content": content, "metadata": dict(page["metadata"])})
+    return chunks
+
+
+class PDFService:
+    def __init__(self, executor: Optional[Executor] = None, workers: Optional[int] = None):
+        # Parsing is CPU-bound, so it runs off the event loop in a process pool
+        self.executor = executor
+        # How many workers `executor` runs, used to size page ranges; defaults to the shared pool's size
+        self.workers = workers
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor or get_process_pool(), func, *args)
+
+    def _worker_count(self) -> int:
+        return self.workers or pool_workers()
+
+    def _is_large(self, file_path: str) -> bool:
+        return os.path.isfile(file_path) and os.path.getsize(file_path) >= settings.PDF_PARALLEL_MIN_BYTES
+
+    async def _map_page_ranges(self, func, file_path: str) -> List[List[Dict]]:
+        """Split the document into page ranges, run func on them in parallel and return results in page order"""
+        metadata, labels = await self._run(_document_info, file_path)
+        workers = self._worker_count()
+        # A few ranges per worker evens out pages that are slower to extract
+        size = max(1, math.ceil(len(labels) / (workers * 2)))
+        return await asyncio.gather(*[
+            self._run(func, file_path, start, start + size, metadata, labels[start:start + size])
+            for start in range(0, len(labels), size)
+        ])
 
     async def process_pdf(self, file_path: str) -> List[Dict]:
         """
         Process a PDF file and return its content in chunks
         """
         try:
-            # Load PDF
-            loader = PyPDFLoader(file_path)
-            pages = loader.load()
+            if self._is_large(file_path):
+                ranges = await self._map_page_ranges(_split_page_range, file_path)
+                return [chunk for chunks in ranges for chunk in chunks]
+            return await self._run(_load_and_split, file_path)
+        except Exception as e:
+            raise Exception(f"Error processing PDF: {str(e)}")
 
-            # Split text into chunks
-            chunks = self.text_splitter.split_documents(pages)
+    async def extract_text(self, file_path: str) -> str:
+        """
+        Extract raw text from PDF
+        """
+        try:
+            if self._is_large(file_path):
+                ranges = await self._map_page_ranges(_read_page_range, file_path)
+                return "\n".join(page["text"] for pages in ranges for page in pages)
+            return await self._run(_load_text, file_path)
+        except Exception as e:
+            raise Exception(f"Error extracting text from PDF: {str(e)}")
 
-            # Convert chunks to dictionary format
-            processed_chunks = []
-            for chunk in chunks:
-                processed_chunks.append({
-                    "content": chunk.page_content,
-                    "metadata": chunk.metadata
-                })
+    async def _iter_page_batches(self, func, file_path: str) -> AsyncIterator[List[Dict]]:
+        """Run func over consecutive page batches, one in flight per worker, yielding in page order"""
+        loop = asyncio.get_running_loop()
+        executor = self.executor or get_process_pool()
+        metadata, labels = await loop.run_in_executor(executor, _document_info, file_path)
+        batch = settings.PDF_STREAM_BATCH_PAGES
+        window = max(2, self._worker_count())
 
-            return processed_chunks
+        pending = deque()
+        for start in range(0, len(labels), batch):
+            pending.append(loop.run_in_executor(
+                executor, func, file_path, start, start + batch, metadata, labels[start:start + batch]
+            ))
+            if len(pending) >= window:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
 
+    async def iter_chunks(self, file_path: str) -> AsyncIterator[Dict]:
+        """
+        Stream chunks page batch by page batch, keeping memory independent of page count
+        """
+        try:
+            async for chunks in self._iter_page_batches(_split_page_range, file_path):
+                for chunk in chunks:
+                    yield chunk
         except Exception as e:
             raise Exception(f"Error processing PDF: {str(e)}")
 
-    async def extract_text(self, file_path: str) -> str:
+    async def iter_pages(self, file_path: str) -> AsyncIterator[Dict]:
         """
-        Extract raw text from PDF
+        Stream the raw text of each page in order
         """
         try:
-            loader = PyPDFLoader(file_path)
-            pages = loader.load()
-            return "\n".join([page.page_content for page in pages])
+            async for pages in self._iter_page_batches(_read_page_range, file_path):
+                for page in pages:
+                    yield {"page": page["metadata"]["page"], "text": page["text"]}
         except Exception as e:
-            raise Exception(f"Error extracting text from PDF: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error extracting text from PDF: {str(e)}")
@@ -0,0 +1,144 @@
+from __future__ import annotations
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence
+from app.core.config import settings
+from app.core.lazy import LazyModule
+
+np = LazyModule("numpy")  # imported on first analysis, not at startup
+
+
+def route_key(origin: str, destination: str) -> str:
+    return f"{origin.strip().upper()}-{destination.strip().upper()}"
+
+
+class PriceHistory:
+    """Bounded per-route history of the lowest USD price seen by each search"""
+
+    def __init__(self, maxlen: int = settings.PRICE_HISTORY_SIZE):
+        self.maxlen = maxlen
+        self._routes: Dict[str, Deque[float]] = {}
+
+    def record(self, route: str, price_usd: float) -> None:
+        samples = self._routes.get(route)
+        if samples is None:
+            samples = self._routes[route] = deque(maxlen=self.maxlen)
+        samples.append(float(price_usd))
+
+    def get(self, route: str) -> np.ndarray:
+        return np.fromiter(self._routes.get(route, ()), dtype=np.float64)
+
+
+class PriceAnalyzer:
+    """Local, vectorized statistics over one search's per-currency prices"""
+
+    def __init__(self, min_history: int = settings.PRICE_HISTORY_MIN_SAMPLES):
+        self.min_history = min_history
+
+    def analyze(
+        self,
+        prices: List[Dict],
+        history: Optional[Sequence[float]] = None,
+        history_stats: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Statistics over one search's prices. `history` holds earlier fares for
+        the route; `history_stats` is a comparison already made with
+        compare_history, e.g. by the search before it recorded its own fare,
+        and is used instead when given.
+        """
+        rows = [
+            p for p in prices
+            if p.get("currency") and (p.get("price_usd") is not None or p.get("currency") == "USD")
+        ]
+        if not rows:
+            return {
+                "best_value_currency": "Unknown",
+                "trend_analysis": "No prices to analyze",
+                "booking_recommendation": "Search again to compare prices across currencies",
+                "stats": None
+            }
+
+        currencies = np.array([p["currency"] for p in rows])
+        local = np.array([float(p.get("price") or 0) for p in rows])
+        usd = np.array([float(p["price_usd"] if p.get("price_usd") is not None else p["price"]) for p in rows])
+
+        best = int(np.argmin(usd))
+        best_usd = float(usd[best])
+        spread = float(usd.max() - best_usd)
+        p25, p50, p75 = (float(v) for v in np.percentile(usd, [25, 50, 75]))
+
+        usd_idx = np.flatnonzero(currencies == "USD")
+        usd_price = float(usd[usd_idx[0]]) if usd_idx.size else None
+        savings = (usd_price - usd) if usd_price is not None else np.full(usd.shape, np.nan)
+
+        order = np.argsort(usd, kind="stable")
+        stats = {
+            "best_value_currency": str(currencies[best]),
+            "best_price": float(local[best]),
+            "best_price_usd": round(best_usd, 2),
+            "spread_usd": round(spread, 2),
+            "spread_pct": round(spread / best_usd * 100, 2) if best_usd else 0.0,
+            "percentiles_usd": {"p25": round(p25, 2), "p50": round(p50, 2), "p75": round(p75, 2)},
+            "savings_vs_usd": round(float(savings[best]), 2) if usd_price is not None else None,
+            "savings_vs_usd_pct": round(float(savings[best]) / usd_price * 100, 2) if usd_price else None,
+            "currencies": [
+                {
+                    "currency": str(currencies[i]),
+                    "price": float(local[i]),
+                    "price_usd": round(float(usd[i]), 2),
+                    "savings_vs_usd": None if usd_price is None else round(float(savings[i]), 2)
+                }
+                for i in order
+            ],
+            "history": history_stats if history_stats is not None else self.compare_history(best_usd, history)
+        }
+
+        return {
+            "best_value_currency": stats["best_value_currency"],
+            "trend_analysis": self._describe_trend(stats),
+            "booking_recommendation": self._recommend(stats),
+            "stats": stats
+        }
+
+    def compare_history(self, best_usd: float, history: Optional[Sequence[float]]) -> Optional[Dict]:
+        """Where a fare falls among earlier fares for the route, or None with too little history"""
+        if history is None:
+            return None
+        samples = np.asarray(history, dtype=np.float64)
+        if samples.size < self.min_history:
+            return None
+        p10, p50, p90 = (float(v) for v in np.percentile(samples, [10, 50, 90]))
+        return {
+            "samples": int(samples.size),
+            "percentile_rank": round(float((samples < best_usd).mean() * 100), 1),
+            "p10": round(p10, 2),
+            "p50": round(p50, 2),
+            "p90": round(p90, 2)
+        }
+
+    def _describe_trend(self, stats: Dict) -> str:
+        text = (
+            f"{stats['best_value_currency']} is cheapest at ${stats['best_price_usd']:.2f}; "
+            f"prices span ${stats['spread_usd']:.2f} ({stats['spread_pct']:.1f}%) across currencies"
+        )
+        history = stats["history"]
+        if history:
+            text += f", and this fare is at the {history['percentile_rank']:.0f}th percentile of recent searches"
+        return text + "."
+
+    def _recommend(self, stats: Dict) -> str:
+        history = stats["history"]
+        if history is None:
+            advice = "Not enough recent searches of this route yet to tell whether fares are high or low"
+        elif history["percentile_rank"] <= 25:
+            advice = "Fares are lower than usual for this route; booking soon is recommended"
+        elif history["percentile_rank"] >= 75:
+            advice = "Fares are higher than usual for this route; consider waiting or flexible dates"
+        else:
+            advice = "Fares are in their usual range for this route"
+        if stats["savings_vs_usd"]:
+            advice += f". Paying in {stats['best_value_currency']} saves ${stats['savings_vs_usd']:.2f} versus USD"
+        return advice + "."
+
+
+price_history = PriceHistory()
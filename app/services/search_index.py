@@ -0,0 +1,261 @@
+from __future__ import annotations
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional
+from app.core.config import settings
+from app.core.lazy import LazyModule
+
+np = LazyModule("numpy")
+
+_TOKEN = re.compile(r"\w+")
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class DocumentIndex:
+    """
+    Inverted index over one document's chunks.
+
+    Postings are stored term by term in two flat arrays (chunk ids and term
+    frequencies); `offsets[i]:offsets[i + 1]` is the slice for `terms[i]`.
+    """
+
+    def __init__(self, terms: List[str], offsets: np.ndarray, chunk_ids: np.ndarray,
+                 frequencies: np.ndarray, lengths: np.ndarray, chunks: List[Dict]):
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.terms = terms
+        self.offsets = offsets
+        self.chunk_ids = chunk_ids
+        self.frequencies = frequencies
+        self.lengths = lengths
+        self.chunks = chunks
+
+    @classmethod
+    def build(cls, chunks: List[Dict]) -> "DocumentIndex":
+        postings: Dict[str, List[tuple]] = {}
+        lengths = np.zeros(len(chunks), dtype=np.int32)
+        for chunk_id, chunk in enumerate(chunks):
+            tokens = tokenize(chunk.get("content", ""))
+            lengths[chunk_id] = len(tokens)
+            for term, count in Counter(tokens).items():
+                postings.setdefault(term, []).append((chunk_id, count))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+        chunk_ids = np.empty(offsets[-1], dtype=np.int32)
+        frequencies = np.empty(offsets[-1], dtype=np.int32)
+        for i, term in enumerate(terms):
+            ids, counts = zip(*postings[term])
+            chunk_ids[offsets[i]:offsets[i + 1]] = ids
+            frequencies[offsets[i]:offsets[i + 1]] = counts
+        return cls(terms, offsets, chunk_ids, frequencies, lengths, chunks)
+
+    def postings(self, term: str):
+        i = self.term_ids.get(term)
+        if i is None:
+            return None
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.chunk_ids[start:end], self.frequencies[start:end]
+
+    def document_frequency(self, term: str) -> int:
+        i = self.term_ids.get(term)
+        return 0 if i is None else int(self.offsets[i + 1] - self.offsets[i])
+
+    def save(self, path: str) -> None:
+        # A unique temp file, so two uploads of the same document cannot interleave their writes
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                terms=np.array(self.terms, dtype=str),
+                offsets=self.offsets,
+                chunk_ids=self.chunk_ids,
+                frequencies=self.frequencies,
+                lengths=self.lengths,
+                chunks=np.frombuffer(json.dumps(self.chunks).encode("utf-8"), dtype=np.uint8)
+            )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DocumentIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["terms"].tolist(),
+                data["offsets"],
+                data["chunk_ids"],
+                data["frequencies"],
+                data["lengths"],
+                json.loads(data["chunks"].tobytes().decode("utf-8"))
+            )
+
+
+class SearchIndex:
+    """
+    BM25 search over the chunks of processed PDFs, keyed by content SHA-256.
+
+    Each document has its own array-backed postings; corpus statistics are
+    combined across the documents being searched at query time. At most
+    `max_documents` are kept in memory (least recently used are evicted);
+    when `directory` is set every document is also written there and is
+    reloaded on demand after eviction. Like the PDF cache, the directory
+    drops its least recently used files once it exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory: Optional[str] = settings.PDF_INDEX_DIR,
+                 max_documents: int = settings.PDF_INDEX_MAX_DOCUMENTS,
+                 max_bytes: int = settings.PDF_INDEX_MAX_BYTES):
+        self.directory = directory
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self._documents: "OrderedDict[str, DocumentIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path_for(self, doc_id: str) -> Optional[str]:
+        if not _DIGEST.match(doc_id):
+            raise ValueError("Invalid document id")
+        return os.path.join(self.directory, f"{doc_id}.npz") if self.directory else None
+
+    def _keep(self, doc_id: str, document: DocumentIndex) -> None:
+        with self._lock:
+            self._documents[doc_id] = document
+            self._documents.move_to_end(doc_id)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+
+    def add(self, doc_id: str, chunks: List[Dict]) -> None:
+        """Index a document's chunks, replacing any previous version"""
+        path = self._path_for(doc_id)
+        document = DocumentIndex.build(chunks)
+        if path:
+            os.makedirs(self.directory, exist_ok=True)
+            document.save(path)
+            self._evict_files()
+        self._keep(doc_id, document)
+
+    def _evict_files(self) -> None:
+        """Remove least recently used persisted indexes until the directory fits in max_bytes"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".npz"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get(self, doc_id: str) -> Optional[DocumentIndex]:
+        """Return a document's index, loading it from disk if it was evicted from memory"""
+        path = self._path_for(doc_id)
+        with self._lock:
+            document = self._documents.get(doc_id)
+            if document is not None:
+                self._documents.move_to_end(doc_id)
+                return document
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+            document = DocumentIndex.load(path)
+        except FileNotFoundError:  # evicted in between
+            return None
+        self._keep(doc_id, document)
+        return document
+
+    def contains(self, doc_id: str) -> bool:
+        path = self._path_for(doc_id)
+        return doc_id in self._documents or bool(path and os.path.exists(path))
+
+    def evict(self, doc_id: str, purge: bool = False) -> bool:
+        """Drop a document from memory, and from disk too when purge is set"""
+        path = self._path_for(doc_id)
+        with self._lock:
+            found = self._documents.pop(doc_id, None) is not None
+        if purge and path and os.path.exists(path):
+            os.remove(path)
+            found = True
+        return found
+
+    def in_memory(self) -> List[str]:
+        with self._lock:
+            return list(self._documents)
+
+    def search(self, query: str, k: int = 10, doc_ids: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Return the top-k chunks for query, best first. Searches the given
+        documents, or every document currently in memory.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        ids = list(doc_ids) if doc_ids is not None else self.in_memory()
+        documents = [(doc_id, doc) for doc_id in ids if (doc := self.get(doc_id)) is not None]
+        if not terms or not documents or k <= 0:
+            return []
+
+        total_chunks = sum(len(doc.lengths) for _, doc in documents)
+        if total_chunks == 0:
+            return []
+        average_length = sum(int(doc.lengths.sum()) for _, doc in documents) / total_chunks or 1.0
+        idf = {}
+        for term in terms:
+            df = sum(doc.document_frequency(term) for _, doc in documents)
+            idf[term] = math.log(1 + (total_chunks - df + 0.5) / (df + 0.5))
+
+        candidates = []
+        for doc_id, doc in documents:
+            scores = np.zeros(len(doc.lengths), dtype=np.float64)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc.lengths / average_length)
+            matched = False
+            for term in terms:
+                postings = doc.postings(term)
+                if postings is None:
+                    continue
+                chunk_ids, frequencies = postings
+                scores[chunk_ids] += idf[term] * frequencies * (BM25_K1 + 1) / (frequencies + norm[chunk_ids])
+                matched = True
+            if not matched:
+                continue
+            top = np.flatnonzero(scores)
+            if len(top) > k:
+                top = top[np.argpartition(scores[top], -k)[-k:]]
+            candidates.extend((float(scores[i]), doc_id, int(i), doc) for i in top)
+
+        best = heapq.nlargest(k, candidates, key=lambda c: (c[0], -c[2]))
+        return [
+            {
+                "doc_id": doc_id,
+                "score": round(score, 4),
+                "content": doc.chunks[chunk_id].get("content", ""),
+                "metadata": doc.chunks[chunk_id].get("metadata", {})
+            }
+            for score, doc_id, chunk_id, doc in best
+        ]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            documents = list(self._documents.values())
+        return {
+            "documents_in_memory": len(documents),
+            "chunks_in_memory": sum(len(doc.lengths) for doc in documents),
+            "max_documents": self.max_documents
+        }
@@ -0,0 +1,87 @@
+import asyncio
+from typing import Dict, Optional
+from app.core.config import settings
+
+
+class SearchDeadlineError(Exception):
+    """Raised when flight prices are not ready before the overall deadline"""
+
+
+class SearchService:
+    """
+    Runs a flight search and its AI sections as one request.
+
+    compare_prices and get_destination_insights start together; the price
+    analysis and recommendations start as soon as prices are ready. Every
+    AI section shares one overall deadline and is returned as None if it
+    misses it.
+    """
+
+    def __init__(self, flight_service, ai_service, deadline: float = settings.SEARCH_DEADLINE):
+        self.flight_service = flight_service
+        self.ai_service = ai_service
+        self.deadline = deadline
+
+    async def search_with_insights(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: str,
+        adults: int = 1,
+        deadline: Optional[float] = None
+    ) -> Dict:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline_at = started + (deadline or self.deadline)
+
+        prices_task = asyncio.create_task(
+            self.flight_service.compare_prices(origin, destination, departure_date, adults)
+        )
+        sections = {
+            "destination": asyncio.create_task(self.ai_service.get_destination_insights(destination))
+        }
+
+        try:
+            flights = await asyncio.wait_for(prices_task, timeout=max(deadline_at - loop.time(), 0))
+        except asyncio.TimeoutError:
+            sections["destination"].cancel()
+            raise SearchDeadlineError("Flight search did not finish before the deadline")
+        except Exception:
+            sections["destination"].cancel()
+            raise
+
+        if "error" not in flights:
+            search_data = {
+                "origin": origin,
+                "destination": destination,
+                "departure_date": departure_date,
+                "passengers": adults,
+                "lowest_price_usd": flights.get("lowest_price_usd")
+            }
+            sections["recommendations"] = asyncio.create_task(
+                self.ai_service.get_travel_recommendations(search_data)
+            )
+            sections["price_analysis"] = asyncio.create_task(
+                self.ai_service.analyze_search(flights)
+            )
+
+        remaining = deadline_at - loop.time()
+        if remaining > 0:
+            await asyncio.wait(sections.values(), timeout=remaining)
+
+        insights = {}
+        incomplete = []
+        for name, task in sections.items():
+            if task.done() and not task.cancelled() and task.exception() is None:
+                insights[name] = task.result()
+            else:
+                task.cancel()
+                insights[name] = None
+                incomplete.append(name)
+
+        return {
+            "flights": flights,
+            "insights": insights,
+            "incomplete_sections": incomplete,
+            "elapsed_ms": round((loop.time() - started) * 1000, 1)
+        }
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the API process.
+
+Imports `app.main` in fresh interpreters under `-X importtime`. It reports
+the median total and the slowest top-level packages, and fails when the
+median exceeds the budget or a deferred dependency is imported eagerly.
+
+    python benchmarks/bench_import_time.py --runs 5 --budget-ms 1200
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use only; importing app.main must not pull these in
+DEFERRED = ("groq", "langchain", "langchain_community", "langchain_text_splitters", "pypdf", "numpy", "requests")
+
+CHECK_DEFERRED = (
+    "import sys, app.main; "
+    f"print(','.join(m for m in {DEFERRED!r} if m in sys.modules))"
+)
+
+
+def parse_importtime(stderr: str) -> Tuple[int, Dict[str, int]]:
+    """Return (total microseconds for app.main, microseconds of each package's outermost import)"""
+    total = 0
+    packages: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if name == "app.main":
+            total = int(cumulative)
+        elif not name.startswith("app"):
+            top = name.split(".")[0]
+            packages[top] = max(packages.get(top, 0), int(cumulative))
+    return total, packages
+
+
+def measure() -> Tuple[int, Dict[str, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+
+def eager_deferred_imports() -> List[str]:
+    result = subprocess.run([sys.executable, "-c", CHECK_DEFERRED], cwd=ROOT, capture_output=True, text=True, check=True)
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1200.0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    median_ms = statistics.median(total for total, _ in runs) / 1000
+    packages = runs[-1][1]
+
+    print(f"import app.main: median {median_ms:.0f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print(f"{'package':<28} {'ms':>8}")
+    for name, micros in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<28} {micros / 1000:>8.1f}")
+
+    failed = False
+    eager = eager_deferred_imports()
+    if eager:
+        print(f"FAIL: imported at startup but should be deferred: {', '.join(eager)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"FAIL: {median_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Cold and warm invocation latency for the Netlify function handler.
+
+Each cold run starts a fresh interpreter, imports netlify/functions/api.py
+and invokes the handler once, then invokes it --warm more times in the
+same process the way a warm container would. With --fake-upstream the
+Amadeus and exchange-rate APIs are answered locally and upstream calls are
+counted, which shows token, FX and result reuse without credentials.
+In that mode httpx is imported before the handler, so the cold import
+figure excludes it.
+
+    python benchmarks/bench_netlify_handler.py --fake-upstream --cold 5 --warm 20
+    python benchmarks/bench_netlify_handler.py --fake-upstream --distinct   # defeat the result cache
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import types
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTIONS_DIR = os.path.join(ROOT, "netlify", "functions")
+
+upstream_calls = Counter()
+
+FAKE_OFFER = {
+    "itineraries": [{"segments": [{
+        "departure": {"iataCode": "JFK", "at": "2026-12-01T08:00:00"},
+        "arrival": {"iataCode": "LAX", "at": "2026-12-01T11:30:00"},
+        "carrierCode": "AA", "number": "100", "aircraft": {"code": "321"}
+    }]}],
+    "price": {"total": "199.00", "currency": "USD"},
+    "travelerPricings": []
+}
+
+
+def install_fake_upstream() -> None:
+    """Answer Amadeus and exchange-rate requests locally, counting each call"""
+    import httpx
+
+    def amadeus(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/oauth2/token"):
+            upstream_calls["token"] += 1
+            return httpx.Response(200, json={"access_token": "fake", "expires_in": 1799})
+        upstream_calls["offers"] += 1
+        return httpx.Response(200, json={"data": [FAKE_OFFER]})
+
+    class FakeAsyncClient(httpx.AsyncClient):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = httpx.MockTransport(amadeus)
+            super().__init__(*args, **kwargs)
+
+    httpx.AsyncClient = FakeAsyncClient
+
+    def fake_get(url, *args, **kwargs):
+        upstream_calls["fx"] += 1
+        rates = {"USD": 1.0, "EUR": 0.92, "GBP": 0.79, "CAD": 1.36, "AUD": 1.52}
+        return types.SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"rates": rates})
+
+    sys.modules["requests"] = types.SimpleNamespace(get=fake_get)
+
+
+def search_event(day_offset: int) -> dict:
+    date = (datetime.date(2026, 12, 1) + datetime.timedelta(days=day_offset)).isoformat()
+    return {
+        "path": "/api/flights/search",
+        "httpMethod": "GET",
+        "queryStringParameters": {"origin": "JFK", "destination": "LAX", "departure_date": date}
+    }
+
+
+def invoke(api, event: dict) -> float:
+    started = time.perf_counter()
+    response = asyncio.run(api.handler(event, None))
+    elapsed = (time.perf_counter() - started) * 1000
+    if response["statusCode"] != 200:
+        raise SystemExit(f"handler returned {response['statusCode']}: {response['body'][:200]}")
+    return elapsed
+
+
+def child(args) -> None:
+    if args.fake_upstream:
+        install_fake_upstream()
+    sys.path.insert(0, FUNCTIONS_DIR)
+
+    started = time.perf_counter()
+    import api
+    import_ms = (time.perf_counter() - started) * 1000
+
+    first_ms = invoke(api, search_event(0))
+    first_calls = dict(upstream_calls)
+    upstream_calls.clear()
+    warm_ms = [invoke(api, search_event(i + 1 if args.distinct else 0)) for i in range(args.warm)]
+    print(json.dumps({
+        "import_ms": import_ms,
+        "first_ms": first_ms,
+        "warm_ms": warm_ms,
+        "first_calls": first_calls,
+        "warm_calls": dict(upstream_calls)
+    }))
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cold", type=int, default=5, help="fresh processes to start")
+    parser.add_argument("--warm", type=int, default=20, help="warm invocations per process")
+    parser.add_argument("--distinct", action="store_true", help="use a new departure date for every warm invocation")
+    parser.add_argument("--fake-upstream", action="store_true", help="answer upstream APIs locally")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    command = [sys.executable, os.path.abspath(__file__), "--child", "--warm", str(args.warm)]
+    command += ["--distinct"] * args.distinct + ["--fake-upstream"] * args.fake_upstream
+    runs = []
+    for _ in range(args.cold):
+        output = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    warm = [ms for run in runs for ms in run["warm_ms"]]
+    print(f"cold import      p50 {statistics.median(r['import_ms'] for r in runs):8.1f} ms")
+    print(f"cold invocation  p50 {statistics.median(r['first_ms'] for r in runs):8.1f} ms")
+    if warm:
+        print(f"warm invocation  p50 {percentile(warm, 0.5):8.1f} ms   p95 {percentile(warm, 0.95):8.1f} ms")
+    if args.fake_upstream:
+        print(f"upstream calls, cold invocation:  {runs[-1]['first_calls']}")
+        print(f"upstream calls, {args.warm} warm invocations: {runs[-1]['warm_calls']}")
+
+
+if __name__ == "__main__":
+    main()
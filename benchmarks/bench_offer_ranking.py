@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Time Pareto-front and weighted-score ranking against the number of offers.
+
+Offers are random but realistic (price, elapsed minutes, stops, checked
+bags), so the front has the usual tens of members. Each size is checked
+against a brute-force O(n^2) front once.
+
+    python benchmarks/bench_offer_ranking.py --offers 100 250 500 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.offer_ranking import cost_matrix, pareto_front, parse_weights, weighted_scores  # noqa: E402
+
+
+def make_costs(n: int, rng: np.random.Generator) -> np.ndarray:
+    stops = rng.integers(0, 3, n)
+    duration = 300 + stops * rng.integers(60, 240, n) + rng.integers(0, 60, n)
+    price = 400 - 40 * stops + rng.normal(0, 60, n).round(2)
+    bags = rng.integers(0, 3, n)
+    return cost_matrix(price, duration.astype(float), stops, bags)
+
+
+def brute_force_front(costs: np.ndarray) -> np.ndarray:
+    dominated = np.all(costs[:, None, :] <= costs[None, :, :], axis=2) & np.any(costs[:, None, :] < costs[None, :, :], axis=2)
+    return ~dominated.any(axis=0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--offers", type=int, nargs="+", default=[100, 250, 500, 1000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    weights = parse_weights(None)
+    print(f"{'offers':>7} {'front':>6} {'pareto ms':>10} {'score+sort ms':>14}")
+    for n in args.offers:
+        costs = make_costs(n, rng)
+        front = pareto_front(costs)
+        assert np.array_equal(front, brute_force_front(costs)), "front differs from brute force"
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            pareto_front(costs)
+        pareto_ms = (time.perf_counter() - started) * 1000 / args.repeat
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            np.lexsort((costs[:, 0], weighted_scores(costs, weights)))
+        score_ms = (time.perf_counter() - started) * 1000 / args.repeat
+        print(f"{n:>7} {int(front.sum()):>6} {pareto_ms:>10.3f} {score_ms:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark parallel page-range PDF extraction against worker count.
+
+Generates a synthetic text PDF, processes it with 1..N pool workers and
+reports throughput and speedup relative to a single worker. Every run is
+checked against the chunks of the PyPDFLoader path used for small files.
+
+    python benchmarks/bench_pdf_extract.py --pages 500 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.pdf_service import PDFService, _load_and_split  # noqa: E402
+from tests.conftest import write_text_pdf  # noqa: E402
+
+
+def make_document(path: str, pages: int) -> None:
+    write_text_pdf(path, [
+        "\n".join(
+            f"Page {page} fare rule {line}: changes permitted up to 24 hours before departure for {line * 5} USD."
+            for line in range(60)
+        )
+        for page in range(pages)
+    ])
+
+
+async def run(service: PDFService, file_path: str, repeat: int) -> Tuple[float, List[Dict]]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = await service.process_pdf(file_path)
+        best = min(best, time.perf_counter() - started)
+    return best, chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "manifest.pdf")
+        make_document(file_path, args.pages)
+        size_mb = os.path.getsize(file_path) / 1048576
+        expected = _load_and_split(file_path)
+
+        # Force the page-range path regardless of file size
+        from app.core.config import settings
+        settings.PDF_PARALLEL_MIN_BYTES = 0
+
+        print(f"{args.pages} pages, {size_mb:.1f} MB, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'seconds':>9} {'pages/s':>9} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                service = PDFService(executor=executor, workers=workers)
+                asyncio.run(run(service, file_path, 1))  # warm up the workers
+                seconds, chunks = asyncio.run(run(service, file_path, args.repeat))
+            assert chunks == expected, "chunks differ from the PyPDFLoader output"
+            baseline = baseline or seconds
+            print(f"{workers:>8} {seconds:>9.3f} {args.pages / seconds:>9.1f} {baseline / seconds:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Compare parsing a flight-offers body in one piece with streaming it.
+
+"whole" is the old path: json.loads of the full body, then min() over the
+offers, keeping every raw offer. "stream" feeds the body to
+JSONArrayStream in network-sized chunks, keeps a running minimum and
+compacts each offer as it completes, stopping at the end of the data
+array. Peak memory is measured with tracemalloc and includes the body.
+
+"total ms" is all the parsing CPU for a body. "after last byte ms" is the
+part of it left once the final chunk has arrived, i.e. how long the answer
+still takes when the body trickles in over the network: the whole path
+starts parsing only then, the stream path has one chunk left to finish.
+
+    python benchmarks/bench_stream_parse.py --offers 50 250 --adults 1 4
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.json_stream import JSONArrayStream  # noqa: E402
+from app.services.flight_service import compact_offer  # noqa: E402
+
+
+def make_offer(i: int, adults: int, rng: random.Random) -> dict:
+    segments = [{
+        "id": str(n),
+        "departure": {"iataCode": "JFK", "terminal": "4", "at": "2025-12-01T08:00:00"},
+        "arrival": {"iataCode": "LAX", "terminal": "5", "at": "2025-12-01T11:00:00"},
+        "carrierCode": "AA", "number": str(100 + i), "aircraft": {"code": "321"},
+        "operating": {"carrierCode": "AA"}, "duration": "PT6H", "numberOfStops": 0,
+        "blacklistedInEU": False, "co2Emissions": [{"weight": 180, "weightUnit": "KG", "cabin": "ECONOMY"}]
+    } for n in range(1, rng.randint(2, 4))]
+    total = f"{rng.uniform(200, 900):.2f}"
+    fares = [{
+        "segmentId": segment["id"], "cabin": "ECONOMY", "fareBasis": "QH7AUPEN", "brandedFare": "MAIN",
+        "class": "Q", "includedCheckedBags": {"quantity": 1},
+        "amenities": [{"description": "SNACK", "isChargeable": False, "amenityType": "MEAL"}]
+    } for segment in segments]
+    return {
+        "type": "flight-offer", "id": str(i), "source": "GDS", "instantTicketingRequired": False,
+        "nonHomogeneous": False, "oneWay": False, "lastTicketingDate": "2025-11-20", "numberOfBookableSeats": 9,
+        "itineraries": [{"duration": "PT6H", "segments": segments}],
+        "price": {"currency": "USD", "total": total, "base": total, "fees": [{"amount": "0.00", "type": "SUPPLIER"}], "grandTotal": total},
+        "pricingOptions": {"fareType": ["PUBLISHED"], "includedCheckedBagsOnly": True},
+        "validatingAirlineCodes": ["AA"],
+        "travelerPricings": [{
+            "travelerId": str(t), "fareOption": "STANDARD", "travelerType": "ADULT",
+            "price": {"currency": "USD", "total": total, "base": total}, "fareDetailsBySegment": fares
+        } for t in range(1, adults + 1)]
+    }
+
+
+def make_body(offers: int, adults: int) -> bytes:
+    rng = random.Random(42)
+    return json.dumps({
+        "meta": {"count": offers},
+        "data": [make_offer(i, adults, rng) for i in range(offers)],
+        "dictionaries": {"locations": {f"X{i:02d}": {"cityCode": "XXX", "countryCode": "US"} for i in range(100)}}
+    }, indent=1).encode()
+
+
+def whole(body: bytes, chunk: int):
+    chunks = [body[i:i + chunk] for i in range(0, len(body), chunk)]
+    last_byte = time.perf_counter()
+    joined = b"".join(chunks)
+    del chunks
+    data = json.loads(joined)
+    cheapest = min(data["data"], key=lambda offer: float(offer["price"]["total"]))
+    return cheapest, data["data"], time.perf_counter() - last_byte
+
+
+def stream(body: bytes, chunk: int):
+    parser = JSONArrayStream("data")
+    cheapest, cheapest_price, offers = None, float("inf"), []
+
+    def add(completed):
+        nonlocal cheapest, cheapest_price
+        for offer in completed:
+            price = float(offer["price"]["total"])
+            if price < cheapest_price:
+                cheapest, cheapest_price = offer, price
+            offers.append(compact_offer(offer))
+
+    last_byte = time.perf_counter()
+    for start in range(0, len(body), chunk):
+        last_byte = time.perf_counter()
+        add(parser.feed(body[start:start + chunk]))
+        if parser.done:
+            break
+    add(parser.close())
+    return cheapest, offers, time.perf_counter() - last_byte
+
+
+def measure(fn, body: bytes, chunk: int, repeat: int):
+    tracemalloc.start()
+    result = fn(body, chunk)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    after_last_byte = 0.0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        after_last_byte += fn(body, chunk)[2]
+    total = time.perf_counter() - started
+    return result, total * 1000 / repeat, after_last_byte * 1000 / repeat, peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--offers", type=int, nargs="+", default=[50, 250])
+    parser.add_argument("--adults", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--chunk", type=int, default=16384, help="bytes per network read")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'':>23} {'total ms':>17} {'after last byte ms':>19} {'peak KB':>17}")
+    print(f"{'offers':>7} {'adults':>6} {'body KB':>8} {'whole':>8} {'stream':>8} {'whole':>9} {'stream':>9} {'whole':>8} {'stream':>8}")
+    for n in args.offers:
+        for adults in args.adults:
+            body = make_body(n, adults)
+            (cheapest, _, _), whole_ms, whole_tail, whole_peak = measure(whole, body, args.chunk, args.repeat)
+            (streamed, _, _), stream_ms, stream_tail, stream_peak = measure(stream, body, args.chunk, args.repeat)
+            assert streamed == cheapest, "streamed cheapest offer differs"
+            print(f"{n:>7} {adults:>6} {len(body) / 1024:>8.0f} {whole_ms:>8.2f} {stream_ms:>8.2f} "
+                  f"{whole_tail:>9.2f} {stream_tail:>9.2f} {whole_peak:>8.0f} {stream_peak:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,13 @@
-from groq import AsyncGroq
 from typing import Dict, List, Optional
 from config import settings
+from groq_client import get_groq_client
 import json
 from datetime import datetime, timedelta
 
 class AIService:
     def __init__(self):
         self.api_key = settings.GROQ_API_KEY
-        self.client = AsyncGroq(api_key=self.api_key) if self.api_key else None
+        self.client = get_groq_client(self.api_key) if self.api_key else None
 
     def _validate_json_response(self, content: str) -> bool:
         """Validate if the response content is valid JSON format"""
@@ -100,9 +100,9 @@ class AIService:
             }
 
     async def get_destination_insights(self, destination: str) -> Dict:
-        """Get AI insights about a destination"""
+        """Get AI insights about a destination; canned answers are marked with "fallback": True"""
         if not self.api_key:
-            return {"insights": "Destination insights require Groq API key"}
+            return {"insights": "Destination insights require Groq API key", "fallback": True}
 
         try:
             prompt = f"""
@@ -129,7 +129,8 @@ class AIService:
                     "best_time_to_visit": "Check local weather and events",
                     "attractions": ["Local sightseeing", "Cultural experiences"],
                     "travel_tips": ["Research visa requirements", "Check local customs"],
-                    "transportation": ["Airport taxis", "Public transport", "Ride-sharing services"]
+                    "transportation": ["Airport taxis", "Public transport", "Ride-sharing services"],
+                    "fallback": True
                 }
             return json.loads(content)
 
@@ -138,7 +139,8 @@ class AIService:
                 "best_time_to_visit": "Check local weather and events",
                 "attractions": ["Local sightseeing", "Cultural experiences"],
                 "travel_tips": ["Research visa requirements", "Check local customs"],
-                "transportation": ["Airport taxis", "Public transport", "Ride-sharing services"]
+                "transportation": ["Airport taxis", "Public transport", "Ride-sharing services"],
+                "fallback": True
             }
 
     async def process_natural_language_query(self, query: str) -> Dict:
@@ -1,15 +1,60 @@
 import json
-import asyncio
-from flight_service import FlightService
-from ai_service import AIService
+import base64
+import logging
 import datetime
+from config import settings
+from compression import compress_bytes, is_compressible, negotiate
+from state import WarmCache
+from search_service import SearchService, SearchDeadlineError
 
-flight_service = FlightService()
-ai_service = AIService()
+logger = logging.getLogger(__name__)
+
+# Module-level state survives warm invocations. Services are built on first
+# use so a cold start only imports what the requested route needs.
+_services = {}
+hot_results = WarmCache("results", maxsize=128)
+
+def get_flight_service():
+    if "flight" not in _services:
+        from flight_service import FlightService
+        _services["flight"] = FlightService()
+    return _services["flight"]
+
+def get_ai_service():
+    if "ai" not in _services:
+        from ai_service import AIService
+        _services["ai"] = AIService()
+    return _services["ai"]
+
+def get_search_service():
+    if "search" not in _services:
+        _services["search"] = SearchService(get_flight_service(), get_ai_service())
+    return _services["search"]
+
+def result_key(*parts) -> str:
+    return json.dumps(parts)
+
+def compress_response(response, accept_encoding):
+    """Compress a JSON response body with the negotiated coding; Netlify expects binary bodies base64-encoded"""
+    body = response.get('body') or ''
+    headers = response.setdefault('headers', {})
+    encoding = negotiate(accept_encoding)
+    if encoding is None or len(body) < settings.COMPRESSION_MIN_SIZE or not is_compressible(headers.get('Content-Type')):
+        return response
+    headers['Content-Encoding'] = encoding
+    headers['Vary'] = 'Accept-Encoding'
+    response['body'] = base64.b64encode(compress_bytes(body.encode('utf-8'), encoding)).decode('ascii')
+    response['isBase64Encoded'] = True
+    return response
 
 async def handler(event, context):
     """Main Netlify Function handler"""
-    print(f"Handler called with path: {event.get('path', '')}, method: {event.get('httpMethod', 'GET')}")
+    response = await route(event)
+    request_headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    return compress_response(response, request_headers.get('accept-encoding'))
+
+async def route(event):
+    """Dispatch a request to its endpoint handler"""
     try:
         # Get the path and method
         path = event.get('path', '')
@@ -35,10 +80,10 @@ async def handler(event, context):
                 }
 
         # Route to appropriate handler
-        print(f"Routing path: {path}, method: {http_method}")
         if path == '/flights/search' and http_method == 'GET':
-            print("Calling handle_flight_search")
             return await handle_flight_search(query_params)
+        elif path == '/search' and http_method == 'GET':
+            return await handle_search_with_insights(query_params)
         elif path == '/ai/recommendations' and http_method == 'POST':
             return await handle_recommendations(body)
         elif path == '/ai/analyze-prices' and http_method == 'POST':
@@ -56,9 +101,7 @@ async def handler(event, context):
             }
 
     except Exception as e:
-        print(f"Exception in handler: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Unhandled error for %s %s", event.get('httpMethod', 'GET'), event.get('path', ''))
         return {
             'statusCode': 500,
             'headers': {'Content-Type': 'application/json'},
@@ -67,13 +110,11 @@ async def handler(event, context):
 
 async def handle_flight_search(query_params):
     """Handle flight search requests"""
-    print(f"handle_flight_search called with params: {query_params}")
     try:
         origin = query_params.get('origin')
         destination = query_params.get('destination')
         departure_date = query_params.get('departure_date')
         adults = int(query_params.get('adults', 1))
-        print(f"Parsed params: origin={origin}, dest={destination}, date={departure_date}, adults={adults}")
 
         if not all([origin, destination, departure_date]):
             return {
@@ -92,15 +133,63 @@ async def handle_flight_search(query_params):
                 'body': json.dumps({'error': 'Invalid date format. Use YYYY-MM-DD'})
             }
 
-        print("Calling flight_service.compare_prices")
-        result = await flight_service.compare_prices(origin, destination, departure_date, adults)
-        print(f"compare_prices returned: {result}")
+        key = result_key("flights", origin.upper(), destination.upper(), departure_date, adults)
+        body = hot_results.get(key)
+        if body is None:
+            result = await get_flight_service().compare_prices(origin, destination, departure_date, adults)
+            body = json.dumps(result)
+            if "error" not in result:
+                hot_results.set(key, body, ttl=settings.RESULT_CACHE_TTL)
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/json'},
+            'body': body
+        }
+
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({'error': f'Error searching flights: {str(e)}'})
+        }
+
+async def handle_search_with_insights(query_params):
+    """Handle combined flight search plus AI insights requests"""
+    try:
+        origin = query_params.get('origin')
+        destination = query_params.get('destination')
+        departure_date = query_params.get('departure_date')
+        adults = int(query_params.get('adults', 1))
+
+        if not all([origin, destination, departure_date]):
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': 'Missing required parameters: origin, destination, departure_date'})
+            }
+
+        try:
+            datetime.datetime.strptime(departure_date, "%Y-%m-%d")
+        except ValueError:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': 'Invalid date format. Use YYYY-MM-DD'})
+            }
+
+        result = await get_search_service().search_with_insights(origin, destination, departure_date, adults)
         return {
             'statusCode': 200,
             'headers': {'Content-Type': 'application/json'},
             'body': json.dumps(result)
         }
 
+    except SearchDeadlineError as e:
+        return {
+            'statusCode': 504,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({'error': str(e)})
+        }
     except Exception as e:
         return {
             'statusCode': 500,
@@ -119,7 +208,7 @@ async def handle_recommendations(body):
                 'body': json.dumps({'error': 'search_data is required'})
             }
 
-        recommendations = await ai_service.get_travel_recommendations(search_data)
+        recommendations = await get_ai_service().get_travel_recommendations(search_data)
         return {
             'statusCode': 200,
             'headers': {'Content-Type': 'application/json'},
@@ -144,7 +233,7 @@ async def handle_price_analysis(body):
                 'body': json.dumps({'error': 'prices array is required'})
             }
 
-        analysis = await ai_service.analyze_price_trends(prices)
+        analysis = await get_ai_service().analyze_price_trends(prices)
         return {
             'statusCode': 200,
             'headers': {'Content-Type': 'application/json'},
@@ -168,11 +257,18 @@ async def handle_destination_insights(destination):
                 'body': json.dumps({'error': 'Destination is required'})
             }
 
-        insights = await ai_service.get_destination_insights(destination)
+        key = result_key("insights", destination.upper())
+        body = hot_results.get(key)
+        if body is None:
+            insights = await get_ai_service().get_destination_insights(destination)
+            body = json.dumps(insights)
+            # Only real model output is worth keeping; a canned answer would pin one Groq failure
+            if not insights.get("fallback"):
+                hot_results.set(key, body, ttl=settings.RESULT_CACHE_TTL)
         return {
             'statusCode': 200,
             'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps(insights)
+            'body': body
         }
 
     except Exception as e:
@@ -193,7 +289,7 @@ async def handle_parse_query(body):
                 'body': json.dumps({'error': 'Query is required'})
             }
 
-        result = await ai_service.process_natural_language_query(query)
+        result = await get_ai_service().process_natural_language_query(query)
         return {
             'statusCode': 200,
             'headers': {'Content-Type': 'application/json'},
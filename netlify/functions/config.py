@@ -9,14 +9,31 @@ class Settings:
     # Amadeus API Configuration
     AMADEUS_API_KEY: Optional[str] = os.environ.get("AMADEUS_API_KEY")
     AMADEUS_API_SECRET: Optional[str] = os.environ.get("AMADEUS_API_SECRET")
+    AMADEUS_TOKEN_MARGIN: int = int(os.environ.get("AMADEUS_TOKEN_MARGIN", 60))
+    FX_RATES_TTL: int = int(os.environ.get("FX_RATES_TTL", 3600))
+
+    # Warm-container state: hot results are reused for RESULT_CACHE_TTL seconds,
+    # and STATE_DIR (e.g. /tmp/flight-api-state) also persists caches to disk
+    RESULT_CACHE_TTL: int = int(os.environ.get("RESULT_CACHE_TTL", 300))
+    STATE_DIR: str = os.environ.get("STATE_DIR", "")
 
     # AI API Configuration
     GROQ_API_KEY: Optional[str] = os.environ.get("GROQ_API_KEY")
+    GROQ_MAX_CONCURRENCY: int = int(os.environ.get("GROQ_MAX_CONCURRENCY", 4))
+    GROQ_MAX_QUEUE: int = int(os.environ.get("GROQ_MAX_QUEUE", 16))
+    GROQ_TIMEOUT: float = float(os.environ.get("GROQ_TIMEOUT", 8.0))  # stays inside the function time limit
+    GROQ_MAX_RETRIES: int = int(os.environ.get("GROQ_MAX_RETRIES", 1))
+
+    # Combined search-plus-insights deadline, kept under the function time limit
+    SEARCH_DEADLINE: float = float(os.environ.get("SEARCH_DEADLINE", 8.0))
 
     # PDF Processing Configuration (keeping for now, will remove later)
     UPLOAD_DIR: str = os.path.join("app", "uploads")
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB in bytes
 
+    # Response compression (zstd, br or gzip, negotiated per request)
+    COMPRESSION_MIN_SIZE: int = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+
     # Frontend API Configuration
     API_BASE_URL: str = ""
 
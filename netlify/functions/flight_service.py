@@ -1,19 +1,62 @@
 import httpx
-import requests
+import logging
+import re
 from typing import List, Dict, Optional
 from config import settings
+from lazy import LazyModule
+from state import WarmCache
 import datetime
 
+logger = logging.getLogger(__name__)
+requests = LazyModule("requests")
+
+_ISO_DURATION = re.compile(r"^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:\d+S)?)?$")
+
+
+def iso_duration_minutes(value: Optional[str]) -> Optional[int]:
+    """Minutes in an Amadeus ISO 8601 duration such as PT5H30M or P1DT2H"""
+    match = _ISO_DURATION.match(value or "")
+    if not value or not match:
+        return None
+    days, hours, minutes = (int(part or 0) for part in match.groups())
+    return days * 1440 + hours * 60 + minutes
+
+
+def minutes_between(start: str, end: str) -> int:
+    delta = datetime.datetime.fromisoformat(end) - datetime.datetime.fromisoformat(start)
+    return int(delta.total_seconds() // 60)
+
+
+def _endpoint(point: Dict) -> Dict:
+    return {"airport": point["iataCode"], "terminal": point.get("terminal"), "time": point["at"]}
+
+
+def _trip_type(itineraries: List[Dict]) -> str:
+    # This function only runs one-way searches; without the airport table a return
+    # counts as a round trip only when it ends at the outbound origin airport
+    if len(itineraries) == 1:
+        return "one_way"
+    if len(itineraries) == 2 and itineraries[1]["arrival"]["airport"] == itineraries[0]["departure"]["airport"]:
+        return "round_trip"
+    return "multi_city"
+
+
 class FlightService:
     def __init__(self):
         self.api_key = settings.AMADEUS_API_KEY
         self.api_secret = settings.AMADEUS_API_SECRET
         self.base_url = "https://test.api.amadeus.com"
         self.currencies = ["USD", "EUR", "GBP", "CAD", "AUD"]  # Common currencies to compare
+        # Kept for the life of the container instead of fetched on every invocation
+        self._tokens = WarmCache("tokens", maxsize=1)
+        self._fx_rates = WarmCache("fx_rates", maxsize=8)
 
     async def get_access_token(self) -> str:
-        """Get Amadeus access token"""
-        print(f"Getting access token with key: {self.api_key[:10] if self.api_key else 'None'}...")
+        """Get Amadeus access token, reusing the cached one while it is valid"""
+        token = self._tokens.get("amadeus")
+        if token:
+            return token
+
         async with httpx.AsyncClient() as client:
             response = await client.post(
                 f"{self.base_url}/v1/security/oauth2/token",
@@ -25,28 +68,73 @@ class FlightService:
                 headers={"Content-Type": "application/x-www-form-urlencoded"}
             )
             response.raise_for_status()
-            return response.json()["access_token"]
+            data = response.json()
+        ttl = max(float(data.get("expires_in", 0)) - settings.AMADEUS_TOKEN_MARGIN, 0)
+        if ttl:
+            self._tokens.set("amadeus", data["access_token"], ttl=ttl)
+        return data["access_token"]
 
     def parse_flight_offer(self, offer: Dict) -> Dict:
-        """Parse raw Amadeus flight offer into user-friendly format"""
+        """
+        Parse raw Amadeus flight offer into user-friendly format.
+
+        Every itinerary (outbound, return or multi-city leg) and every segment
+        is read in one pass, with stops, layovers at connecting airports and
+        elapsed time. The top-level departure/arrival/flight_info describe the
+        first itinerary from its first departure to its final arrival.
+        """
         try:
-            itinerary = offer["itineraries"][0]  # Take first itinerary
-            segment = itinerary["segments"][0]   # Take first segment
             price_info = offer["price"]
             traveler_pricing = offer["travelerPricings"][0] if offer.get("travelerPricings") else {}
+            fare_details_by_segment = traveler_pricing.get("fareDetailsBySegment", [])
+            fares = {fare.get("segmentId"): fare for fare in fare_details_by_segment}
 
-            # Parse departure/arrival times
-            departure = segment["departure"]
-            arrival = segment["arrival"]
+            itineraries = []
+            for itinerary in offer["itineraries"]:
+                segments = []
+                layovers = []
+                technical_stops = 0
+                previous_arrival = None
+                for segment in itinerary["segments"]:
+                    departure, arrival = segment["departure"], segment["arrival"]
+                    if previous_arrival is not None:
+                        # Both timestamps are local to the connecting airport, so they subtract directly
+                        layovers.append({
+                            "airport": departure["iataCode"],
+                            "minutes": minutes_between(previous_arrival["at"], departure["at"])
+                        })
+                    previous_arrival = arrival
+                    technical_stops += segment.get("numberOfStops", 0)
+                    carrier_code = segment["carrierCode"]
+                    fare = fares.get(segment.get("id"), {})
+                    segments.append({
+                        "airline": carrier_code,
+                        "flight_number": f"{carrier_code}{segment['number']}",
+                        "operating_airline": segment.get("operating", {}).get("carrierCode", carrier_code),
+                        "aircraft": segment.get("aircraft", {}).get("code", "N/A"),
+                        "departure": _endpoint(departure),
+                        "arrival": _endpoint(arrival),
+                        "duration": segment.get("duration"),
+                        "duration_minutes": iso_duration_minutes(segment.get("duration")),
+                        "cabin": fare.get("cabin")
+                    })
 
-            # Parse flight details
-            carrier_code = segment["carrierCode"]
-            flight_number = segment["number"]
-            aircraft = segment.get("aircraft", {}).get("code", "N/A")
+                itineraries.append({
+                    "departure": segments[0]["departure"],
+                    "arrival": segments[-1]["arrival"],
+                    "duration": itinerary.get("duration"),
+                    "duration_minutes": iso_duration_minutes(itinerary.get("duration")),
+                    "stops": len(segments) - 1 + technical_stops,
+                    "layovers": layovers,
+                    "segments": segments
+                })
 
-            # Parse baggage info
-            fare_details = traveler_pricing.get("fareDetailsBySegment", [{}])[0]
-            included_bags = fare_details.get("includedCheckedBags", {})
+            outbound = itineraries[0]
+            first_segment = outbound["segments"][0]
+
+            # Parse baggage info; the allowance for the journey is the smallest across segments
+            fare_details = fare_details_by_segment[0] if fare_details_by_segment else {}
+            checked_bags = [fare.get("includedCheckedBags", {}).get("quantity", 0) for fare in fare_details_by_segment]
             cabin_bags = fare_details.get("includedCabinBags", {})
 
             # Parse amenities
@@ -60,26 +148,24 @@ class FlightService:
                             "type": amenity.get("amenityType", "OTHER")
                         })
 
+            elapsed = [itinerary["duration_minutes"] for itinerary in itineraries]
             return {
                 "flight_info": {
-                    "airline": carrier_code,
-                    "flight_number": f"{carrier_code}{flight_number}",
-                    "aircraft": aircraft,
-                    "duration": itinerary["duration"]
-                },
-                "departure": {
-                    "airport": departure["iataCode"],
-                    "terminal": departure.get("terminal"),
-                    "time": departure["at"]
-                },
-                "arrival": {
-                    "airport": arrival["iataCode"],
-                    "terminal": arrival.get("terminal"),
-                    "time": arrival["at"]
+                    "airline": first_segment["airline"],
+                    "flight_number": first_segment["flight_number"],
+                    "flight_numbers": [segment["flight_number"] for segment in outbound["segments"]],
+                    "aircraft": first_segment["aircraft"],
+                    "duration": outbound["duration"],
+                    "stops": outbound["stops"]
                 },
+                "departure": outbound["departure"],
+                "arrival": outbound["arrival"],
+                "itineraries": itineraries,
+                "trip_type": _trip_type(itineraries),
+                "total_duration_minutes": sum(elapsed) if None not in elapsed else None,
                 "baggage": {
                     "checked_bags": {
-                        "quantity": included_bags.get("quantity", 0),
+                        "quantity": min(checked_bags) if checked_bags else 0,
                         "additional_fee": price_info.get("additionalServices", [])
                     },
                     "cabin_bags": {
@@ -99,7 +185,7 @@ class FlightService:
                     "instant_ticketing": offer.get("instantTicketingRequired", False)
                 }
             }
-        except (KeyError, IndexError, ValueError) as e:
+        except (KeyError, IndexError, ValueError, TypeError) as e:
             # Fallback to basic info if parsing fails
             return {
                 "flight_info": {"airline": "Unknown", "flight_number": "Unknown"},
@@ -145,10 +231,14 @@ class FlightService:
             return None
 
     def get_exchange_rates(self, base: str = "USD") -> Dict:
-        """Get exchange rates from free API"""
-        response = requests.get(f"https://api.exchangerate-api.com/v4/latest/{base}")
-        response.raise_for_status()
-        return response.json()["rates"]
+        """Get exchange rates from free API, cached for FX_RATES_TTL"""
+        rates = self._fx_rates.get(base)
+        if rates is None:
+            response = requests.get(f"https://api.exchangerate-api.com/v4/latest/{base}")
+            response.raise_for_status()
+            rates = response.json()["rates"]
+            self._fx_rates.set(base, rates, ttl=settings.FX_RATES_TTL)
+        return rates
 
     async def compare_prices(self, origin: str, destination: str, departure_date: str, adults: int = 1) -> Dict:
         """Compare flight prices across currencies and find lowest"""
@@ -159,7 +249,7 @@ class FlightService:
                 if result:
                     results.append(result)
             except Exception as e:
-                print(f"Error for {currency}: {e}")
+                logger.warning("Search in %s failed: %s", currency, e)
                 continue
 
         if not results:
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+from config import settings
+
+
+class WarmCache:
+    """
+    Module-level TTL cache that lives as long as the function container.
+
+    Warm invocations reuse whatever earlier invocations stored. When
+    `STATE_DIR` is set (e.g. /tmp/flight-api-state) each entry is also
+    written to its own JSON file under a directory named after the
+    namespace, so a fresh module instance in the same container starts warm
+    and a set() only rewrites the one entry it changed. Expiry uses
+    wall-clock time so persisted entries stay valid across processes.
+    """
+
+    def __init__(self, namespace: str, maxsize: int = 256, directory: Optional[str] = None):
+        directory = settings.STATE_DIR if directory is None else directory
+        self.path = os.path.join(directory, namespace) if directory else None
+        self.maxsize = maxsize
+        self._entries: Dict[str, list] = {}  # key -> [expires_at, value]
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def _load(self) -> None:
+        self._loaded = True
+        if not self.path:
+            return
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return
+        now = time.time()
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.path, name), encoding="utf-8") as f:
+                    key, expires_at, value = json.load(f)
+            except (OSError, ValueError, TypeError):
+                continue
+            if expires_at > now:
+                self._entries[key] = [expires_at, value]
+            else:
+                self._remove(key)
+
+    def _persist(self, key: str) -> None:
+        if not self.path:
+            return
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump([key, *self._entries[key]], f)
+            os.chmod(temp_path, 0o600)  # tokens may be stored here
+            os.replace(temp_path, self._file(key))
+        except OSError:
+            pass  # persistence is best effort; the in-memory copy still serves this container
+
+    def _remove(self, key: str) -> None:
+        if not self.path:
+            return
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if not self._loaded:
+            self._load()
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if self._entries.pop(key, None) is not None:
+                self._remove(key)
+            self.misses += 1
+            return default
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if not self._loaded:
+            self._load()
+        now = time.time()
+        self._entries[key] = [now + ttl, value]
+        if len(self._entries) > self.maxsize:
+            # Drop expired entries first, then whichever expire soonest
+            dropped = [k for k, e in self._entries.items() if e[0] <= now]
+            ranked = sorted((item for item in self._entries.items() if item[1][0] > now), key=lambda item: item[1][0])
+            dropped += [k for k, _ in ranked[:len(ranked) - self.maxsize]]
+            for k in dropped:
+                del self._entries[k]
+                self._remove(k)
+        if key in self._entries:
+            self._persist(key)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+            "persisted": bool(self.path)
+        }
@@ -0,0 +1,42 @@
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.main import app
+from app.services.flight_service import FlightService
+
+client = TestClient(app)
+
+
+def test_top_routes():
+    service = FlightService()
+    for _ in range(3):
+        service.popular_routes.add(("JFK", "LAX", "2030-12-01", 1, None, ()))
+    service.popular_routes.add(("SFO", "SEA", "2030-12-01", 2, "2030-12-08", ()))
+
+    with patch("app.api.flight_routes.flight_service", service):
+        response = client.get("/api/admin/top-routes?limit=1")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["tracked"] == 2
+    assert data["routes"] == [{
+        "origin": "JFK", "destination": "LAX", "departure_date": "2030-12-01", "adults": 1,
+        "return_date": None, "legs": [], "count": 3, "error": 0, "share": 0.75, "cached_ttl": 0
+    }]
+    assert "budget_remaining" in data["warmer"]
+
+
+def test_top_routes_requires_admin_token_when_configured():
+    with patch("app.api.admin_routes.settings.ADMIN_TOKEN", "secret"):
+        assert client.get("/api/admin/top-routes").status_code == 403
+        assert client.get("/api/admin/top-routes", headers={"X-Admin-Token": "secret"}).status_code == 200
+
+
+def test_currency_selection_report():
+    service = FlightService()
+    for _ in range(3):
+        service.currency_selector.record(service.currencies, "JFK", "LAX", service.currencies, {c: 100.0 if c != "GBP" else 80.0 for c in service.currencies})
+
+    with patch("app.api.flight_routes.flight_service", service):
+        data = client.get("/api/admin/currency-selection?origin=JFK&destination=LAX").json()
+    assert data["searches"] == 3
+    assert data["ranking"][0]["currency"] == "GBP"
+    assert "savings_rate" in data
@@ -92,4 +92,31 @@ def test_parse_query_error(mock_ai_service):
 
     response = client.post("/api/ai/parse-query", json={"query": "invalid query"})
     assert response.status_code == 500
-    assert "Query parsing error" in response.json()["detail"]
\ No newline at end of file
+    assert "Query parsing error" in response.json()["detail"]
+
+
+@patch("app.api.ai_routes.ai_service")
+def test_stream_destination_insights(mock_ai_service):
+    async def events(destination):
+        yield "field", {"key": "best_time_to_visit", "value": "Spring"}
+        yield "done", {"best_time_to_visit": "Spring"}
+    mock_ai_service.stream_destination_insights = events
+
+    response = client.get("/api/ai/destination-insights/LAX/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == (
+        'event: field\ndata: {"key": "best_time_to_visit", "value": "Spring"}\n\n'
+        'event: done\ndata: {"best_time_to_visit": "Spring"}\n\n'
+    )
+
+@patch("app.api.ai_routes.ai_service")
+def test_get_destination_insights_not_modified(mock_ai_service):
+    mock_ai_service.get_destination_insights = AsyncMock(return_value={"best_time_to_visit": "Spring"})
+    mock_ai_service.insights_ttl.return_value = 3000
+
+    response = client.get("/api/ai/destination-insights/LAX")
+    assert response.headers["cache-control"] == "public, max-age=3000"
+
+    response = client.get("/api/ai/destination-insights/LAX", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
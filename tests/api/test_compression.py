@@ -0,0 +1,71 @@
+import json
+import zlib
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.compression import Compressor, negotiate
+from unittest.mock import patch, AsyncMock
+
+client = TestClient(app)
+
+LARGE_RESULT = {
+    "lowest_currency": "USD",
+    "lowest_price": 500.0,
+    "lowest_price_usd": 500.0,
+    "all_results": [{"currency": "USD", "price": 500.0, "raw_offer": {"segments": ["JFK-LAX"] * 200}}]
+}
+
+def search(accept_encoding):
+    return client.get(
+        "/api/flights/search?origin=JFK&destination=LAX&departure_date=2025-12-01",
+        headers={"Accept-Encoding": accept_encoding}
+    )
+
+def test_negotiate_prefers_highest_quality_then_server_order():
+    assert negotiate("gzip, zstd") == "zstd"
+    assert negotiate("gzip;q=1.0, zstd;q=0.5") == "gzip"
+    assert negotiate("zstd;q=0, *;q=0.1") == "gzip"
+    assert negotiate("identity") is None
+    assert negotiate(None) is None
+
+def test_flushed_chunks_decode_incrementally():
+    compressor = Compressor("gzip")
+    decoder = zlib.decompressobj(31)
+    assert decoder.decompress(compressor.compress(b'{"a": 1}\n')) == b'{"a": 1}\n'
+    assert decoder.decompress(compressor.compress(b'{"b": 2}\n') + compressor.finish()) == b'{"b": 2}\n'
+
+@patch("app.api.flight_routes.flight_service")
+@pytest.mark.parametrize("accept, expected", [("zstd, gzip", "zstd"), ("gzip", "gzip")])
+def test_large_json_is_compressed(mock_flight_service, accept, expected):
+    mock_flight_service.compare_prices = AsyncMock(return_value=LARGE_RESULT)
+    response = search(accept)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == expected
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json() == LARGE_RESULT
+    assert response.num_bytes_downloaded < len(json.dumps(LARGE_RESULT)) / 5
+
+@patch("app.api.flight_routes.flight_service")
+def test_small_or_unrequested_bodies_are_not_compressed(mock_flight_service):
+    mock_flight_service.compare_prices = AsyncMock(return_value={"error": "No flight offers found"})
+    assert "content-encoding" not in search("gzip").headers
+
+    mock_flight_service.compare_prices = AsyncMock(return_value=LARGE_RESULT)
+    assert "content-encoding" not in search("identity").headers
+
+@patch("app.api.pdf_routes.PDFService")
+def test_streamed_ndjson_is_compressed(MockPDFService, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.api.pdf_routes.settings.UPLOAD_DIR", str(tmp_path))
+    async def pages(file_path):
+        for page in range(3):
+            yield {"page": page, "text": "fare rules " * 50}
+    MockPDFService.return_value.iter_pages = pages
+
+    response = client.post(
+        "/api/pdf/extract-text?stream=true",
+        files={"file": ("rules.pdf", b"%PDF-1.4", "application/pdf")},
+        headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert [json.loads(line)["page"] for line in response.text.splitlines()] == [0, 1, 2]
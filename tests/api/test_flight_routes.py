@@ -2,6 +2,8 @@ import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 from unittest.mock import patch, AsyncMock
+from app.services.offer_snapshot import encode_cursor
+from tests.conftest import make_offer
 
 client = TestClient(app)
 
@@ -35,4 +37,140 @@ def test_search_flights_service_error(mock_flight_service):
 
     response = client.get("/api/flights/search?origin=JFK&destination=LAX&departure_date=2025-12-01")
     assert response.status_code == 500
-    assert "Error searching flights" in response.json()["detail"]
\ No newline at end of file
+    assert "Error searching flights" in response.json()["detail"]
+@patch("app.api.flight_routes.flight_service")
+def test_search_flights_revalidates_with_etag(mock_flight_service):
+    mock_flight_service.compare_prices = AsyncMock(return_value={"lowest_currency": "USD", "all_results": []})
+    mock_flight_service.result_ttl.return_value = 240
+
+    url = "/api/flights/search?origin=JFK&destination=LAX&departure_date=2025-12-01"
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=240"
+    etag = response.headers["etag"]
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    mock_flight_service.compare_prices.return_value = {"lowest_currency": "EUR", "all_results": []}
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["lowest_currency"] == "EUR"
+
+@patch("app.api.flight_routes.flight_service")
+def test_search_flights_uncached_result_is_not_reusable(mock_flight_service):
+    mock_flight_service.compare_prices = AsyncMock(return_value={"error": "No flights found"})
+    mock_flight_service.result_ttl.return_value = 0
+
+    response = client.get("/api/flights/search?origin=JFK&destination=LAX&departure_date=2025-12-01")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+
+@patch("app.api.flight_routes.flight_service")
+def test_search_flights_round_trip_and_multi_city(mock_flight_service):
+    mock_flight_service.compare_prices = AsyncMock(return_value={"lowest_currency": "USD", "all_results": []})
+    mock_flight_service.result_ttl.return_value = 0
+
+    response = client.get("/api/flights/search?origin=JFK&destination=LAX&departure_date=2025-12-01&return_date=2025-12-08")
+    assert response.status_code == 200
+    mock_flight_service.compare_prices.assert_awaited_with("JFK", "LAX", "2025-12-01", 1, "2025-12-08", (), "full")
+
+    response = client.get("/api/flights/search?origin=JFK&destination=LAX&departure_date=2025-12-01&legs=LAX:SFO:2025-12-05,SFO:JFK:2025-12-09")
+    assert response.status_code == 200
+    mock_flight_service.compare_prices.assert_awaited_with(
+        "JFK", "LAX", "2025-12-01", 1, None, (("LAX", "SFO", "2025-12-05"), ("SFO", "JFK", "2025-12-09")), "full"
+    )
+
+def test_search_flights_rejects_invalid_trips():
+    base = "/api/flights/search?origin=JFK&destination=LAX&departure_date=2025-12-01"
+    assert client.get(base + "&return_date=2025-11-01").status_code == 400
+    assert client.get(base + "&legs=LAX:SFO").status_code == 400
+    assert client.get(base + "&legs=LAX:SFO:2025-11-05").status_code == 400
+    assert client.get(base + "&return_date=2025-12-08&legs=LAX:SFO:2025-12-05").status_code == 400
+
+def test_list_offers_pages_from_snapshot(priced_service):
+    offers = [
+        make_offer([[(f"AA{i}", "JFK", f"2025-12-01T{6 + i:02d}:00:00", "LAX", f"2025-12-01T{8 + i:02d}:00:00")]], total=f"{100 + 10 * i}.00")
+        for i in range(5)
+    ]
+    service = priced_service({"USD": 100.0}, offers=offers)
+
+    with patch("app.api.flight_routes.flight_service", service):
+        response = client.get("/api/flights/offers?origin=JFK&destination=LAX&departure_date=2025-12-01&sort=-price&limit=2")
+        assert response.status_code == 200
+        page = response.json()
+        assert page["total"] == 5
+        assert [o["price"] for o in page["offers"]] == [140.0, 130.0]
+
+        pages = [page]
+        while pages[-1]["next_cursor"]:
+            pages.append(client.get(f"/api/flights/offers?cursor={pages[-1]['next_cursor']}&limit=2").json())
+        assert [o["price"] for p in pages for o in p["offers"]] == [140.0, 130.0, 120.0, 110.0, 100.0]
+        assert len(service.searched) == 1
+
+        filtered = client.get("/api/flights/offers?origin=JFK&destination=LAX&departure_date=2025-12-01&depart_after=07:00&max_price=125").json()
+        assert [o["price"] for o in filtered["offers"]] == [110.0, 120.0]
+        assert len(service.searched) == 1
+
+        assert client.get("/api/flights/offers?cursor=garbage").status_code == 400
+        snapshot_id = pages[0]["snapshot_id"]
+        for bad in (encode_cursor(snapshot_id, {}, 5, 0), encode_cursor(snapshot_id, {"max_price": "x"}, "price", 0)):
+            assert client.get(f"/api/flights/offers?cursor={bad}").status_code == 400
+        service._snapshots.clear()
+        assert client.get(f"/api/flights/offers?cursor={pages[0]['next_cursor']}").status_code == 410
+
+@patch("app.api.flight_routes.flight_service")
+def test_list_offers_refetch_error(mock_flight_service):
+    mock_flight_service.compare_prices = AsyncMock(return_value={"lowest_currency": "USD", "snapshot_id": "gone"})
+    mock_flight_service.offer_snapshot.return_value = None
+    mock_flight_service.refresh = AsyncMock(side_effect=Exception("API error"))
+
+    response = client.get("/api/flights/offers?origin=JFK&destination=LAX&departure_date=2025-12-01")
+    assert response.status_code == 500
+    assert "Error searching flights" in response.json()["detail"]
+
+def test_list_offers_requires_search_or_cursor():
+    assert client.get("/api/flights/offers?origin=JFK").status_code == 400
+    assert client.get("/api/flights/offers?origin=JFK&destination=LAX&departure_date=2025-12-01&sort=name").status_code == 400
+
+def test_search_flights_rejects_unknown_mode():
+    response = client.get("/api/flights/search?origin=JFK&destination=LAX&departure_date=2025-12-01&mode=slow")
+    assert response.status_code == 422
+
+def test_search_flights_sort_best(priced_service):
+    offers = [
+        make_offer([[("AA1", "JFK", "2025-12-01T06:00:00", "LAX", "2025-12-01T08:00:00")]], total="300.00"),
+        make_offer([[("UA2", "JFK", "2025-12-01T06:00:00", "DEN", "2025-12-01T08:00:00"),
+                     ("UA3", "DEN", "2025-12-01T12:00:00", "LAX", "2025-12-01T14:00:00")]], total="250.00"),
+    ]
+    service = priced_service({"USD": 250.0}, offers=offers)
+
+    url = "/api/flights/search?origin=JFK&destination=LAX&departure_date=2025-12-01&sort=best"
+    with patch("app.api.flight_routes.flight_service", service):
+        data = client.get(url + "&weights=price:1,duration:2").json()
+        assert [o["parsed_offer"]["flight_info"]["flight_number"] for o in data["best_offers"]] == ["AA1", "UA2"]
+        assert data["pareto_front_size"] == 2
+        data = client.get(url + "&weights=price:1").json()
+        assert data["best_offers"][0]["price"] == 250.0
+        assert "best_offers" not in client.get(url.replace("best", "price")).json()
+        assert client.get(url + "&weights=comfort:1").status_code == 400
+
+def test_search_flights_expands_metro_and_nearby_airports(priced_service):
+    service = priced_service({"JFK": 400.0, "LGA": 380.0, "EWR": 350.0}, by="origin")
+
+    with patch("app.api.flight_routes.flight_service", service):
+        data = client.get("/api/flights/search?origin=NYC&destination=LAX&departure_date=2025-12-01").json()
+        assert data["airport_pair"] == "EWR-LAX"
+        assert data["lowest_price_usd"] == 350.0
+        assert [pair["airport_pair"] for pair in data["airport_pairs"]] == ["JFK-LAX", "LGA-LAX", "EWR-LAX"]
+        assert {row["airport_pair"] for row in data["all_results"]} == {"JFK-LAX", "LGA-LAX", "EWR-LAX"}
+
+        data = client.get("/api/flights/search?origin=JFK&destination=DEN&departure_date=2025-12-01&nearby_km=40").json()
+        assert [pair["airport_pair"] for pair in data["airport_pairs"]] == ["JFK-DEN", "LGA-DEN", "EWR-DEN"]
+        assert data["requested"] == {"origin": "JFK", "destination": "DEN", "nearby_km": 40.0}
+
+    base = "/api/flights/search?origin=NYC&destination=LAX&departure_date=2025-12-01"
+    assert client.get(base + "&legs=LAX:SFO:2025-12-05").status_code == 400
+    assert client.get(base + "&nearby_km=5000").status_code == 422
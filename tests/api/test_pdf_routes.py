@@ -1,10 +1,26 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 from unittest.mock import patch, AsyncMock
+from app.services.pdf_cache import PDFCache
+from app.services.search_index import SearchIndex
+import hashlib
 
 client = TestClient(app)
 
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    cache = PDFCache(str(tmp_path / "pdf_cache"), max_bytes=1024 * 1024)
+    monkeypatch.setattr("app.api.pdf_routes.pdf_cache", cache)
+    return cache
+
+@pytest.fixture(autouse=True)
+def isolated_index(tmp_path, monkeypatch):
+    index = SearchIndex(str(tmp_path / "pdf_index"), max_documents=8)
+    monkeypatch.setattr("app.api.pdf_routes.search_index", index)
+    return index
+
 @pytest.fixture
 def fake_pdf_file(tmp_path):
     file_path = tmp_path / "test.pdf"
@@ -43,3 +59,95 @@ def test_extract_text_invalid_file(MockPDFService, fake_pdf_file):
         response = client.post("/api/pdf/extract-text", files={"file": ("test.txt", f, "text/plain")})
     assert response.status_code == 400
     assert response.json()["detail"] == "Only PDF files are allowed"
+
+@patch("app.api.pdf_routes.PDFService")
+def test_upload_pdf_too_large(MockPDFService, fake_pdf_file, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.api.pdf_routes.settings.MAX_UPLOAD_SIZE", 8)
+    monkeypatch.setattr("app.api.pdf_routes.settings.UPLOAD_DIR", str(tmp_path / "uploads"))
+    with open(fake_pdf_file, "rb") as f:
+        response = client.post("/api/pdf/upload", files={"file": ("test.pdf", f, "application/pdf")})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "File too large"
+    assert list((tmp_path / "uploads").iterdir()) == []
+    MockPDFService.return_value.process_pdf.assert_not_called()
+
+@patch("app.api.pdf_routes.PDFService")
+def test_upload_pdf_stream(MockPDFService, fake_pdf_file):
+    async def chunks(file_path):
+        yield {"content": "chunk1", "metadata": {"page": 0}}
+        yield {"content": "chunk2", "metadata": {"page": 1}}
+    MockPDFService.return_value.iter_chunks = chunks
+
+    with open(fake_pdf_file, "rb") as f:
+        response = client.post("/api/pdf/upload?stream=true", files={"file": ("test.pdf", f, "application/pdf")})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["content"] for row in rows] == ["chunk1", "chunk2"]
+
+@patch("app.api.pdf_routes.PDFService")
+def test_repeat_upload_is_served_from_cache(MockPDFService, fake_pdf_file):
+    instance = MockPDFService.return_value
+    instance.process_pdf = AsyncMock(return_value=[{"content": "chunk1", "metadata": {"page": 0, "source": "app/uploads/tmp1.pdf"}}])
+    digest = hashlib.sha256(fake_pdf_file.read_bytes()).hexdigest()
+
+    assert client.head(f"/api/pdf/cache/{digest}").status_code == 404
+    with open(fake_pdf_file, "rb") as f:
+        first = client.post("/api/pdf/upload", files={"file": ("first.pdf", f, "application/pdf")})
+    with open(fake_pdf_file, "rb") as f:
+        second = client.post("/api/pdf/upload", files={"file": ("second.pdf", f, "application/pdf")})
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.headers["X-Content-SHA256"] == digest
+    assert second.json() == [{"content": "chunk1", "metadata": {"page": 0, "source": "second.pdf"}}]
+    assert instance.process_pdf.await_count == 1
+
+    assert client.head(f"/api/pdf/cache/{digest}").status_code == 200
+    # The spool path the chunks were parsed from never reaches the cache endpoint
+    assert client.get(f"/api/pdf/cache/{digest}").json() == [{"content": "chunk1", "metadata": {"page": 0}}]
+
+@patch("app.api.pdf_routes.PDFService")
+def test_streamed_upload_fills_cache(MockPDFService, fake_pdf_file, isolated_cache):
+    async def chunks(file_path):
+        yield {"content": "chunk1", "metadata": {"page": 0, "source": file_path}}
+    MockPDFService.return_value.iter_chunks = chunks
+    digest = hashlib.sha256(fake_pdf_file.read_bytes()).hexdigest()
+
+    with open(fake_pdf_file, "rb") as f:
+        response = client.post("/api/pdf/upload?stream=true", files={"file": ("test.pdf", f, "application/pdf")})
+    assert response.status_code == 200
+    assert json.loads(response.text)["metadata"]["source"] == "test.pdf"
+    assert isolated_cache.get(digest) == [{"content": "chunk1", "metadata": {"page": 0}}]
+
+@patch("app.api.pdf_routes.PDFService")
+def test_uploaded_document_is_searchable(MockPDFService, fake_pdf_file, isolated_index):
+    instance = MockPDFService.return_value
+    instance.process_pdf = AsyncMock(return_value=[
+        {"content": "Baggage allowance is two checked bags", "metadata": {"page": 0}},
+        {"content": "Refunds are permitted before departure", "metadata": {"page": 3}}
+    ])
+    digest = hashlib.sha256(fake_pdf_file.read_bytes()).hexdigest()
+    with open(fake_pdf_file, "rb") as f:
+        client.post("/api/pdf/upload", files={"file": ("rules.pdf", f, "application/pdf")})
+
+    response = client.get("/api/pdf/search", params={"q": "refund departure", "k": 1})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 1
+    assert results[0]["doc_id"] == digest
+    # Search spans every client's documents, so uploaders' filenames are not indexed
+    assert results[0]["metadata"] == {"page": 3}
+
+    assert client.delete(f"/api/pdf/index/{digest}").status_code == 200
+    assert isolated_index.in_memory() == []
+    # Persisted documents are reloaded when searched by id
+    response = client.get("/api/pdf/search", params={"q": "baggage", "doc_id": digest})
+    assert response.json()["results"][0]["metadata"]["page"] == 0
+
+def test_search_rejects_invalid_document_id():
+    response = client.get("/api/pdf/search", params={"q": "refund", "doc_id": "nope"})
+    assert response.status_code == 400
+
+def test_evict_unknown_document():
+    assert client.delete(f"/api/pdf/index/{'0' * 64}").status_code == 404
@@ -0,0 +1,24 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from unittest.mock import patch, AsyncMock
+
+client = TestClient(app)
+
+@patch("app.api.search_routes.SearchService")
+def test_search_with_insights_success(MockSearchService):
+    MockSearchService.return_value.search_with_insights = AsyncMock(return_value={
+        "flights": {"lowest_currency": "USD"},
+        "insights": {"destination": None},
+        "incomplete_sections": ["destination"],
+        "elapsed_ms": 12.0
+    })
+
+    response = client.get("/api/search?origin=JFK&destination=LAX&departure_date=2025-12-01")
+    assert response.status_code == 200
+    assert response.json()["flights"]["lowest_currency"] == "USD"
+
+def test_search_with_insights_invalid_date():
+    response = client.get("/api/search?origin=JFK&destination=LAX&departure_date=invalid")
+    assert response.status_code == 400
+    assert "Invalid date format" in response.json()["detail"]
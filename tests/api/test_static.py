@@ -0,0 +1,78 @@
+import gzip
+import os
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.static import StaticFile, precompress
+from app.core.http_cache import etag_matches
+
+client = TestClient(app)
+
+
+def test_index_page_revalidates():
+    response = client.get("/")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert response.headers["cache-control"] == "no-cache"
+
+    response = client.get("/", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_etag_matches_uses_weak_comparison():
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"xyz", "abc"', 'W/"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"xyz"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_static_file_serves_precompressed_variant(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text("<html>" + "flights " * 500 + "</html>")
+    precompress(str(path))
+    static = StaticFile(str(path))
+    app_client = TestClient(_app_for(static))
+
+    response = app_client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == path.read_text()
+    gzip_etag = response.headers["etag"]
+
+    response = app_client.get("/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] != gzip_etag
+
+    response = app_client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+    assert response.status_code == 304
+
+
+def test_static_file_ignores_stale_variant_and_reloads(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text("old")
+    (tmp_path / "page.html.gz").write_bytes(gzip.compress(b"old"))
+    os.utime(tmp_path / "page.html.gz", (1, 1))
+    static = StaticFile(str(path))
+    app_client = TestClient(_app_for(static))
+
+    response = app_client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    first_etag = response.headers["etag"]
+
+    path.write_text("newer content")
+    response = app_client.get("/", headers={"If-None-Match": first_etag})
+    assert response.status_code == 200
+    assert response.text == "newer content"
+
+
+def _app_for(static: StaticFile):
+    from fastapi import FastAPI, Request
+
+    static_app = FastAPI()
+
+    @static_app.get("/")
+    async def page(request: Request):
+        return static.response(request)
+
+    return static_app
@@ -1,5 +1,121 @@
 import os
+import pytest
 from dotenv import load_dotenv
 
 # Load environment variables from .env file for all tests
-load_dotenv()
\ No newline at end of file
+load_dotenv()
+
+
+def write_text_pdf(path, page_texts):
+    """Write a minimal PDF with one page per entry, each line drawn as text"""
+    def escape(line):
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for text in page_texts:
+        lines = " T* ".join(f"({escape(line)}) Tj" for line in text.split("\n"))
+        stream = f"BT /F1 9 Tf 11 TL 30 810 Td {lines} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
+
+
+@pytest.fixture
+def text_pdf(tmp_path):
+    """Factory fixture writing a multi-page text PDF into tmp_path"""
+    def make(page_texts, name="document.pdf"):
+        return str(write_text_pdf(tmp_path / name, page_texts))
+    return make
+
+
+def make_offer(itineraries, total="250.00", currency="USD", checked_bags=1, offer_id="1"):
+    """
+    Build an Amadeus flight offer. `itineraries` is a list of journeys, each a
+    list of (carrier+number, from, departure time, to, arrival time) segments.
+    """
+    raw_itineraries = []
+    fare_details = []
+    segment_id = 0
+    for segments in itineraries:
+        raw_segments = []
+        for flight, origin, departs, destination, arrives in segments:
+            segment_id += 1
+            raw_segments.append({
+                "id": str(segment_id),
+                "carrierCode": flight[:2],
+                "number": flight[2:],
+                "departure": {"iataCode": origin, "at": departs},
+                "arrival": {"iataCode": destination, "at": arrives},
+                "aircraft": {"code": "321"},
+                "duration": "PT2H",
+                "numberOfStops": 0
+            })
+            fare_details.append({
+                "segmentId": str(segment_id),
+                "cabin": "ECONOMY",
+                "includedCheckedBags": {"quantity": checked_bags}
+            })
+        raw_itineraries.append({"duration": f"PT{2 * len(segments) + len(segments) - 1}H", "segments": raw_segments})
+    return {
+        "id": offer_id,
+        "itineraries": raw_itineraries,
+        "price": {"total": total, "base": "200.00", "currency": currency},
+        "travelerPricings": [{"fareDetailsBySegment": fare_details}],
+        "numberOfBookableSeats": 4
+    }
+
+
+@pytest.fixture
+def priced_service(monkeypatch):
+    """
+    Factory fixture building a FlightService whose searches return fixed fares
+    without upstream calls. `prices` maps a currency, or with by="origin" an
+    origin airport, to the fare found; missing entries find no offers. Each
+    search is appended to service.searched. Currency selection is off and the
+    route price history starts empty.
+    """
+    from app.services.flight_service import FlightService
+    from app.services.price_analytics import PriceHistory
+
+    monkeypatch.setattr("app.services.flight_service.price_history", PriceHistory())
+    monkeypatch.setattr("app.services.flight_service.settings.CURRENCY_SELECTION_ENABLED", False)
+
+    def make(prices, currencies=("USD",), rates=None, by="currency", offers=()):
+        service = FlightService()
+        service.currencies = list(currencies)
+        service.searched = []
+
+        async def fake_search(origin, destination, departure_date, currency, *args):
+            service.searched.append((origin, destination, currency))
+            price = prices.get(origin if by == "origin" else currency)
+            if price is None:
+                return None
+            return {"currency": currency, "price": price, "parsed_offer": {}, "offers": list(offers)}
+
+        monkeypatch.setattr(service, "search_flights", fake_search)
+        monkeypatch.setattr(service, "get_exchange_rates", lambda base="USD": rates or {c: 1.0 for c in service.currencies})
+        return service
+    return make
@@ -1,6 +1,6 @@
 import pytest
 from app.services.ai_service import AIService
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 @pytest.mark.asyncio
 async def test_ai_service_without_api_key():
@@ -13,8 +13,8 @@ async def test_ai_service_without_api_key():
     result = await service.get_travel_recommendations({"origin": "JFK", "destination": "LAX"})
     assert "AI features require Groq API key" in result["insights"]
 
-    # Test price analysis without API key
-    result = await service.analyze_price_trends([])
+    # Test price analysis narrative without API key
+    result = await service.analyze_price_trends([{"currency": "USD", "price": 500.0, "price_usd": 500.0}], narrative=True)
     assert "Price trend analysis requires Groq API key" in result["analysis"]
 
     # Test destination insights without API key
@@ -65,4 +65,112 @@ async def test_natural_language_parsing():
     if "origin" in result and "destination" in result:
         assert True  # Parsed successfully
     else:
-        assert "parsed" in result and result["parsed"] == False
\ No newline at end of file
+        assert "parsed" in result and result["parsed"] == False
+
+@pytest.mark.asyncio
+async def test_recommendations_cache_canonicalizes_requests():
+    """Near-identical searches share one cached Groq answer"""
+    service = AIService()
+    service.api_key = "fake_key"
+    service.client = AsyncMock()
+    completion = AsyncMock()
+    completion.choices = [AsyncMock()]
+    completion.choices[0].message.content = '{"recommendations": [], "insights": "Book early"}'
+    service.client.chat.completions.create = AsyncMock(return_value=completion)
+
+    first = await service.get_travel_recommendations(
+        {"origin": "jfk", "destination": "LAX", "departureDate": "2025-12-01", "passengers": 1, "lowest_price_usd": 512.4}
+    )
+    second = await service.get_travel_recommendations(
+        {"origin": "JFK", "destination": "lax", "departure_date": "2025-12-20", "passengers": 3, "lowest_price_usd": 530}
+    )
+
+    assert first == second
+    assert service.client.chat.completions.create.await_count == 1
+    stats = service.cache_stats()["recommendations"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+@pytest.mark.asyncio
+async def test_price_analysis_cache_ignores_offer_payloads():
+    """Price analysis keys on bucketed currency prices, not the raw offers"""
+    service = AIService()
+    service.api_key = "fake_key"
+    service.client = AsyncMock()
+    completion = AsyncMock()
+    completion.choices = [AsyncMock()]
+    completion.choices[0].message.content = '{"best_value_currency": "EUR", "trend_analysis": "Stable", "booking_recommendation": "Book now"}'
+    service.client.chat.completions.create = AsyncMock(return_value=completion)
+
+    await service.analyze_price_trends([
+        {"currency": "USD", "price": 510.0, "price_usd": 510.0, "raw_offer": {"id": "1"}},
+        {"currency": "EUR", "price": 440.0, "price_usd": 480.0, "raw_offer": {"id": "2"}}
+    ], narrative=True)
+    result = await service.analyze_price_trends([
+        {"currency": "EUR", "price": 445.0, "price_usd": 485.0, "raw_offer": {"id": "9"}},
+        {"currency": "USD", "price": 520.0, "price_usd": 520.0, "raw_offer": {"id": "8"}}
+    ], narrative=True)
+
+    assert result["best_value_currency"] == "EUR"
+    assert result["trend_analysis"] == "Stable"
+    assert result["stats"]["best_price_usd"] == 485.0
+    assert service.client.chat.completions.create.await_count == 1
+    assert service.cache_stats()["price_analysis"]["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_price_analysis_without_narrative_skips_llm():
+    service = AIService()
+    service.api_key = "fake_key"
+    service.client = AsyncMock()
+
+    result = await service.analyze_price_trends([
+        {"currency": "USD", "price": 500.0, "price_usd": 500.0},
+        {"currency": "GBP", "price": 360.0, "price_usd": 460.0}
+    ])
+
+    assert result["best_value_currency"] == "GBP"
+    assert result["stats"]["savings_vs_usd"] == 40.0
+    service.client.chat.completions.create.assert_not_called()
+
+def fake_stream(pieces):
+    """Build a GroqClient.stream replacement yielding content deltas"""
+    async def stream(**kwargs):
+        for piece in pieces:
+            chunk = MagicMock()
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = piece
+            yield chunk
+    return stream
+
+@pytest.mark.asyncio
+async def test_stream_recommendations_emits_fields_as_they_complete():
+    service = AIService()
+    service.api_key = "fake_key"
+    service.client = MagicMock()
+    service.client.stream = fake_stream(['{"insig', 'hts": "Fly mid', 'week", "recomm', 'endations": [{"type": "tip",', ' "value": "Book early"}]}'])
+
+    events = [event async for event in service.stream_travel_recommendations({"origin": "JFK", "destination": "LAX"})]
+    fields = [data for event, data in events if event == "field"]
+
+    assert fields[0] == {"key": "insights", "value": "Fly midweek"}
+    assert fields[1]["key"] == "recommendations"
+    # The first field is emitted before the stream has finished
+    assert events.index(("field", fields[0])) < len(events) - 3
+    assert events[-1] == ("done", {"insights": "Fly midweek", "recommendations": [{"type": "tip", "value": "Book early"}]})
+
+    # A repeat request is served from the cache filled by the stream
+    cached = await service.get_travel_recommendations({"origin": "JFK", "destination": "LAX"})
+    assert cached["insights"] == "Fly midweek"
+
+@pytest.mark.asyncio
+async def test_stream_destination_insights_falls_back_on_invalid_json():
+    service = AIService()
+    service.api_key = "fake_key"
+    service.client = MagicMock()
+    service.client.stream = fake_stream(["Sorry, I cannot", " help with that."])
+
+    events = [event async for event in service.stream_destination_insights("LAX")]
+    event, data = events[-1]
+    assert event == "done"
+    assert "best_time_to_visit" in data
@@ -0,0 +1,72 @@
+import pytest
+from app.services.airports import AirportIndex, airport_index
+
+
+def test_resolve_metro_codes():
+    assert airport_index.resolve("nyc") == ["JFK", "LGA", "EWR"]
+    assert airport_index.resolve("LAX") == ["LAX"]
+    assert airport_index.resolve("XXX") == ["XXX"]
+    assert airport_index.is_metro("LON") and not airport_index.is_metro("LHR")
+
+
+def test_nearby_uses_great_circle_distance():
+    nearby = dict(airport_index.nearby("SFO", 60))
+    assert set(nearby) == {"SFO", "OAK", "SJC"}
+    assert nearby["SFO"] == 0.0
+    assert 15 < nearby["OAK"] < 20
+    assert airport_index.nearby("XXX", 100) == []
+
+
+def test_expand_keeps_requested_airports_first(tmp_path):
+    path = tmp_path / "airports.csv"
+    path.write_text(
+        "iata,name,city,country,latitude,longitude,metro\n"
+        "AAA,A,A,XX,0.0,0.0,MET\n"
+        "BBB,B,B,XX,0.0,0.5,MET\n"
+        "CCC,C,C,XX,0.0,0.2,\n"
+        "DDD,D,D,XX,0.0,3.0,\n"
+    )
+    index = AirportIndex(str(path))
+    assert index.expand("MET") == [("AAA", 0.0), ("BBB", 0.0)]
+    # CCC is 22 km from AAA and 33 km from BBB; DDD is out of range
+    assert index.expand("MET", 50) == [("AAA", 0.0), ("BBB", 0.0), ("CCC", 22.2)]
+    assert index.expand("AAA", 100, limit=2) == [("AAA", 0.0), ("CCC", 22.2)]
+
+
+@pytest.fixture
+def service(priced_service):
+    # No offers from LGA
+    return priced_service({"JFK": 400.0, "EWR": 350.0}, currencies=["USD", "EUR"], by="origin")
+
+
+@pytest.mark.asyncio
+async def test_compare_nearby_merges_and_tags_pairs(service):
+    result = await service.compare_nearby("NYC", "LAX", "2025-12-01")
+    assert result["airport_pair"] == "EWR-LAX"
+    assert (result["origin"], result["destination"]) == ("EWR", "LAX")
+    assert result["lowest_price_usd"] == 350.0
+    assert [(row["airport_pair"], row["currency"]) for row in result["all_results"]] == [
+        ("JFK-LAX", "USD"), ("JFK-LAX", "EUR"), ("EWR-LAX", "USD"), ("EWR-LAX", "EUR")
+    ]
+    assert result["airport_pairs"][1] == {
+        "origin": "LGA", "destination": "LAX", "airport_pair": "LGA-LAX", "distance_km": 0.0, "error": "No flight offers found"
+    }
+    assert result["upstream_budget_used"] == 6
+    # Only the first pair counts as demand for cache warming
+    assert [key[:2] for key, _, _ in service.popular_routes.top(10)] == [("JFK", "LAX")]
+
+
+@pytest.mark.asyncio
+async def test_compare_nearby_stays_within_upstream_budget(service, monkeypatch):
+    monkeypatch.setattr("app.services.flight_service.settings.NEARBY_UPSTREAM_BUDGET", 4)
+    result = await service.compare_nearby("JFK", "DEN", "2025-12-01", radius_km=40)
+    assert [pair["airport_pair"] for pair in result["airport_pairs"]] == ["JFK-DEN", "LGA-DEN"]
+    assert result["pairs_skipped"] == ["EWR-DEN"]
+    assert len(service.searched) == 4
+
+    # Cached pairs are free, so a repeat search can reach the next pair
+    service.searched.clear()
+    result = await service.compare_nearby("JFK", "DEN", "2025-12-01", radius_km=40)
+    assert result["pairs_skipped"] == []
+    assert result["airport_pair"] == "EWR-DEN"
+    assert {origin for origin, _, _ in service.searched} == {"LGA", "EWR"}
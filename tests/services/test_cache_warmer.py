@@ -0,0 +1,130 @@
+import datetime
+import pytest
+from app.core.heavy_hitters import SpaceSaving
+from app.services.cache_warmer import CacheWarmer
+from app.services.flight_service import FlightService
+
+TOMORROW = (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+
+
+def test_space_saving_keeps_heavy_hitters():
+    tracker = SpaceSaving(capacity=4)
+    for i in range(200):
+        tracker.add("hot")
+        tracker.add(f"cold-{i}")
+        if i % 2:
+            tracker.add("warm")
+    top = tracker.top(2)
+    assert [key for key, _, _ in top] == ["hot", "warm"]
+    count, error = top[0][1], top[0][2]
+    assert count - error <= 200 <= count
+    assert len(tracker) == 4
+
+
+def test_space_saving_decay():
+    tracker = SpaceSaving(capacity=4)
+    tracker.add("a", 8)
+    tracker.decay(0.5)
+    assert tracker.top(1) == [("a", 4.0, 0.0)]
+    assert tracker.total == 4.0
+
+
+def expire_soon(service, seconds=10):
+    """Shorten every cached result so it falls inside the warmer's lead time"""
+    for key in list(service._results._data):
+        service._results.set(key, service._results.get(key), ttl=seconds)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = FlightService()
+    service.fetches = []
+    service.failing = set()
+    service.history_recorded = []
+
+    async def fake_fetch(origin, destination, *args, record_history=True, **kwargs):
+        service.fetches.append((origin, destination))
+        service.history_recorded.append(record_history)
+        if (origin, destination) in service.failing:
+            return {"error": "No flight offers found"}
+        return {"lowest_currency": "USD", "all_results": []}
+
+    monkeypatch.setattr(service, "_fetch_prices", fake_fetch)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_warmer_refreshes_popular_routes_about_to_expire(service):
+    for _ in range(3):
+        await service.compare_prices("JFK", "LAX", TOMORROW)
+        await service.compare_prices("SFO", "SEA", TOMORROW)
+    await service.compare_prices("ORD", "DEN", TOMORROW)  # searched once; below min_count
+    for _ in range(3):
+        await service.compare_prices("BOS", "ORD", "2000-01-01")  # departed; never warmed
+    service.fetches.clear()
+    service.history_recorded.clear()
+
+    warmer = CacheWarmer(service, top_n=4, lead_time=30, budget=100, min_count=2)
+    assert await warmer.run_once() == 0  # everything was just cached
+
+    expire_soon(service)
+    service._results.pop(service._result_key("SFO", "SEA", TOMORROW, 1))  # expired: left to the next search
+    assert await warmer.run_once() == 1
+    assert service.fetches == [("JFK", "LAX")]
+    assert service.result_ttl("JFK", "LAX", TOMORROW) > 30
+    assert service.popular_routes.top(1)[0][1] == 3  # warming does not count as demand
+    assert service.history_recorded == [False]  # nor as a search in the route's price history
+
+
+@pytest.mark.asyncio
+async def test_warmer_respects_upstream_budget(service):
+    for _ in range(2):
+        await service.compare_prices("JFK", "LAX", TOMORROW)
+        await service.compare_prices("SFO", "SEA", TOMORROW)
+    expire_soon(service)
+    service.fetches.clear()
+
+    warmer = CacheWarmer(service, budget=service.upstream_cost(), min_count=2)
+    assert await warmer.run_once() == 1
+    assert warmer.budget_remaining() == 0
+    assert warmer.stats()["deferred_for_budget"] == 1
+
+
+@pytest.mark.asyncio
+async def test_warmer_backs_off_after_a_failed_refresh(service):
+    for _ in range(2):
+        await service.compare_prices("JFK", "LAX", TOMORROW)
+    expire_soon(service)
+    service.failing.add(("JFK", "LAX"))
+    service.fetches.clear()
+
+    warmer = CacheWarmer(service, budget=100, min_count=2, backoff=600)
+    assert await warmer.run_once() == 0
+    assert await warmer.run_once() == 0
+    assert service.fetches == [("JFK", "LAX")]
+    assert warmer.stats()["failed"] == 1 and warmer.stats()["backing_off"] == 1
+
+
+@pytest.mark.asyncio
+async def test_warmer_refreshes_fast_only_routes_in_fast_mode(service, monkeypatch):
+    fast_fetches = []
+
+    async def fake_fetch_fast(origin, destination, *args, record_history=True, **kwargs):
+        fast_fetches.append((origin, destination))
+        service.history_recorded.append(record_history)
+        return {"lowest_currency": "USD", "lowest_price_usd": 100.0, "all_results": [], "mode": "fast"}
+
+    monkeypatch.setattr(service, "_fetch_fast", fake_fetch_fast)
+    monkeypatch.setattr(service, "_maybe_audit", lambda key, result: None)
+    for _ in range(2):
+        await service.compare_prices("JFK", "LAX", TOMORROW, mode="fast")
+    key = service._result_key("JFK", "LAX", TOMORROW, 1)
+    service._fast_results.set(key, service._fast_results.get(key), ttl=10)
+    fast_fetches.clear()
+
+    warmer = CacheWarmer(service, budget=1, min_count=2)
+    assert await warmer.run_once() == 1
+    assert fast_fetches == [("JFK", "LAX")] and service.fetches == []
+    assert service.history_recorded[-1] is False
+    assert warmer.budget_remaining() == 0
+    assert service.result_ttl("JFK", "LAX", TOMORROW, mode="fast") > 30
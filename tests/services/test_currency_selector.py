@@ -0,0 +1,74 @@
+import random
+from app.services.currency_selector import CurrencySelector
+
+CURRENCIES = ["USD", "EUR", "GBP", "CAD", "AUD"]
+
+
+def sweep(selector, origin, destination, cheapest):
+    prices = {currency: 100.0 for currency in CURRENCIES}
+    prices[cheapest] = 90.0
+    selector.record(CURRENCIES, origin, destination, CURRENCIES, prices)
+
+
+def test_full_sweep_until_warmed_up():
+    selector = CurrencySelector(top_n=2, exploration=0.0, warmup=3)
+    for _ in range(3):
+        assert selector.select(CURRENCIES, "JFK", "LAX") == CURRENCIES
+        sweep(selector, "JFK", "LAX", "GBP")
+    assert selector.select(CURRENCIES, "JFK", "LAX")[0] == "GBP"
+    assert len(selector.select(CURRENCIES, "JFK", "LAX")) == 2
+
+
+def test_route_ranking_falls_back_to_market_and_global():
+    selector = CurrencySelector(top_n=2, exploration=0.0, warmup=0)
+    for _ in range(10):
+        sweep(selector, "LHR", "CDG", "EUR")
+        sweep(selector, "JFK", "LAX", "CAD")
+    assert selector.rank(CURRENCIES, "LHR", "CDG")[0] == "EUR"
+    assert selector.rank(CURRENCIES, "LHR", "FCO")[0] == "EUR"  # unseen route, same market
+    assert set(selector.rank(CURRENCIES, "SYD", "MEL")[:2]) == {"EUR", "CAD"}  # unseen market
+
+
+def test_exploration_adds_one_other_currency():
+    selector = CurrencySelector(top_n=2, exploration=1.0, warmup=0, rng=random.Random(1))
+    selected = selector.select(CURRENCIES, "JFK", "LAX")
+    assert len(selected) == 3
+    assert selected[:2] == CURRENCIES[:2]
+
+
+def test_savings_report():
+    selector = CurrencySelector(top_n=2, exploration=0.0, warmup=2)
+    for _ in range(2):
+        sweep(selector, "JFK", "LAX", "EUR")
+    selector.record(CURRENCIES, "JFK", "LAX", ["EUR", "USD"], {"EUR": 90.0, "USD": 100.0})
+    sweep(selector, "JFK", "LAX", "AUD")  # a later sweep shows the top-2 would have missed
+
+    stats = selector.stats()
+    assert stats["searches"] == 4
+    assert stats["upstream_calls"] == 17
+    assert stats["full_sweep_calls"] == 20
+    assert stats["calls_saved"] == 3
+    assert stats["shadow_checks"] == 1
+    assert stats["estimated_hit_rate"] == 0.0
+    assert stats["estimated_extra_cost"] == round(10 / 90, 4)
+
+
+def test_contexts_are_bounded():
+    selector = CurrencySelector(warmup=0, max_routes=5)
+    for i in range(10):
+        sweep(selector, f"A{i:02d}", "LAX", "USD")
+    assert selector.stats()["contexts"] == 5
+
+
+def test_failed_currencies_count_as_queried():
+    selector = CurrencySelector(top_n=2, exploration=0.0, warmup=0)
+    # GBP was requested every time but never returned offers
+    for _ in range(5):
+        selector.record(CURRENCIES, "JFK", "LAX", CURRENCIES, {"USD": 100.0, "EUR": 100.0, "CAD": 90.0, "AUD": 100.0})
+    selector.record(CURRENCIES, "JFK", "LAX", ["CAD", "GBP"], {})
+
+    stats = selector.stats()
+    assert stats["full_sweeps"] == 5
+    assert stats["upstream_calls"] == 27
+    assert stats["calls_saved"] == 3
+    assert selector.rank(CURRENCIES, "JFK", "LAX")[-1] == "GBP"
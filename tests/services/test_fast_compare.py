@@ -0,0 +1,59 @@
+import pytest
+from app.services.fast_compare import DivergenceTracker, project_prices
+from app.services import flight_service
+
+RATES = {"USD": 1.0, "EUR": 0.9, "GBP": 0.8}
+
+
+def test_project_prices():
+    rows = project_prices({"currency": "USD", "price": 100.0, "parsed_offer": {"id": 1}}, ["USD", "EUR", "GBP", "JPY"], RATES)
+    assert [(r["currency"], r["price"], r["estimated"]) for r in rows] == [
+        ("USD", 100.0, False), ("EUR", 90.0, True), ("GBP", 80.0, True)
+    ]
+    assert all(r["price_usd"] == 100.0 for r in rows)
+
+
+def test_divergence_tracker():
+    tracker = DivergenceTracker()
+    assert tracker.expected_error() is None
+    assert tracker.record(100.0, {"USD": 100.0, "EUR": 95.0, "GBP": 110.0}) == {"USD": 0.0, "EUR": -0.05, "GBP": 0.1}
+    stats = tracker.stats()
+    assert stats["audits"] == 1
+    assert stats["mean_abs_divergence"] == 0.05
+    assert stats["mean_missed_savings"] == 0.05
+    assert stats["currencies"]["GBP"]["max_abs_divergence"] == 0.1
+
+
+@pytest.fixture
+def service(priced_service):
+    # EUR is 90 USD
+    return priced_service({"USD": 100.0, "EUR": 81.0, "GBP": 80.0}, currencies=["USD", "EUR", "GBP"], rates=RATES)
+
+
+@pytest.mark.asyncio
+async def test_fast_mode_makes_one_call(service, monkeypatch):
+    monkeypatch.setattr("app.services.flight_service.settings.FAST_AUDIT_RATE", 0.0)
+    result = await service.compare_prices("JFK", "LAX", "2025-12-01", mode="fast")
+    assert [currency for _, _, currency in service.searched] == ["USD"]
+    assert result["mode"] == "fast"
+    assert {r["currency"]: r["price"] for r in result["all_results"]} == {"USD": 100.0, "EUR": 90.0, "GBP": 80.0}
+
+    await service.compare_prices("JFK", "LAX", "2025-12-01", mode="fast")
+    assert [currency for _, _, currency in service.searched] == ["USD"]
+    assert service.result_ttl("JFK", "LAX", "2025-12-01", mode="fast") > 0
+    assert service.result_ttl("JFK", "LAX", "2025-12-01") == 0
+
+
+@pytest.mark.asyncio
+async def test_fast_mode_audit_records_divergence(service, monkeypatch):
+    monkeypatch.setattr("app.services.flight_service.settings.FAST_AUDIT_RATE", 1.0)
+    await service.compare_prices("JFK", "LAX", "2025-12-01", mode="fast")
+    await next(iter(service._audits))
+    assert flight_service.price_history.get("JFK-LAX").tolist() == [100.0]  # the audit does not record the search a second time
+
+    stats = service.fast_divergence.stats()
+    assert stats["audits"] == 1
+    assert stats["currencies"]["EUR"]["mean_divergence"] == -0.1
+    assert stats["mean_missed_savings"] == 0.1  # EUR was really 90 USD against the 100 USD fast answer
+    full = await service.compare_prices("JFK", "LAX", "2025-12-01", mode="fast")
+    assert full["mode"] == "full"  # the audit's full sweep is served afterwards
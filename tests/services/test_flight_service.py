@@ -1,5 +1,12 @@
+import httpx
+import json
 import pytest
-from app.services.flight_service import FlightService
+from unittest.mock import MagicMock
+from app.services.flight_service import FlightService, iso_duration_minutes
+from app.services.currency_selector import CurrencySelector
+from app.core.config import settings
+from app.services.price_analytics import PriceHistory
+from tests.conftest import make_offer
 
 @pytest.mark.asyncio
 async def test_get_access_token_success():
@@ -53,4 +60,182 @@ async def test_compare_prices_no_flights():
     service.currencies = ["USD"]
 
     result = await service.compare_prices("JFK", "XXX", "2025-12-01")
-    assert result["error"] == "No flight offers found"
\ No newline at end of file
+    assert result["error"] == "No flight offers found"
+
+
+@pytest.mark.asyncio
+async def test_access_token_is_reused_until_expiry(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"access_token": f"token-{len(calls)}", "expires_in": 1799})
+
+    class MockClient(httpx.AsyncClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr("app.services.flight_service.httpx.AsyncClient", MockClient)
+    service = FlightService()
+    assert await service.get_access_token() == "token-1"
+    assert await service.get_access_token() == "token-1"
+    assert len(calls) == 1
+
+    service._tokens.clear()  # as if the token expired
+    assert await service.get_access_token() == "token-2"
+
+def test_exchange_rates_are_cached(monkeypatch):
+    get = MagicMock(return_value=MagicMock(json=lambda: {"rates": {"EUR": 0.9}}))
+    monkeypatch.setattr("app.services.flight_service.requests", MagicMock(get=get))
+    service = FlightService()
+    assert service.get_exchange_rates("USD") == {"EUR": 0.9}
+    assert service.get_exchange_rates("USD") == {"EUR": 0.9}
+    assert get.call_count == 1
+
+@pytest.mark.asyncio
+async def test_compare_prices_results_are_cached(monkeypatch):
+    service = FlightService()
+    fetch = MagicMock()
+
+    async def fake_fetch(*args, **kwargs):
+        fetch(*args)
+        return {"lowest_currency": "USD", "all_results": []}
+
+    monkeypatch.setattr(service, "_fetch_prices", fake_fetch)
+    assert service.result_ttl("JFK", "LAX", "2025-12-01") == 0
+    await service.compare_prices("JFK", "LAX", "2025-12-01")
+    await service.compare_prices("jfk", "lax", "2025-12-01")
+    assert fetch.call_count == 1
+    assert 0 < service.result_ttl("JFK", "LAX", "2025-12-01") <= 300
+
+def test_parse_flight_offer_reads_every_segment_and_itinerary():
+    offer = make_offer([
+        [("AA100", "JFK", "2025-12-01T08:00:00", "ORD", "2025-12-01T10:00:00"),
+         ("AA200", "ORD", "2025-12-01T11:30:00", "LAX", "2025-12-01T14:00:00")],
+        [("AA300", "LAX", "2025-12-08T09:00:00", "JFK", "2025-12-08T17:30:00")]
+    ])
+    offer["travelerPricings"][0]["fareDetailsBySegment"][1]["includedCheckedBags"]["quantity"] = 0
+    parsed = FlightService().parse_flight_offer(offer)
+
+    assert parsed["arrival"]["airport"] == "LAX"
+    assert parsed["flight_info"]["flight_numbers"] == ["AA100", "AA200"]
+    assert parsed["flight_info"]["stops"] == 1
+    assert parsed["trip_type"] == "round_trip"
+    outbound, inbound = parsed["itineraries"]
+    assert outbound["layovers"] == [{"airport": "ORD", "minutes": 90}]
+    assert outbound["duration_minutes"] == 300
+    assert inbound["stops"] == 0
+    assert parsed["total_duration_minutes"] == 300 + 120
+    assert parsed["baggage"]["checked_bags"]["quantity"] == 0
+
+def test_trip_type_treats_open_jaw_returns_as_round_trips():
+    def trip(*legs):
+        offer = make_offer([[("BA1", origin, "2025-12-01T08:00:00", destination, "2025-12-01T20:00:00")] for origin, destination in legs])
+        return FlightService().parse_flight_offer(offer)["trip_type"]
+
+    assert trip(("JFK", "LHR"), ("LHR", "EWR")) == "round_trip"
+    assert trip(("JFK", "LHR"), ("CDG", "JFK")) == "round_trip"
+    assert trip(("SFO", "LHR"), ("LHR", "OAK")) == "round_trip"
+    assert trip(("LHR", "CDG"), ("CDG", "FCO")) == "multi_city"
+    assert trip(("JFK", "LHR"), ("LHR", "CDG"), ("CDG", "JFK")) == "multi_city"
+
+def test_iso_duration_minutes():
+    assert iso_duration_minutes("PT5H30M") == 330
+    assert iso_duration_minutes("P1DT2H") == 1560
+    assert iso_duration_minutes("PT45M") == 45
+    assert iso_duration_minutes(None) is None
+    assert iso_duration_minutes("5 hours") is None
+
+@pytest.mark.asyncio
+async def test_multi_city_search_posts_every_leg(monkeypatch):
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request)
+        return httpx.Response(200, json={"data": [make_offer([
+            [("BA1", "LHR", "2025-12-01T08:00:00", "CDG", "2025-12-01T10:00:00")],
+            [("AF2", "CDG", "2025-12-05T08:00:00", "FCO", "2025-12-05T10:00:00")]
+        ])]})
+
+    class MockClient(httpx.AsyncClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr("app.services.flight_service.httpx.AsyncClient", MockClient)
+    service = FlightService()
+    service._tokens.set("amadeus", "token", ttl=60)
+    result = await service.search_flights("LHR", "CDG", "2025-12-01", "EUR", 2, legs=(("CDG", "FCO", "2025-12-05"),))
+
+    request = requests_seen[0]
+    assert request.method == "POST"
+    body = json.loads(request.content)
+    assert [leg["destinationLocationCode"] for leg in body["originDestinations"]] == ["CDG", "FCO"]
+    assert len(body["travelers"]) == 2 and body["currencyCode"] == "EUR"
+    assert result["parsed_offer"]["trip_type"] == "multi_city"
+
+@pytest.mark.asyncio
+async def test_compare_prices_queries_learned_currencies(priced_service, monkeypatch):
+    currencies = settings.FLIGHT_CURRENCIES
+    service = priced_service({c: 80.0 if c == "CAD" else 100.0 for c in currencies}, currencies=currencies)
+    service.currency_selector = CurrencySelector(top_n=2, exploration=0.0, warmup=1)
+    monkeypatch.setattr("app.services.flight_service.settings.CURRENCY_SELECTION_ENABLED", True)
+
+    first = await service.compare_prices("JFK", "LAX", "2025-12-01")
+    assert first["currencies_queried"] == service.currencies
+    service.searched.clear()
+    second = await service.compare_prices("JFK", "LAX", "2025-12-02")
+    assert [currency for _, _, currency in service.searched] == second["currencies_queried"] == ["CAD", "USD"]
+    assert second["lowest_currency"] == "CAD"
+
+@pytest.mark.asyncio
+async def test_compare_prices_compares_with_history_before_recording(priced_service, monkeypatch):
+    service = priced_service({"USD": 650.0})
+    history = PriceHistory(maxlen=10)
+    for price in [600, 620, 580, 640, 610]:
+        history.record("JFK-LAX", price)
+    monkeypatch.setattr("app.services.flight_service.price_history", history)
+
+    result = await service.compare_prices(" jfk", "LAX ", "2025-12-01")
+    # The fare is judged against the five earlier fares only, then recorded
+    assert result["price_history"]["samples"] == 5
+    assert result["price_history"]["percentile_rank"] == 100.0
+    assert history.get("JFK-LAX").tolist()[-1] == 650.0
+
+@pytest.mark.asyncio
+async def test_search_flights_streams_offers(monkeypatch):
+    offers = [
+        make_offer([[("AA1", "JFK", "2025-12-01T06:00:00", "LAX", "2025-12-01T09:00:00")]], total=total, offer_id=str(i))
+        for i, total in enumerate(["300.00", "250.00", "280.00"])
+    ]
+    for offer in offers:
+        offer["pricingOptions"] = {"fareType": ["PUBLISHED"]}
+        offer["travelerPricings"].append({"travelerId": "2", "fareDetailsBySegment": []})
+        offer["itineraries"][0]["segments"][0]["co2Emissions"] = [{"weight": 100}]
+    body = json.dumps({"meta": {"count": 3}, "data": offers}).encode()
+    chunks_read = []
+
+    async def chunks():
+        for start in range(0, len(body), 200):
+            chunks_read.append(start)
+            yield body[start:start + 200]
+        chunks_read.append("dictionaries")
+        yield b', "dictionaries": {}}'
+
+    class MockClient(httpx.AsyncClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, transport=httpx.MockTransport(lambda request: httpx.Response(200, content=chunks())), **kwargs)
+
+    monkeypatch.setattr("app.services.flight_service.httpx.AsyncClient", MockClient)
+    body = body[:-1]  # the closing brace comes after dictionaries
+    service = FlightService()
+    service._tokens.set("amadeus", "token", ttl=60)
+    result = await service.search_flights("JFK", "LAX", "2025-12-01")
+
+    assert result["price"] == 250.0
+    assert result["raw_offer"] == offers[1]
+    assert [offer["id"] for offer in result["offers"]] == ["0", "1", "2"]
+    compact = result["offers"][1]
+    assert "pricingOptions" not in compact and len(compact["travelerPricings"]) == 1
+    assert "co2Emissions" not in compact["itineraries"][0]["segments"][0]
+    assert service.parse_flight_offer(compact) == result["parsed_offer"]
+    assert "dictionaries" not in chunks_read
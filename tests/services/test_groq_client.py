@@ -0,0 +1,127 @@
+import asyncio
+import httpx
+import pytest
+from groq import RateLimitError
+from unittest.mock import AsyncMock, MagicMock
+from app.services.groq_client import AIBusyError, GroqClient
+
+
+def make_client(create, **kwargs) -> GroqClient:
+    inner = MagicMock()
+    inner.chat.completions.create = create
+    return GroqClient(client=inner, **kwargs)
+
+
+def rate_limit_error(retry_after: str = "0") -> RateLimitError:
+    response = httpx.Response(
+        429,
+        headers={"retry-after": retry_after},
+        request=httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    )
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped():
+    running = 0
+    peak = 0
+
+    async def create(**kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    client = make_client(create, max_concurrency=2, max_queue=10, timeout=5)
+    results = await asyncio.gather(*[client.chat.completions.create(model="m") for _ in range(6)])
+
+    assert results == ["ok"] * 6
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_immediately():
+    release = asyncio.Event()
+
+    async def create(**kwargs):
+        await release.wait()
+        return "ok"
+
+    client = make_client(create, max_concurrency=1, max_queue=1, timeout=5)
+    running = asyncio.create_task(client.create(model="m"))
+    queued = asyncio.create_task(client.create(model="m"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AIBusyError):
+        await client.create(model="m")
+    assert client.stats()["rejected"] == 1
+
+    release.set()
+    assert await running == "ok"
+    assert await queued == "ok"
+
+@pytest.mark.asyncio
+async def test_deadline_is_enforced():
+    async def create(**kwargs):
+        await asyncio.sleep(1)
+
+    client = make_client(create, max_concurrency=1, max_queue=1, timeout=0.05)
+    with pytest.raises(AIBusyError):
+        await client.create(model="m")
+    assert client.stats()["active"] == 0
+
+@pytest.mark.asyncio
+async def test_rate_limit_is_retried():
+    create = AsyncMock(side_effect=[rate_limit_error("0"), "ok"])
+    client = make_client(create, max_retries=2, timeout=5)
+
+    assert await client.create(model="m") == "ok"
+    assert create.await_count == 2
+    assert client.stats()["retried"] == 1
+
+@pytest.mark.asyncio
+async def test_rate_limit_gives_up_when_retry_after_exceeds_deadline():
+    create = AsyncMock(side_effect=rate_limit_error("30"))
+    client = make_client(create, max_retries=2, timeout=1)
+
+    with pytest.raises(RateLimitError):
+        await client.create(model="m")
+    assert create.await_count == 1
+
+@pytest.mark.asyncio
+async def test_stream_holds_slot_until_exhausted():
+    async def chunks():
+        for piece in ("a", "b"):
+            yield piece
+
+    client = make_client(AsyncMock(return_value=chunks()), max_concurrency=1, timeout=5)
+    stream = client.stream(model="m")
+    assert await stream.__anext__() == "a"
+    assert client.stats()["active"] == 1
+    assert [chunk async for chunk in stream] == ["b"]
+    assert client.stats()["active"] == 0
+
+
+def test_client_survives_a_new_event_loop_per_invocation(monkeypatch):
+    async def create(**kwargs):
+        await asyncio.sleep(0)
+        return "ok"
+
+    pools = []
+
+    def async_groq(**kwargs):
+        pools.append(MagicMock())
+        pools[-1].chat.completions.create = create
+        return pools[-1]
+
+    monkeypatch.setattr("app.services.groq_client.groq", MagicMock(AsyncGroq=async_groq, RateLimitError=RateLimitError))
+    client = GroqClient(api_key="key", max_concurrency=1, max_queue=5, timeout=5)
+
+    async def invocation():
+        return await asyncio.gather(*[client.create(model="m") for _ in range(3)])
+
+    # Like a warm serverless container running each invocation under asyncio.run
+    assert asyncio.run(invocation()) == ["ok"] * 3
+    assert asyncio.run(invocation()) == ["ok"] * 3
+    assert len(pools) == 2
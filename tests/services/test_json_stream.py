@@ -0,0 +1,66 @@
+import json
+import pytest
+from app.core.json_stream import JSONArrayStream, JSONFieldParser
+
+BODY = json.dumps({
+    "meta": {"count": 2, "note": "[\"]}"},
+    "data": [{"id": "1", "name": "é]}", "tags": ["{", "{["]}, {"id": "2", "price": 1.5}],
+    "dictionaries": {"carriers": {"AA": "AMERICAN"}}
+}).encode()
+ELEMENTS = [{"id": "1", "name": "é]}", "tags": ["{", "{["]}, {"id": "2", "price": 1.5}]
+
+
+def feed_in_chunks(stream, body, size):
+    elements = []
+    for start in range(0, len(body), size):
+        elements += stream.feed(body[start:start + size])
+        if stream.done:
+            break
+    return elements + stream.close()
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(BODY)])
+def test_json_array_stream_yields_elements_across_chunks(size):
+    assert feed_in_chunks(JSONArrayStream("data"), BODY, size) == ELEMENTS
+
+
+def test_json_array_stream_stops_at_the_end_of_the_array():
+    stream = JSONArrayStream("data")
+    head = BODY[:BODY.index(b"dictionaries")]
+    assert stream.feed(head) == ELEMENTS
+    assert stream.done
+    assert stream.close() == []
+
+
+def test_json_array_stream_decodes_a_split_element_once_it_can_be_whole():
+    body = json.dumps({"data": [{"a": [1, 2], "b": {"c": "x" * 50}}]})
+    stream = JSONArrayStream("data")
+    assert stream.feed(body[:30]) == []
+    # More text that cannot close the element does not complete it
+    assert stream.feed(body[30:40]) == []
+    assert stream.feed(body[40:]) == [{"a": [1, 2], "b": {"c": "x" * 50}}]
+
+
+def test_json_array_stream_rejects_truncated_and_malformed_bodies():
+    stream = JSONArrayStream("data")
+    stream.feed(b'{"data": [{"id": "1"}')
+    with pytest.raises(ValueError):
+        stream.close()
+
+    with pytest.raises(ValueError):
+        JSONArrayStream("data").feed(b'[{"id": "1"}]')
+    with pytest.raises(ValueError):
+        JSONArrayStream("data").feed(b'{"data": {"id": "1"}}')
+
+    # A body without the field is complete once the object closes
+    assert feed_in_chunks(JSONArrayStream("data"), b'{"meta": {"count": 0}}', 4) == []
+
+
+def test_json_field_parser_emits_fields_as_they_complete():
+    parser = JSONFieldParser()
+    assert parser.feed('Here you go: {"insights": "Fly mid') == []
+    assert parser.feed('week", "count": 1') == [("insights", "Fly midweek")]
+    # A number at the end of the text may still grow
+    assert parser.feed('2, "tips": []}') == [("count", 12), ("tips", [])]
+    assert parser.closed
+    assert parser.result() == {"insights": "Fly midweek", "count": 12, "tips": []}
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from app.services.flight_service import FlightService
+from app.services.offer_ranking import cost_matrix, pareto_front, parse_weights, weighted_scores
+from app.services.offer_snapshot import OfferSnapshot
+from tests.conftest import make_offer
+
+
+def brute_force_front(costs):
+    return np.array([
+        not any(np.all(other <= row) and np.any(other < row) for other in costs)
+        for row in costs
+    ])
+
+
+def test_pareto_front_matches_brute_force():
+    rng = np.random.default_rng(7)
+    costs = np.column_stack([
+        rng.integers(100, 120, 300), rng.integers(60, 90, 300), rng.integers(0, 3, 300), -rng.integers(0, 3, 300)
+    ]).astype(float)
+    assert np.array_equal(pareto_front(costs), brute_force_front(costs))
+
+
+def test_pareto_front_keeps_duplicates_and_trade_offs():
+    costs = cost_matrix(
+        price_usd=np.array([100.0, 100.0, 150.0, 160.0, 90.0]),
+        duration=np.array([300.0, 300.0, 120.0, 130.0, np.inf]),
+        stops=np.array([1, 1, 0, 0, 2]),
+        bags=np.array([1, 1, 1, 1, 0])
+    )
+    assert costs[4, 1] == 300.0  # unknown duration counts as the longest known
+    assert pareto_front(costs).tolist() == [True, True, True, False, True]
+
+
+def test_weighted_scores():
+    costs = np.array([[100.0, 300, 1, -1], [200.0, 100, 0, -1]])
+    assert weighted_scores(costs, parse_weights("price:1")).tolist() == [0.0, 1.0]
+    assert weighted_scores(costs, parse_weights("duration:1,stops:1")).tolist() == [1.0, 0.0]
+
+
+def test_parse_weights():
+    assert parse_weights("price:3,duration:1") == {"price": 0.75, "duration": 0.25, "stops": 0.0, "bags": 0.0}
+    assert sum(parse_weights(None).values()) == pytest.approx(1.0)
+    for bad in ("speed:1", "price:x", "price:-1", "price:0"):
+        with pytest.raises(ValueError):
+            parse_weights(bad)
+
+
+def test_rank_best_dedupes_itineraries_and_flags_front():
+    nonstop = [("AA1", "JFK", "2025-12-01T06:00:00", "LAX", "2025-12-01T08:00:00")]
+    connection = [("UA2", "JFK", "2025-12-01T06:00:00", "DEN", "2025-12-01T08:00:00"),
+                  ("UA3", "DEN", "2025-12-01T12:00:00", "LAX", "2025-12-01T14:00:00")]
+    snapshot = OfferSnapshot([
+        ("USD", make_offer([nonstop], total="300.00")),
+        ("USD", make_offer([connection], total="200.00")),
+        ("EUR", make_offer([nonstop], total="140.00", currency="EUR")),
+    ], {"USD": 1.0, "EUR": 0.5})
+
+    rows, front_size = snapshot.rank_best(parse_weights("price:1,duration:2"), 10, FlightService().parse_flight_offer)
+    assert front_size == 2
+    assert [row["parsed_offer"]["flight_info"]["flight_number"] for row in rows] == ["AA1", "UA2"]
+    assert rows[0]["currency"] == "EUR"  # cheapest quote of the nonstop flight
+    assert all(row["pareto_optimal"] for row in rows)
+    assert snapshot.best_score.shape == (3,)
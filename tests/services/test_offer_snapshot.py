@@ -0,0 +1,99 @@
+import pytest
+from app.services.flight_service import FlightService
+from app.services.offer_snapshot import OfferSnapshot, decode_cursor, encode_cursor
+from tests.conftest import make_offer
+
+RATES = {"USD": 1.0, "EUR": 0.5}
+
+
+def build_snapshot():
+    offers = [
+        ("USD", make_offer([[("AA1", "JFK", "2025-12-01T06:00:00", "LAX", "2025-12-01T08:00:00")]], total="300.00")),
+        ("USD", make_offer([[("UA2", "JFK", "2025-12-01T09:00:00", "DEN", "2025-12-01T11:00:00"),
+                             ("UA3", "DEN", "2025-12-01T12:00:00", "LAX", "2025-12-01T14:00:00")]], total="200.00")),
+        ("EUR", make_offer([[("AA4", "JFK", "2025-12-01T18:00:00", "LAX", "2025-12-01T20:00:00")]], total="120.00", currency="EUR")),
+        ("EUR", make_offer([[("DL5", "JFK", "2025-12-01T21:00:00", "LAX", "2025-12-01T23:00:00")]], total="160.00", currency="EUR")),
+    ]
+    return OfferSnapshot(offers, RATES)
+
+
+def flight_numbers(rows):
+    return [row["parsed_offer"]["flight_info"]["flight_number"] for row in rows]
+
+
+def test_snapshot_columns():
+    snapshot = build_snapshot()
+    assert len(snapshot) == 4
+    assert snapshot.carriers == ["AA", "DL", "UA"]
+    assert snapshot.price_usd.tolist() == [300.0, 200.0, 240.0, 320.0]
+    assert snapshot.stops.tolist() == [0, 1, 0, 0]
+    assert snapshot.duration.tolist() == [120, 300, 120, 120]
+
+
+@pytest.mark.parametrize("filters, sort, expected", [
+    ({}, "price", ["UA2", "AA4", "AA1", "DL5"]),
+    ({}, "-price", ["DL5", "AA1", "AA4", "UA2"]),
+    ({"nonstop": True}, "duration", ["AA4", "AA1", "DL5"]),
+    ({"carrier": "AA"}, "departure", ["AA1", "AA4"]),
+    ({"carrier": "ZZ"}, "price", []),
+    ({"depart_after": 8 * 60, "depart_before": 20 * 60}, "price", ["UA2", "AA4"]),
+    ({"currency": "EUR", "max_price": 150}, "price", ["AA4"]),
+    ({"max_price": 250, "max_duration": 200}, "price", ["AA4"]),
+])
+def test_filters_and_sorts(filters, sort, expected):
+    rows, total = build_snapshot().page(filters, sort, 0, 10, FlightService().parse_flight_offer)
+    assert flight_numbers(rows) == expected
+    assert total == len(expected)
+
+
+def test_paging_reuses_order():
+    snapshot = build_snapshot()
+    parse = FlightService().parse_flight_offer
+    first, total = snapshot.page({}, "price", 0, 2, parse)
+    second, _ = snapshot.page({}, "price", 2, 2, parse)
+    assert total == 4
+    assert flight_numbers(first + second) == ["UA2", "AA4", "AA1", "DL5"]
+    assert len(snapshot._orders) == 1
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("abc", {"nonstop": True}, "-price", 20)
+    assert decode_cursor(cursor) == ("abc", {"nonstop": True}, "-price", 20)
+    bad_cursors = (
+        "not-a-cursor",
+        encode_cursor("abc", {"evil": 1}, "price", 0),
+        encode_cursor("abc", {}, "name", 0),
+        encode_cursor("abc", {}, 5, 0),
+        encode_cursor(["abc"], {}, "price", 0),
+        encode_cursor("abc", {}, "price", "20"),
+        encode_cursor("abc", {"max_price": "x"}, "price", 0),
+        encode_cursor("abc", {"nonstop": 1}, "price", 0),
+        encode_cursor("abc", {"depart_after": True}, "price", 0),
+        encode_cursor("abc", [], "price", 0),
+    )
+    for bad in bad_cursors:
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+def test_compare_itineraries_matches_the_same_flight_across_currencies():
+    morning = [("AA1", "JFK", "2025-12-01T06:00:00", "LAX", "2025-12-01T08:00:00")]
+    evening = [("DL5", "JFK", "2025-12-01T21:00:00", "LAX", "2025-12-01T23:00:00")]
+    snapshot = OfferSnapshot([
+        ("USD", make_offer([morning], total="300.00")),
+        ("USD", make_offer([evening], total="200.00")),
+        ("EUR", make_offer([morning], total="140.00", currency="EUR")),  # 280 USD
+        ("EUR", make_offer([morning], total="145.00", currency="EUR")),  # dearer fare for the same flight
+        ("EUR", make_offer([evening], total="110.00", currency="EUR")),  # 220 USD
+    ], RATES)
+
+    evening_row, morning_row = snapshot.compare_itineraries()
+    assert evening_row["flight_numbers"] == ["DL5"]
+    assert evening_row["best_currency"] == "USD"
+    assert evening_row["best_price_usd"] == 200.0
+    assert morning_row["best_currency"] == "EUR"
+    assert morning_row["best_price"] == 140.0
+    assert morning_row["savings_usd"] == 20.0
+    assert {p["currency"]: p["price"] for p in morning_row["prices"]} == {"EUR": 140.0, "USD": 300.0}
+    assert len(snapshot.fingerprints) == 2
+    assert snapshot.compare_itineraries(limit=1) == [evening_row]
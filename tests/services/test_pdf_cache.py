@@ -0,0 +1,51 @@
+import hashlib
+import os
+import pytest
+from app.services.pdf_cache import PDFCache
+
+def digest_of(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def test_put_and_get_round_trip(tmp_path):
+    cache = PDFCache(str(tmp_path), max_bytes=1024 * 1024)
+    digest = digest_of(b"fare rules")
+    chunks = [{"content": "Refunds allowed", "metadata": {"page": 0}}]
+
+    assert cache.get(digest) is None
+    cache.put(digest, chunks)
+    assert cache.contains(digest)
+    assert cache.get(digest) == chunks
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = PDFCache(str(tmp_path), max_bytes=250)
+    first, second, third = (digest_of(bytes([i])) for i in range(3))
+    chunk = [{"content": "x" * 80, "metadata": {}}]
+
+    cache.put(first, chunk)
+    cache.put(second, chunk)
+    os.utime(cache.path_for(first), (1, 1))
+    os.utime(cache.path_for(second), (2, 2))
+    cache.get(first)  # refresh first, leaving second as least recently used
+    cache.put(third, chunk)
+
+    assert cache.contains(first)
+    assert not cache.contains(second)
+    assert cache.contains(third)
+
+def test_discarded_writer_publishes_nothing(tmp_path):
+    cache = PDFCache(str(tmp_path), max_bytes=1024)
+    digest = digest_of(b"partial")
+    writer = cache.open_writer(digest)
+    writer.write({"content": "half", "metadata": {}})
+    writer.discard()
+
+    assert not cache.contains(digest)
+    assert os.listdir(tmp_path) == []
+
+def test_rejects_invalid_digests(tmp_path):
+    cache = PDFCache(str(tmp_path))
+    assert not cache.contains("../../etc/passwd")
+    with pytest.raises(ValueError):
+        cache.path_for("not-a-digest")
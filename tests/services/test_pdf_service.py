@@ -1,10 +1,17 @@
 import pytest
-from app.services.pdf_service import PDFService
+from app.services.pdf_service import PDFService, _load_and_split, _split_page_range
 from unittest.mock import patch, MagicMock
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+@pytest.fixture
+def service():
+    # Run the pool work in a thread so the PyPDFLoader patches apply
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        yield PDFService(executor=executor, workers=1)
 
 @pytest.mark.asyncio
-async def test_process_pdf_success():
-    service = PDFService()
+async def test_process_pdf_success(service):
     fake_file_path = "fake.pdf"
     fake_pages = [MagicMock(page_content="Page 1", metadata={"page": 1}), MagicMock(page_content="Page 2", metadata={"page": 2})]
     
@@ -18,8 +25,7 @@ async def test_process_pdf_success():
         assert "metadata" in chunks[0]
 
 @pytest.mark.asyncio
-async def test_extract_text_success():
-    service = PDFService()
+async def test_extract_text_success(service):
     fake_file_path = "fake.pdf"
     fake_pages = [MagicMock(page_content="Page 1"), MagicMock(page_content="Page 2")]
     
@@ -30,8 +36,7 @@ async def test_extract_text_success():
         assert text == "Page 1\nPage 2"
 
 @pytest.mark.asyncio
-async def test_process_pdf_error():
-    service = PDFService()
+async def test_process_pdf_error(service):
     fake_file_path = "fake.pdf"
     with patch("app.services.pdf_service.PyPDFLoader", side_effect=Exception("Load error")):
         with pytest.raises(Exception) as exc:
@@ -39,10 +44,58 @@ async def test_process_pdf_error():
         assert "Error processing PDF" in str(exc.value)
 
 @pytest.mark.asyncio
-async def test_extract_text_error():
-    service = PDFService()
+async def test_extract_text_error(service):
     fake_file_path = "fake.pdf"
     with patch("app.services.pdf_service.PyPDFLoader", side_effect=Exception("Load error")):
         with pytest.raises(Exception) as exc:
             await service.extract_text(fake_file_path)
         assert "Error extracting text from PDF" in str(exc.value)
+
+@pytest.mark.asyncio
+async def test_process_pdf_in_process_pool():
+    chunks = await PDFService().process_pdf(str(Path("cypress/fixtures/sample.pdf")))
+    assert len(chunks) > 0
+    assert chunks[0]["content"].strip() != ""
+
+def sample_pages(count):
+    return [
+        "\n".join(f"Page {page} fare rule {line}: changes permitted for a fee of {line * 5} USD." for line in range(40))
+        for page in range(count)
+    ]
+
+@pytest.mark.asyncio
+async def test_iter_chunks_matches_process_pdf(text_pdf, service, monkeypatch):
+    monkeypatch.setattr("app.services.pdf_service.settings.PDF_STREAM_BATCH_PAGES", 2)
+    file_path = text_pdf(sample_pages(5))
+
+    streamed = [chunk async for chunk in service.iter_chunks(file_path)]
+    loaded = await service.process_pdf(file_path)
+
+    # Same content and the same metadata PyPDFLoader reports, page labels included
+    assert streamed == loaded
+    assert streamed[-1]["metadata"]["total_pages"] == 5
+
+@pytest.mark.asyncio
+async def test_iter_pages_streams_text_in_order(text_pdf, service, monkeypatch):
+    monkeypatch.setattr("app.services.pdf_service.settings.PDF_STREAM_BATCH_PAGES", 2)
+    file_path = text_pdf(["first", "second", "third"])
+
+    pages = [page async for page in service.iter_pages(file_path)]
+    assert pages == [{"page": 0, "text": "first"}, {"page": 1, "text": "second"}, {"page": 2, "text": "third"}]
+
+@pytest.mark.asyncio
+async def test_large_pdf_is_split_into_parallel_page_ranges(text_pdf, monkeypatch):
+    monkeypatch.setattr("app.services.pdf_service.settings.PDF_PARALLEL_MIN_BYTES", 0)
+    file_path = text_pdf(sample_pages(9))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        service = PDFService(executor=executor, workers=4)
+        with patch("app.services.pdf_service._split_page_range", wraps=_split_page_range) as split:
+            parallel = await service.process_pdf(file_path)
+        text = await service.extract_text(file_path)
+
+    # 9 pages over 4 workers -> ranges of 2 pages, merged back in page order
+    assert split.call_count == 5
+    # Identical to the PyPDFLoader path used for small files
+    assert parallel == _load_and_split(file_path)
+    assert text == "\n".join(sample_pages(9))
@@ -0,0 +1,52 @@
+import pytest
+from app.services.price_analytics import PriceAnalyzer, PriceHistory
+
+PRICES = [
+    {"currency": "USD", "price": 500.0, "price_usd": 500.0},
+    {"currency": "EUR", "price": 430.0, "price_usd": 470.0},
+    {"currency": "GBP", "price": 380.0, "price_usd": 485.0},
+    {"currency": "CAD", "price": 700.0, "price_usd": 510.0}
+]
+
+def test_analyze_computes_best_value_and_spread():
+    result = PriceAnalyzer().analyze(PRICES)
+    stats = result["stats"]
+
+    assert result["best_value_currency"] == "EUR"
+    assert stats["best_price"] == 430.0
+    assert stats["spread_usd"] == 40.0
+    assert stats["savings_vs_usd"] == 30.0
+    assert stats["savings_vs_usd_pct"] == 6.0
+    assert stats["percentiles_usd"]["p50"] == 492.5
+    assert [row["currency"] for row in stats["currencies"]] == ["EUR", "GBP", "USD", "CAD"]
+    assert stats["history"] is None
+    assert result["booking_recommendation"].startswith("Not enough recent searches")
+    assert "usual range" not in result["booking_recommendation"]
+    assert "saves $30.00 versus USD" in result["booking_recommendation"]
+
+def test_analyze_compares_against_history():
+    history = PriceHistory(maxlen=10)
+    for price in [600, 620, 580, 640, 610, 590]:
+        history.record("JFK-LAX", price)
+
+    result = PriceAnalyzer(min_history=5).analyze(PRICES, history.get("JFK-LAX"))
+
+    assert result["stats"]["history"]["samples"] == 6
+    assert result["stats"]["history"]["percentile_rank"] == 0.0
+    assert "lower than usual" in result["booking_recommendation"]
+
+def test_analyze_uses_a_precomputed_history_comparison():
+    compared = {"samples": 6, "percentile_rank": 90.0, "p10": 400.0, "p50": 420.0, "p90": 460.0}
+    result = PriceAnalyzer(min_history=5).analyze(PRICES, [100.0] * 10, history_stats=compared)
+    assert result["stats"]["history"] == compared
+    assert "higher than usual" in result["booking_recommendation"]
+
+def test_analyze_ignores_short_history_and_empty_prices():
+    assert PriceAnalyzer(min_history=5).analyze(PRICES, [400.0])["stats"]["history"] is None
+    assert PriceAnalyzer().analyze([])["best_value_currency"] == "Unknown"
+
+def test_price_history_is_bounded():
+    history = PriceHistory(maxlen=3)
+    for price in range(10):
+        history.record("JFK-LAX", price)
+    assert history.get("JFK-LAX").tolist() == [7.0, 8.0, 9.0]
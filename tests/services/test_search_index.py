@@ -0,0 +1,70 @@
+import hashlib
+import os
+import numpy as np
+from app.services.search_index import DocumentIndex, SearchIndex, tokenize
+
+def doc_id(name: str) -> str:
+    return hashlib.sha256(name.encode()).hexdigest()
+
+CHUNKS = [
+    {"content": "Checked baggage allowance: two bags up to 23kg", "metadata": {"page": 0}},
+    {"content": "Refunds are permitted up to 24 hours before departure", "metadata": {"page": 1}},
+    {"content": "Seat selection fees apply; refunds of seat fees are not permitted", "metadata": {"page": 2}},
+]
+
+def test_tokenize_lowercases_words():
+    assert tokenize("Refunds, 24 HOURS!") == ["refunds", "24", "hours"]
+
+def test_postings_are_array_backed():
+    index = DocumentIndex.build(CHUNKS)
+    chunk_ids, frequencies = index.postings("refunds")
+    assert isinstance(chunk_ids, np.ndarray)
+    assert chunk_ids.tolist() == [1, 2]
+    assert frequencies.tolist() == [1, 1]
+    assert index.postings("missing") is None
+
+def test_search_ranks_best_match_first():
+    index = SearchIndex(directory=None)
+    index.add(doc_id("rules"), CHUNKS)
+
+    results = index.search("refunds before departure", k=2)
+    assert [r["metadata"]["page"] for r in results] == [1, 2]
+    assert results[0]["score"] > results[1]["score"]
+    assert index.search("lounge access") == []
+
+def test_search_across_documents_and_filter():
+    index = SearchIndex(directory=None)
+    first, second = doc_id("a"), doc_id("b")
+    index.add(first, CHUNKS)
+    index.add(second, [{"content": "Refunds are processed within seven days", "metadata": {"page": 0}}])
+
+    assert {r["doc_id"] for r in index.search("refunds", k=10)} == {first, second}
+    assert {r["doc_id"] for r in index.search("refunds", k=10, doc_ids=[second])} == {second}
+
+def test_evicted_documents_reload_from_disk(tmp_path):
+    index = SearchIndex(str(tmp_path), max_documents=1)
+    first, second = doc_id("a"), doc_id("b")
+    index.add(first, CHUNKS)
+    index.add(second, CHUNKS[:1])
+    assert index.in_memory() == [second]
+
+    results = index.search("refunds", doc_ids=[first])
+    assert results[0]["metadata"] == {"page": 1}
+    assert index.in_memory() == [first]
+
+    # A fresh index over the same directory serves persisted documents
+    assert SearchIndex(str(tmp_path)).search("baggage", doc_ids=[second])[0]["doc_id"] == second
+
+    assert index.evict(first, purge=True)
+    assert not index.contains(first)
+
+def test_persisted_indexes_are_bounded(tmp_path):
+    first, second = doc_id("a"), doc_id("b")
+    SearchIndex(str(tmp_path)).add(first, CHUNKS)
+    size = os.path.getsize(tmp_path / f"{first}.npz")
+
+    # Room for one file: adding a second evicts the least recently used one from disk
+    index = SearchIndex(str(tmp_path), max_documents=1, max_bytes=size + size // 2)
+    index.add(second, CHUNKS)
+    assert os.listdir(tmp_path) == [f"{second}.npz"]
+    assert index.search("refunds", doc_ids=[first]) == []
@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.services.search_service import SearchService, SearchDeadlineError
+
+PRICES = {
+    "lowest_currency": "EUR",
+    "lowest_price": 450.0,
+    "lowest_price_usd": 490.0,
+    "all_results": [{"currency": "EUR", "price": 450.0, "price_usd": 490.0}]
+}
+
+def make_services(prices_delay=0.0, analysis_delay=0.0):
+    async def compare_prices(*args):
+        await asyncio.sleep(prices_delay)
+        return PRICES
+
+    async def analyze_search(flights):
+        await asyncio.sleep(analysis_delay)
+        return {"best_value_currency": "EUR"}
+
+    flight_service = MagicMock()
+    flight_service.compare_prices = compare_prices
+    ai_service = MagicMock()
+    ai_service.get_destination_insights = AsyncMock(return_value={"best_time_to_visit": "Spring"})
+    ai_service.get_travel_recommendations = AsyncMock(return_value={"recommendations": [], "insights": "Go"})
+    ai_service.analyze_search = analyze_search
+    return flight_service, ai_service
+
+@pytest.mark.asyncio
+async def test_search_with_insights_returns_all_sections():
+    service = SearchService(*make_services(), deadline=1)
+    result = await service.search_with_insights("JFK", "LAX", "2025-12-01")
+
+    assert result["flights"] == PRICES
+    assert result["insights"]["destination"] == {"best_time_to_visit": "Spring"}
+    assert result["insights"]["price_analysis"] == {"best_value_currency": "EUR"}
+    assert result["incomplete_sections"] == []
+    search_data = service.ai_service.get_travel_recommendations.await_args.args[0]
+    assert search_data["lowest_price_usd"] == 490.0
+
+@pytest.mark.asyncio
+async def test_search_with_insights_returns_partial_sections_at_deadline():
+    service = SearchService(*make_services(analysis_delay=5), deadline=0.1)
+    result = await service.search_with_insights("JFK", "LAX", "2025-12-01")
+
+    assert result["flights"] == PRICES
+    assert result["insights"]["price_analysis"] is None
+    assert result["incomplete_sections"] == ["price_analysis"]
+    assert result["elapsed_ms"] < 1000
+
+@pytest.mark.asyncio
+async def test_search_with_insights_raises_when_prices_miss_deadline():
+    service = SearchService(*make_services(prices_delay=5), deadline=0.05)
+    with pytest.raises(SearchDeadlineError):
+        await service.search_with_insights("JFK", "LAX", "2025-12-01")
@@ -1,6 +1,10 @@
+import csv
+import json
 import shutil
+import httpx
+from unittest.mock import AsyncMock
 from typer.testing import CliRunner
-from app.cli import app
+from app.cli import app, expand_pdf_paths
 import pytest
 from pathlib import Path
 
@@ -26,4 +30,85 @@ def test_extract_text(sample_pdf, tmp_path):
     assert f"Text saved to {output_file}" in result.output
     # Check that the output file was created and contains text
     assert output_file.exists()
-    assert output_file.read_text(encoding="utf-8").strip() != ""
\ No newline at end of file
+    assert output_file.read_text(encoding="utf-8").strip() != ""
+
+
+def mock_async_client(handler):
+    def create(base_url="http://localhost:8000", concurrency=4):
+        return httpx.AsyncClient(base_url=base_url, transport=httpx.MockTransport(handler))
+    return create
+
+def test_expand_pdf_paths(tmp_path):
+    for name in ("b.pdf", "a.pdf", "notes.txt"):
+        (tmp_path / name).write_bytes(b"%PDF-1.4")
+    assert expand_pdf_paths(str(tmp_path)) == [str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf")]
+    assert expand_pdf_paths(str(tmp_path / "a*.pdf")) == [str(tmp_path / "a.pdf")]
+
+def test_bulk_upload_directory(tmp_path, monkeypatch):
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        (tmp_path / name).write_bytes(name.encode())
+
+    uploaded = []
+
+    def handler(request):
+        if request.method == "HEAD":
+            return httpx.Response(404)
+        uploaded.append(request.content)
+        return httpx.Response(200, json=[{"content": "chunk", "metadata": {}}])
+    monkeypatch.setattr("app.cli.create_async_client", mock_async_client(handler))
+
+    result = runner.invoke(app, ["upload", str(tmp_path), "--concurrency", "2"])
+    assert result.exit_code == 0
+    assert "3 succeeded" in result.output
+    # Each file is streamed from disk into its multipart body
+    assert sorted(body.split(b"\r\n\r\n")[1].split(b"\r\n")[0] for body in uploaded) == [b"a.pdf", b"b.pdf", b"c.pdf"]
+
+def test_search_routes_writes_csv(tmp_path, monkeypatch):
+    routes = tmp_path / "routes.csv"
+    routes.write_text("origin,destination,departure_date\njfk,lax,2026-12-01\nJFK,XXX,2026-12-01\n")
+    output = tmp_path / "results.csv"
+
+    def handler(request):
+        if request.url.params["destination"] == "XXX":
+            return httpx.Response(200, json={"error": "No flight offers found"})
+        return httpx.Response(200, json={"lowest_currency": "EUR", "lowest_price": 90.0, "lowest_price_usd": 99.0})
+    monkeypatch.setattr("app.cli.create_async_client", mock_async_client(handler))
+
+    result = runner.invoke(app, ["search", str(routes), "--output-file", str(output)])
+    assert result.exit_code == 0
+    rows = {row["destination"]: row for row in csv.DictReader(output.open())}
+    assert rows["LAX"]["lowest_currency"] == "EUR"
+    assert rows["XXX"]["error"] == "No flight offers found"
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    from app.services.pdf_cache import PDFCache
+    from app.services.search_index import SearchIndex
+    monkeypatch.setattr("app.api.pdf_routes.pdf_cache", PDFCache(str(tmp_path / "cache")))
+    monkeypatch.setattr("app.api.pdf_routes.search_index", SearchIndex(str(tmp_path / "index")))
+    monkeypatch.setattr("app.api.pdf_routes.settings.UPLOAD_DIR", str(tmp_path / "uploads"))
+
+def test_local_upload_runs_without_server(text_pdf, local_storage):
+    text_pdf(["Refunds permitted before departure"], name="rules.pdf")
+    pdf = text_pdf(["Baggage allowance two bags"], name="bags.pdf")
+
+    result = runner.invoke(app, ["--local", "upload", pdf])
+    assert result.exit_code == 0
+    assert "Successfully processed PDF" in result.output
+
+    result = runner.invoke(app, ["--local", "upload", str(Path(pdf).parent)])
+    assert result.exit_code == 0
+    assert "2 succeeded" in result.output
+    assert "1 served from cache" in result.output
+
+def test_local_search_shares_one_app(tmp_path, monkeypatch):
+    routes = tmp_path / "routes.csv"
+    routes.write_text("origin,destination,departure_date\nJFK,LAX,2026-12-01\nJFK,SFO,2026-12-01\n")
+    compare_prices = AsyncMock(return_value={"lowest_currency": "USD", "lowest_price": 120.0, "lowest_price_usd": 120.0})
+    monkeypatch.setattr("app.api.flight_routes.flight_service.compare_prices", compare_prices)
+
+    result = runner.invoke(app, ["--local", "search", str(routes), "--format", "ndjson"])
+    assert result.exit_code == 0
+    rows = [json.loads(line) for line in result.stdout.splitlines() if line.startswith("{")]
+    assert {row["destination"] for row in rows} == {"LAX", "SFO"}
+    assert compare_prices.await_count == 2
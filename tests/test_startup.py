@@ -0,0 +1,25 @@
+import subprocess
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def test_heavy_dependencies_are_not_imported_at_startup():
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('groq', 'langchain', 'langchain_community', 'pypdf', 'numpy', 'requests') "
+        "if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+def test_lifespan_builds_service_singletons(monkeypatch):
+    from app.api import ai_routes, flight_routes
+    from app.main import app
+    monkeypatch.setattr(flight_routes, "flight_service", None)
+    monkeypatch.setattr(ai_routes, "ai_service", None)
+
+    with TestClient(app):
+        assert flight_routes.flight_service is not None
+        assert ai_routes.ai_service is not None